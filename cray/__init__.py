@@ -22,24 +22,13 @@
 # OTHER DEALINGS IN THE SOFTWARE.
 #
 """Cray module."""
+import importlib
 import os
 
-from cray import cli
+# Imported first so it can time everything imported after it.
+from cray import profiling  # pylint: disable=unused-import
 from cray import constants
-from cray import echo
-from cray import errors
-from cray import pals
-from cray import swagger
-from cray import utils
-from cray.config import Config
 from cray.constants import NAME
-from cray.core import argument
-from cray.core import command
-from cray.core import group
-from cray.core import option
-from cray.core import pass_context
-from cray.generator import generate
-from cray.rest import request
 
 __all__ = [
     'Config',
@@ -61,6 +50,37 @@ __all__ = [
     'utils',
 ]
 
+# Everything else is imported on first use so that `import cray`, and so the
+# `cray` entry point when it hands off to a running daemon, stays cheap.
+_LAZY_SUBMODULES = (
+    'cli', 'echo', 'errors', 'generator', 'pals', 'swagger', 'utils',
+)
+_LAZY_ATTRS = {
+    'Config': 'cray.config',
+    'argument': 'cray.core',
+    'command': 'cray.core',
+    'generate': 'cray.generator',
+    'group': 'cray.core',
+    'option': 'cray.core',
+    'pass_context': 'cray.core',
+    'request': 'cray.rest',
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_SUBMODULES:
+        return importlib.import_module(f'{__name__}.{name}')
+    if name in _LAZY_ATTRS:
+        value = getattr(importlib.import_module(_LAZY_ATTRS[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
 # Attempt to fix locale if user sets LC_ALL=C
 # See https://click.palletsprojects.com/en/7.x/python3
 if os.environ.get('LC_ALL') == 'C':
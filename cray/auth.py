@@ -22,8 +22,10 @@
 #  OTHER DEALINGS IN THE SOFTWARE.
 #
 """ Auth related methods. """
+import functools
 import json
 import os
+import time
 import warnings
 import click
 # pylint: disable=fixme
@@ -34,21 +36,27 @@ import click
 # TODO: Get valid SSL Certs
 # TODO: Switch to browser auth code flow
 ########################################
-from oauthlib.oauth2 import InvalidGrantError
-from oauthlib.oauth2 import LegacyApplicationClient
-from oauthlib.oauth2 import MissingTokenError
-from oauthlib.oauth2 import UnauthorizedClientError
-from oauthlib.oauth2.rfc6749.errors import CustomOAuth2Error
-from requests_oauthlib import OAuth2Session
-from urllib3.exceptions import InsecureRequestWarning
 
 from cray.constants import AUTH_DIR_NAME
+from cray.constants import TOKEN_LOCK_TIMEOUT
+from cray.constants import TOKEN_REFRESH_AHEAD
 from cray.echo import echo
 from cray.echo import LOG_RAW
 from cray.rest import make_url
+from cray.rest import mount_pool
+from cray.utils import file_lock
 from cray.utils import hostname_to_name
+from cray.utils import lazy_import
 from cray.utils import open_atomic
 
+oauth2 = lazy_import('oauthlib.oauth2')
+oauth2_errors = lazy_import('oauthlib.oauth2.rfc6749.errors')
+requests_oauthlib = lazy_import('requests_oauthlib')
+urllib3_exceptions = lazy_import('urllib3.exceptions')
+
+# Counters kept next to each token file, see Auth.stats
+TOKEN_STATS = ('refreshed', 'refreshed_ahead', 'avoided')
+
 
 class Auth(object):  # pylint: disable=too-many-instance-attributes
     """ Auth Class used for generating, refreshing, and saving OAuth Tokens """
@@ -73,12 +81,33 @@ class Auth(object):  # pylint: disable=too-many-instance-attributes
         self.path = path
         self.client_id = kwargs.get('client_id', 'shasta')
         self._token_path = os.path.join(self.path, self.name)
-        self.session = None
+        self._session = None
+        self._session_token = None
+        self._saved_token = None
+
+    @property
+    def token_path(self):
+        """ Path of the token file on disk """
+        return self._token_path
+
+    @property
+    def session(self):
+        """ The OAuth session, created on first use so commands that never
+        make a request don't pay for importing requests_oauthlib """
+        if self._session is None and self._session_token is not None:
+            self._session = self.get_session(token=self._session_token)
+            self._refresh_ahead()
+        return self._session
+
+    @session.setter
+    def session(self, session):
+        self._session = session
+        self._session_token = None
 
     def get_session_opts(self):
         """ Set the session options to pass when getting tokens """
         return {
-            'token_updater': self.save,
+            'token_updater': self._token_updated,
             'auto_refresh_url': self.url,
             'auto_refresh_kwargs': {
                 'client_id': self.client_id
@@ -93,14 +122,121 @@ class Auth(object):  # pylint: disable=too-many-instance-attributes
     def get_session(self, token=None):
         """ Set the OAuth Session """
         opts = self.get_session_opts()
-        client = LegacyApplicationClient(
+        client = oauth2.LegacyApplicationClient(
             client_id=self.client_id,
             token=token
         )
         if token:
             client.parse_request_body_response(json.dumps(token))
 
-        return OAuth2Session(client=client, token=token, **opts)
+        session = requests_oauthlib.OAuth2Session(
+            client=client, token=token, **opts
+        )
+        # Route the session's automatic refreshes through refresh() so that
+        # concurrent processes don't all refresh the same token.
+        session.refresh_token = functools.partial(
+            self._refresh_session, session, session.refresh_token
+        )
+        return mount_pool(session, self.ctx)
+
+    def _refresh_session(
+            self, session, refresh_token, token_url, stat='refreshed', **kwargs
+    ):
+        return self.refresh(
+            session, lambda: refresh_token(token_url, **kwargs), stat
+        )
+
+    def _refresh_ahead_seconds(self):
+        obj = getattr(self.ctx, 'obj', None) or {}
+        config = obj.get('config') or {}
+        try:
+            return float(config.get('auth.refresh_ahead', TOKEN_REFRESH_AHEAD))
+        except (TypeError, ValueError):
+            return TOKEN_REFRESH_AHEAD
+
+    def _expiring(self, token):
+        """ Whether a token expires within the refresh-ahead window """
+        expires_at = token.get('expires_at')
+        if expires_at is None:
+            return False
+        return expires_at - time.time() < self._refresh_ahead_seconds()
+
+    def _refresh_ahead(self):
+        """ Refresh a token that is about to expire before it is used, rather
+        than have a request fail on it first """
+        token = self._session_token or {}
+        if not token.get('refresh_token') or not self._expiring(token):
+            return
+        try:
+            with warnings.catch_warnings():
+                warnings.filterwarnings(
+                    "ignore",
+                    category=urllib3_exceptions.InsecureRequestWarning
+                )
+                self._session.refresh_token(
+                    self.url, stat='refreshed_ahead',
+                    client_id=self.client_id, verify=False
+                )
+        except Exception as e:  # pylint: disable=broad-except
+            # The request itself will refresh, or report the failure
+            echo(f'AUTH ERROR: {e}', ctx=self.ctx, level=LOG_RAW)
+
+    def refresh(self, session, fetch, stat='refreshed'):
+        """ Refresh the session's token with `fetch`, one process at a time.
+        Whoever takes the token's lock first talks to Keycloak and saves the
+        new token, the others wait for the lock and then use the token it
+        saved instead of refreshing again. """
+        current = (session.token or {}).get('access_token')
+        with file_lock(self._token_path + '.lock', TOKEN_LOCK_TIMEOUT):
+            token = self._read_token()
+            if token.get('access_token') not in (None, current) and \
+                    not self._expiring(token):
+                echo(
+                    f'Using token refreshed by another process: '
+                    f'{self._token_path}', ctx=self.ctx, level=LOG_RAW
+                )
+                session.token = token
+                self._saved_token = token
+                self._count('avoided')
+                return token
+            token = fetch()
+            self.save(token)
+            self._count(stat)
+        return token
+
+    def _token_updated(self, token):
+        # Tokens from refresh() are saved already
+        if token is not self._saved_token:
+            self.save(token)
+
+    def _count(self, stat):
+        """ Add one to a counter in the token's stats file """
+        stats = self.stats()
+        stats[stat] += 1
+        try:
+            with open_atomic(self._token_path + '.stats') as stats_file:
+                json.dump(stats, stats_file)
+        except OSError:  # pragma: NO COVER
+            pass
+
+    def stats(self):
+        """ How often this token was refreshed against Keycloak, ahead of its
+        expiry or not, and how many refreshes were avoided by reusing a token
+        another process had just refreshed """
+        stats = dict.fromkeys(TOKEN_STATS, 0)
+        try:
+            with open(self._token_path + '.stats', encoding='utf-8') as f:
+                stats.update(json.load(f))
+        except (OSError, ValueError):
+            pass
+        return stats
+
+    def _read_token(self):
+        try:
+            with open(self._token_path, encoding='utf-8') as token_file:
+                return json.load(token_file)
+        except (OSError, ValueError):
+            return {}
 
     def save(self, token):
         """ Save token to file """
@@ -108,6 +244,7 @@ class Auth(object):  # pylint: disable=too-many-instance-attributes
             token['client_id'] = self.client_id
         with open_atomic(self._token_path) as token_file:
             json.dump(token, token_file)
+        self._saved_token = token
         echo(
             f'Saved token: {self._token_path}',
             ctx=self.ctx,
@@ -129,7 +266,8 @@ class Auth(object):  # pylint: disable=too-many-instance-attributes
             )
         if 'client_id' in token:
             self.client_id = token['client_id']
-        self.session = self.get_session(token=token)
+        self._session = None
+        self._session_token = token
         return token
 
     def get_token(self, **kwargs):
@@ -143,7 +281,7 @@ class Auth(object):  # pylint: disable=too-many-instance-attributes
             with warnings.catch_warnings():
                 warnings.filterwarnings(
                     "ignore",
-                    category=InsecureRequestWarning
+                    category=urllib3_exceptions.InsecureRequestWarning
                 )
                 opts = {
                     'verify': False  # TODO: Enable
@@ -152,11 +290,11 @@ class Auth(object):  # pylint: disable=too-many-instance-attributes
                 opts.update(kwargs)
                 token = self.session.fetch_token(token_url=self.url, **opts)
         except (
-                MissingTokenError, UnauthorizedClientError,
-                InvalidGrantError) as e:
+                oauth2.MissingTokenError, oauth2.UnauthorizedClientError,
+                oauth2.InvalidGrantError) as e:
             echo(f'AUTH ERROR: {e}', ctx=self.ctx, level=LOG_RAW)
             raise click.UsageError('Invalid Credentials', ctx=self.ctx)
-        except CustomOAuth2Error as e:
+        except oauth2_errors.CustomOAuth2Error as e:
             echo(f'AUTH ERROR: {e}', ctx=self.ctx, level=LOG_RAW)
             raise click.UsageError(e.description, ctx=self.ctx)
         except Exception as e:
@@ -0,0 +1,216 @@
+#
+#  MIT License
+#
+#  (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a
+#  copy of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom the
+#  Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+#  THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+#  OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+#
+""" Versioned on-disk caches kept under the CLI configuration directory. """
+import hashlib
+import json
+import os
+import pickle
+import sys
+
+from cray.constants import CACHE_DIR_NAME
+from cray.constants import SWAGGER_CACHE_ENVVAR
+from cray.utils import get_config_dir
+from cray.utils import open_atomic
+
+# Bump this whenever the layout of anything pickled into the cache changes.
+CACHE_FORMAT = 1
+SWAGGER_CACHE_NAME = 'swagger'
+HTTP_CACHE_NAME = 'http'
+DIGEST_CACHE_NAME = 'digest'
+
+def get_cache_dir(name):
+    """ Get (and create) a named cache directory """
+    path = os.path.join(get_config_dir(), CACHE_DIR_NAME, name)
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    return path
+
+
+def make_key(*parts):
+    """ Hash arbitrary JSON-able parts into a cache key """
+    data = json.dumps(
+        [CACHE_FORMAT, sys.version_info[:2]] + list(parts),
+        sort_keys=True, default=str
+    )
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+def file_digest(path):
+    """ Get the sha256 hex digest of a file's contents """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as data:
+        for chunk in iter(lambda: data.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cached_file_digest(path):
+    """ Get the sha256 hex digest of a file, reusing the digest recorded
+    for the same path, inode, mtime and size on an earlier run. Returns
+    the digest and whether it came from the cache. """
+    info = os.stat(path)
+    entry = None
+    try:
+        key = make_key(
+            DIGEST_CACHE_NAME, os.path.realpath(path), info.st_dev,
+            info.st_ino, info.st_mtime_ns, info.st_size
+        )
+        entry = os.path.join(get_cache_dir(DIGEST_CACHE_NAME), f'{key}.pickle')
+    except OSError:
+        pass
+    digest = load(entry)
+    if digest:
+        return digest, True
+    digest = file_digest(path)
+    save(entry, digest)
+    return digest, False
+
+
+def _file_stamp(path):
+    # Hash the contents rather than trusting the location and mtime, which
+    # both change every run when the CLI is a self-extracting binary.
+    return [os.path.basename(path), os.path.getsize(path), file_digest(path)]
+
+
+def swagger_cache_enabled():
+    """ The swagger cache can be turned off with CRAY_SWAGGER_CACHE=0 """
+    value = os.environ.get(SWAGGER_CACHE_ENVVAR, '1')
+    return value.lower() not in ['0', 'false', 'no', 'off']
+
+
+def swagger_cache_path(path, opts=None):
+    """ Get the cache file for a parsed swagger file, or None if disabled.
+    The key covers the file name and contents, the swagger options and the
+    parser source, so stale entries are never reused after an upgrade. """
+    # pylint: disable=import-outside-toplevel,cyclic-import
+    if not swagger_cache_enabled():
+        return None
+    from cray import swagger
+    try:
+        parser = _file_stamp(swagger.__file__)
+    except OSError:
+        # Frozen builds have no parser source on disk. Hashing the whole
+        # executable would cost more than the parse, its size changes with
+        # nearly every build.
+        parser = [os.path.basename(sys.executable),
+                  os.path.getsize(sys.executable)]
+    try:
+        key = make_key(_file_stamp(path), opts or {}, parser)
+        # Entries for the same swagger file and options share a prefix, so
+        # the ones left over from an older CLI or swagger file can be found
+        # by `prune`. Only the module directory and file name go into it,
+        # the rest of the path isn't stable (see _file_stamp).
+        source = os.path.join(
+            os.path.basename(os.path.dirname(path)), os.path.basename(path)
+        )
+        prefix = make_key(SWAGGER_CACHE_NAME, source, opts or {})[:16]
+        return os.path.join(
+            get_cache_dir(SWAGGER_CACHE_NAME), f'{prefix}-{key}.pickle'
+        )
+    except OSError:
+        return None
+
+
+def http_cache_path(tenant, url, params=None):
+    """ Get the cache file for a GET response, keyed by tenant, URL (which
+    includes the hostname) and query parameters """
+    try:
+        key = make_key(HTTP_CACHE_NAME, tenant or '', url, params or {})
+        return os.path.join(get_cache_dir(HTTP_CACHE_NAME), f'{key}.pickle')
+    except OSError:
+        return None
+
+
+def touch(path):
+    """ Mark a cache entry as just used, see `evict` """
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def evict(name, max_bytes):
+    """ Delete the least recently used entries of a named cache until it
+    takes up at most `max_bytes` """
+    try:
+        found = [
+            (entry.stat().st_mtime, entry.stat().st_size, entry.path)
+            for entry in os.scandir(get_cache_dir(name))
+            if entry.name.endswith('.pickle')
+        ]
+    except OSError:
+        return
+    total = sum(size for _, size, _ in found)
+    for _, size, path in sorted(found):
+        if total <= max_bytes:
+            break
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+        total -= size
+
+
+def prune(path):
+    """ Delete the entries that `path` replaces: those in its directory with
+    the same `<prefix>-` in their name """
+    if not path:
+        return
+    directory, name = os.path.split(path)
+    if '-' not in name:
+        return
+    prefix = name.split('-', 1)[0] + '-'
+    try:
+        entries = list(os.scandir(directory))
+    except OSError:
+        return
+    for entry in entries:
+        if entry.name.startswith(prefix) and entry.name != name and \
+                entry.name.endswith('.pickle'):
+            try:
+                os.unlink(entry.path)
+            except OSError:
+                pass
+
+
+def load(path):
+    """ Load a cached object, returning None on any miss or error """
+    if not path:
+        return None
+    try:
+        with open(path, 'rb') as cache_file:
+            return pickle.load(cache_file)
+    except Exception:  # pylint: disable=broad-except
+        return None
+
+
+def save(path, data):
+    """ Save an object to the cache. Failures are ignored, a cache
+    is never required for the CLI to work. """
+    if not path:
+        return
+    try:
+        with open_atomic(path, mode='wb') as cache_file:
+            pickle.dump(data, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception:  # pylint: disable=broad-except
+        pass
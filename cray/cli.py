@@ -30,6 +30,7 @@ import re
 import sys
 import click
 
+from cray import profiling
 from cray.auth import AuthUsername
 from cray.config import _CONFIG_DIR_NAME
 from cray.config import Config
@@ -41,17 +42,24 @@ from cray.core import group
 from cray.core import option
 from cray.echo import echo
 from cray.echo import LOG_FORCE
-from cray.formatting import format_result
+from cray.formatting import write_result
 from cray.utils import get_hostname
 
-CONTEXT_SETTINGS = {
-    'obj': {
+
+
+def new_context_obj():
+    """ Fresh per-invocation state for `ctx.obj` """
+    return {
         'config_dir': '',
         'globals': {},
         'config': Config('', '', raise_err=False),
         'token': None,
         'auth': None
-    },
+    }
+
+
+CONTEXT_SETTINGS = {
+    'obj': new_context_obj(),
     'auto_envvar_prefix': NAME.upper(),
     'help_option_names': ['-h', '--help'],
 }
@@ -196,18 +204,39 @@ def login(ctx, username, password, rsa_token, *args, **kwargs):
     echo(token.login(password, rsa_token=rsa_token), level=LOG_FORCE, ctx=ctx)
 
 
+@auth.command()
+@click.pass_context
+def stats(ctx, *args, **kwargs):
+    """ Show how often the current token has been refreshed """
+    auth_obj = ctx.obj['auth']
+    if auth_obj is None:
+        raise click.UsageError(
+            "No credentials configured, run `cray auth login` first."
+        )
+    return dict(token=auth_obj.token_path, **auth_obj.stats())
+
+
 @cli.resultcallback()
 @click.pass_context
 def cli_cb(ctx, result, **kwargs):
     """ Global callback function. Will properly format the results """
-    # Use click echo instead of our logging because we always want to echo
+    if ctx.obj.get('batch'):
+        # `cray batch` collects and reports the results itself.
+        return result
+    # Write with click instead of our logging because we always want to echo
     # our results
-    click.echo(format_result(result, ctx.obj['globals'].get('format')))
+    with profiling.phase('format result'):
+        write_result(
+            result,
+            ctx.obj['globals'].get('format'),
+            query=ctx.obj['globals'].get('query'),
+            fields=ctx.obj['globals'].get('fields')
+        )
+    return None
+
 
+click.version_option()(cli)
 
-# Handle the usage of ``cli`` for Pyinstaller.
-if getattr(sys, 'frozen', False):
-    click.version_option()(cli)
+# Handle the usage of ``cli`` for Pyinstaller when it is the entry script.
+if getattr(sys, 'frozen', False) and __name__ == '__main__':
     cli(sys.argv[1:])
-else:
-    click.version_option()(cli)
@@ -0,0 +1,227 @@
+#
+#  MIT License
+#
+#  (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a
+#  copy of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom the
+#  Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+#  THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+#  OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+#
+""" Build-time code generation of parsed Swagger modules.
+
+Running ``python -m cray.codegen`` evaluates every CLI module, records each
+Swagger file and set of swagger options the module generates commands from,
+and writes the parsed endpoint trees next to the Swagger file as a plain
+Python module (``swagger3.json`` -> ``_swagger3.py``). At runtime
+``generator.generate`` imports that module, which is loaded from bytecode in
+``__pycache__``, instead of decoding and walking the JSON.
+
+Each generated module records the sha256 of the Swagger file it came from and
+is ignored if the file no longer matches. ``python -m cray.codegen --check``
+re-parses every Swagger file and fails if any generated module has drifted.
+"""
+import importlib
+import importlib.util
+import json
+import os
+import pprint
+
+import click
+
+from cray import cache
+from cray.nesteddict import NestedDict
+
+# Bump this whenever the layout of the generated modules changes.
+CODEGEN_FORMAT = 1
+GENERATED_PREFIX = '_'
+
+_PACKAGE_DIR = os.path.dirname(os.path.realpath(__file__))
+
+_TEMPLATE = '''\
+""" Generated by `python -m cray.codegen` from {source}. Do not edit. """
+# pylint: disable=too-many-lines,line-too-long
+FORMAT = {format!r}
+SOURCE = {source!r}
+SOURCE_SHA256 = {digest!r}
+
+TREES = {trees}
+'''
+
+
+def options_key(opts):
+    """ Canonical string for a set of swagger options """
+    return json.dumps(opts or {}, sort_keys=True, default=str)
+
+
+def generated_path(path):
+    """ Path of the generated module for a Swagger file """
+    dirname, filename = os.path.split(path)
+    stem = os.path.splitext(filename)[0]
+    return os.path.join(dirname, f'{GENERATED_PREFIX}{stem}.py')
+
+
+def _module_name(path):
+    """ Dotted name for generated modules within the cray package """
+    rel = os.path.relpath(os.path.realpath(path), os.path.dirname(_PACKAGE_DIR))
+    if rel.startswith(os.pardir):
+        return None
+    return os.path.splitext(rel)[0].replace(os.sep, '.')
+
+
+def _import(path):
+    gen_path = generated_path(path)
+    name = _module_name(gen_path)
+    if name is not None:
+        # Import through the package so frozen builds, which don't ship the
+        # sources, can find the module too.
+        try:
+            return importlib.import_module(name)
+        except ImportError:
+            return None
+    if not os.path.isfile(gen_path):
+        return None
+    spec = importlib.util.spec_from_file_location(
+        f'cray_codegen_{cache.make_key(gen_path)[:16]}', gen_path
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load(path, opts=None):
+    """ Get the pre-parsed tree for a Swagger file, or None if there is no
+    generated module, or it is stale or lacks these options. """
+    try:
+        module = _import(path)
+        if module is None or getattr(module, 'FORMAT', None) != CODEGEN_FORMAT:
+            return None
+        tree = module.TREES.get(options_key(opts))
+        if tree is None or module.SOURCE_SHA256 != cache.file_digest(path):
+            return None
+    except Exception:  # pylint: disable=broad-except
+        return None
+    return NestedDict(tree)
+
+
+def _plain(data):
+    if isinstance(data, dict):
+        return {k: _plain(v) for k, v in data.items()}
+    if isinstance(data, list):
+        return [_plain(v) for v in data]
+    return data
+
+
+def render(path, trees):
+    """ Render the generated module source for a Swagger file """
+    return _TEMPLATE.format(
+        source=os.path.basename(path),
+        format=CODEGEN_FORMAT,
+        digest=cache.file_digest(path),
+        trees=pprint.pformat(_plain(trees), width=100, sort_dicts=False),
+    )
+
+
+def parse_all(path, options):
+    """ Parse a Swagger file once for each set of options """
+    # pylint: disable=import-outside-toplevel,cyclic-import
+    from cray.generator import _parse_file
+    return {
+        options_key(opts): _parse_file(path, opts) for opts in options
+    }
+
+
+def write_module(path, options):
+    """ Write the generated module for a Swagger file """
+    gen_path = generated_path(path)
+    with open(gen_path, 'w', encoding='utf-8') as gen_file:
+        gen_file.write(render(path, parse_all(path, options)))
+    return gen_path
+
+
+def check_module(path, options):
+    """ Return a list of problems with a Swagger file's generated module """
+    gen_path = generated_path(path)
+    if not os.path.isfile(gen_path):
+        return [f'{gen_path} is missing']
+    with open(gen_path, encoding='utf-8') as gen_file:
+        current = gen_file.read()
+    if current != render(path, parse_all(path, options)):
+        return [f'{gen_path} does not match {os.path.basename(path)}']
+    return []
+
+
+def record_options(module_names):
+    """ Evaluate CLI modules and record the Swagger files and options each
+    one generates commands from. Returns {swagger path: [opts, ...]}. """
+    # pylint: disable=import-outside-toplevel,cyclic-import,protected-access
+    from cray import generator
+    from cray.cli import cli
+
+    recorded = {}
+    original = generator._get_data
+
+    def _record(path, opts=None):
+        found = recorded.setdefault(path, {})
+        found.setdefault(options_key(opts), opts or {})
+        return generator._parse_file(path, opts)
+
+    generator._get_data = _record
+    try:
+        obj = {'config_dir': '', 'globals': {}, 'config': {}, 'token': None,
+               'auth': None}
+        with click.Context(cli, obj=obj) as ctx:
+            for name in module_names:
+                if cli.get_command(ctx, name) is None:
+                    raise click.ClickException(f'Unknown module {name}')
+    finally:
+        generator._get_data = original
+    return {path: list(opts.values()) for path, opts in recorded.items()}
+
+
+def _module_names():
+    modules_dir = os.path.join(_PACKAGE_DIR, 'modules')
+    return sorted(
+        m for m in os.listdir(modules_dir)
+        if not m.startswith('_') and
+        os.path.isfile(os.path.join(modules_dir, m, 'cli.py'))
+    )
+
+
+@click.command()
+@click.option(
+    '--check', is_flag=True,
+    help='Verify the generated modules match their Swagger files.'
+)
+@click.argument('modules', nargs=-1)
+def main(check, modules):
+    """ Generate (or check) pre-parsed Swagger modules for MODULES,
+    all modules by default. """
+    recorded = record_options(modules or _module_names())
+    problems = []
+    for path, options in sorted(recorded.items()):
+        if check:
+            problems += check_module(path, options)
+        else:
+            click.echo(f'Wrote {write_module(path, options)}')
+    for problem in problems:
+        click.echo(problem, err=True)
+    if problems:
+        raise click.ClickException('Generated modules are out of date.')
+
+
+if __name__ == '__main__':
+    main()  # pylint: disable=no-value-for-parameter
@@ -56,6 +56,27 @@ def _get_cmd_call(ctx, names=None):
     return '.'.join(names[::-1])
 
 
+def _get_cmd_path(ctx):
+    """ The dotted command path of a context, e.g. `cfs.v3.components.list`.
+    It is resolved once per context, every option of a command asks. """
+    path = ctx.meta.get(('cmd_path', id(ctx)))
+    if path is None:
+        path = _get_cmd_call(ctx)
+        ctx.meta[('cmd_path', id(ctx))] = path
+    return path
+
+
+def _flatten(data, prefix='', flat=None):
+    """ Map every dotted key path of a nested dict to its value """
+    flat = {} if flat is None else flat
+    for k, v in data.items():
+        key = f'{prefix}{k}'
+        flat[key] = v
+        if isinstance(v, dict):
+            _flatten(v, f'{key}.', flat)
+    return flat
+
+
 def initialize_dirs(path):
     """ Create initial configuration directory structure. """
     for folder in [_CONFIG_DIR_NAME, _LOG_DIR_NAME, _AUTH_DIR_NAME]:
@@ -81,6 +102,7 @@ class Config(NestedDict):
         self._config_dir = path
         self._config_name = config
         self._raise_err = raise_err
+        self._index = None
         self.update(**self._load())
 
     def _values(self):
@@ -135,9 +157,52 @@ class Config(NestedDict):
 
     def get_from_ctx(self, ctx, key, default=None):
         """ Get a value based on current context and parameter name. """
-        key = self.get_core(key, _get_cmd_call(ctx, [key]))
+        path = _get_cmd_path(ctx)
+        key = self.get_core(key, f'{path}.{key}' if path else key)
         return self.get(key, default)
 
+    def get(self, key, default=None):
+        """ Deep get a value from a flat index of every dotted key, built
+        on first use and dropped whenever the config is changed through its
+        own methods. Changes made to nested dicts directly aren't seen. """
+        if self._index is None:
+            self._index = _flatten(self)
+        found = self._index.get(key)
+        if found is None:
+            return default
+        return found
+
+    def _changed(self):
+        self._index = None
+
+    def __setitem__(self, key, value):
+        self._changed()
+        NestedDict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        self._changed()
+        NestedDict.__delitem__(self, key)
+
+    def set_deep(self, key, value):
+        self._changed()
+        NestedDict.set_deep(self, key, value)
+
+    def setdefault(self, key, default=None):
+        self._changed()
+        return NestedDict.setdefault(self, key, default)
+
+    def pop(self, *args):
+        self._changed()
+        return NestedDict.pop(self, *args)
+
+    def popitem(self):
+        self._changed()
+        return NestedDict.popitem(self)
+
+    def clear(self):
+        self._changed()
+        NestedDict.clear(self)
+
     def update(self, *args, **kwargs):
         for k, v in dict(*args, **kwargs).items():
             self[k] = v
@@ -36,6 +36,9 @@ TOKEN_ENVVAR = _make_envvar('CREDENTIALS')
 QUIET_ENVVAR = _make_envvar('QUIET')
 FORMAT_ENVVAR = _make_envvar('FORMAT')
 CONFIG_DIR_ENVVAR = _make_envvar('CONFIG_DIR')
+SWAGGER_CACHE_ENVVAR = _make_envvar('SWAGGER_CACHE')
+PROFILE_STARTUP_ENVVAR = _make_envvar('PROFILE_STARTUP')
+DAEMON_ENVVAR = _make_envvar('DAEMON')
 
 # Generator constants
 TAG_SPLIT = "$"
@@ -54,6 +57,30 @@ EMPTY_CONFIG = ''
 CONFIG_DIR_NAME = 'configurations'
 LOG_DIR_NAME = 'logs'
 AUTH_DIR_NAME = 'tokens'
+CACHE_DIR_NAME = 'cache'
 
 # Rest constants
 TENANT_HEADER_NAME_KEY = "Cray-Tenant-Name"
+DEFAULT_POOL_SIZE = 10
+DEFAULT_CONCURRENCY = 8
+
+# Retry constants, see cray.retry (retry.* config)
+DEFAULT_RETRY_ATTEMPTS = 3
+DEFAULT_RETRY_BACKOFF = 0.5
+DEFAULT_RETRY_MAX_BACKOFF = 30
+DEFAULT_BREAKER_THRESHOLD = 5
+DEFAULT_BREAKER_RESET = 30
+
+# Response cache constants, see cray.rest (cache.* config)
+DEFAULT_HTTP_CACHE_BYTES = 64 * 1024 * 1024
+
+# Request log constants, see cray.timing (log.* config)
+REQUEST_LOG_NAME = 'requests.log'
+DEFAULT_REQUEST_LOG_BYTES = 5 * 1024 * 1024
+DEFAULT_REQUEST_LOG_BACKUPS = 3
+
+# Auth constants
+# Refresh tokens this many seconds before they expire (auth.refresh_ahead)
+TOKEN_REFRESH_AHEAD = 60
+# How long to wait for another process to finish refreshing a token
+TOKEN_LOCK_TIMEOUT = 30
@@ -25,6 +25,8 @@
 import os
 import click
 
+from cray import profiling
+
 
 # pylint: disable=invalid-name
 
@@ -99,12 +101,14 @@ class Option(click.Option):
         click.Option.__init__(self, *args, **kwargs)
 
     def get_default(self, ctx):
-        found_default = click.Option.get_default(self, ctx)
         if self.no_global:
-            return found_default
+            return click.Option.get_default(self, ctx)
         obj = ctx.obj
         name = self.name
-        found = obj['globals'].get(name, obj['config'].get_from_ctx(ctx, name))
+        if name in obj['globals']:
+            found = obj['globals'][name]
+        else:
+            found = obj['config'].get_from_ctx(ctx, name)
         # Note: we have to call click.Option last in case the above commands
         # alter the state of globals/configs
         if found is None:
@@ -196,6 +200,98 @@ class Group(click.Group):
         return decorator
 
 
+class LazyGroup(Group):
+    """ Group whose subcommands are registered as factories and only built
+        when they are resolved. Anything touching ``commands`` directly gets
+        this level built, child groups stay lazy until they are resolved. """
+
+    def __init__(self, *args, **kwargs):
+        self._pending = {}
+        self._hooks = []
+        Group.__init__(self, *args, **kwargs)
+
+    @property
+    def commands(self):
+        """ Build any pending subcommands and return them """
+        for name in list(self._pending):
+            self._materialize(name)
+        return self._commands
+
+    @commands.setter
+    def commands(self, value):
+        self._pending = {}
+        self._commands = value
+
+    def add_lazy_command(self, name, factory):
+        """ Register a factory that builds the subcommand on first use """
+        self._pending[name] = factory
+        self._commands.pop(name, None)
+
+    def add_hook(self, callback, path=None):
+        """ Call ``callback(cmd)`` on commands beneath this group as they are
+            built. With a path (a tuple of names relative to this group) only
+            that command is passed to the callback, otherwise every group and
+            command is. Already-built commands are handled immediately. """
+        path = tuple(path) if path else None
+        if path is None:
+            for cmd in self._commands.values():
+                _apply_hook(cmd, callback)
+        elif path[0] in self._commands:
+            cmd = self._commands[path[0]]
+            if len(path) == 1:
+                callback(cmd)
+            elif isinstance(cmd, LazyGroup):
+                cmd.add_hook(callback, path[1:])
+            else:
+                _apply_path_hook(cmd, callback, path[1:])
+            return
+        if (path, callback) not in self._hooks:
+            self._hooks.append((path, callback))
+
+    def _materialize(self, name):
+        cmd = self._pending.pop(name)()
+        if isinstance(cmd, LazyGroup):
+            for path, callback in self._hooks:
+                if path is None:
+                    cmd.add_hook(callback)
+                elif path[0] == name and len(path) > 1:
+                    cmd.add_hook(callback, path[1:])
+        for path, callback in self._hooks:
+            if path is None or path == (name,):
+                callback(cmd)
+        self._commands[name] = cmd
+        return cmd
+
+    def list_commands(self, ctx):
+        return sorted(set(self._commands) | set(self._pending))
+
+    def get_command(self, ctx, cmd_name):
+        if cmd_name in self._pending:
+            return self._materialize(cmd_name)
+        return self._commands.get(cmd_name)
+
+
+def _apply_hook(cmd, callback):
+    if isinstance(cmd, LazyGroup):
+        cmd.add_hook(callback)
+    elif isinstance(cmd, click.MultiCommand):
+        for sub in cmd.commands.values():
+            _apply_hook(sub, callback)
+    callback(cmd)
+
+
+def _apply_path_hook(cmd, callback, path):
+    sub = getattr(cmd, 'commands', {}).get(path[0])
+    if sub is None:
+        return
+    if len(path) == 1:
+        callback(sub)
+    elif isinstance(sub, LazyGroup):
+        sub.add_hook(callback, path[1:])
+    else:
+        _apply_path_hook(sub, callback, path[1:])
+
+
 class GeneratedCommands(Group):
     """ Subclass the click.Group in order to have segregated plugins within
         the modules directory """
@@ -206,6 +302,13 @@ class GeneratedCommands(Group):
     def __init__(self, base_path, params, name=None, **attrs):
         Group.__init__(self, name, params=params, **attrs)
         self._module_dir = os.path.join(base_path, self.DIR_NAME)
+        # Modules evaluated so far, so a process running several commands
+        # (batch, the daemon) only builds each one once.
+        self._modules = {}
+
+    def clear_modules(self):
+        """ Forget evaluated modules so they are rebuilt on next use """
+        self._modules.clear()
 
     def list_commands(self, ctx):
         cmds = set(self.commands.keys())
@@ -219,6 +322,8 @@ class GeneratedCommands(Group):
         return cmds
 
     def get_command(self, ctx, cmd_name):
+        if cmd_name in self._modules:
+            return self._modules[cmd_name]
         if cmd_name not in self.commands:
             module_path = os.path.join(self._module_dir, cmd_name)
             filename = os.path.join(module_path, self.FILE_NAME)
@@ -231,12 +336,14 @@ class GeneratedCommands(Group):
                 '__file__': filename
             }
 
-            with open(filename, encoding='utf-8') as f:
+            with open(filename, encoding='utf-8') as f, \
+                    profiling.phase(f'module eval {cmd_name}'):
                 code = compile(f.read(), filename, 'exec')
                 # Note: We are trusting the modules to not do bad things
                 # Since these are cray-created we can consider them safe.
                 # Using eval will improve performance and allow modules to be
                 # completely segregated.
                 eval(code, ns, ns)  # pylint: disable=eval-used
-            return ns[self.FUNC_NAME]
+            self._modules[cmd_name] = ns[self.FUNC_NAME]
+            return self._modules[cmd_name]
         return self.commands[cmd_name]
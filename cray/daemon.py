@@ -0,0 +1,533 @@
+#
+#  MIT License
+#
+#  (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a
+#  copy of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom the
+#  Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+#  THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+#  OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+#
+""" Local CLI daemon.
+
+`cray daemon start` runs a long-lived process listening on a Unix socket in
+the CLI configuration directory. It keeps the CLI imported, every service
+module's command tree built and the HTTP connection pool warm. The `cray`
+entry point (`main`) hands its argv, environment, working directory and
+stdin/stdout/stderr file descriptors to the daemon, which runs the command
+against the caller's descriptors and returns the exit code. If there is no
+daemon, it is busy, or it is running a different build, the command runs in
+the invoking process as usual.
+
+Keep the client side of this module free of heavy imports; anything only the
+daemon needs is imported in `Daemon`.
+"""
+import json
+import os
+import signal
+import socket
+import struct
+import sys
+
+from cray import profiling
+from cray.constants import AUTH_DIR_NAME
+from cray.constants import CONFIG_DIR_ENVVAR
+from cray.constants import CONFIG_DIR_NAME
+from cray.constants import DAEMON_ENVVAR
+from cray.constants import NAME
+
+SOCKET_NAME = 'daemon.sock'
+PROTOCOL = 1
+# Commands that prompt for credentials, install signal handlers or run
+# interactively for a long time always run in the invoking process.
+LOCAL_COMMANDS = (
+    'aprun', 'auth', 'console', 'daemon', 'debug', 'init', 'mpiexec', 'pals',
+)
+# The daemon raises KeyboardInterrupt in a running command on this signal.
+CANCEL_SIGNAL = signal.SIGUSR1
+# How long an interrupted client waits for the daemon to stop the command.
+CANCEL_TIMEOUT = 5
+_HEADER = struct.Struct('!I')
+_STDIO = (0, 1, 2)
+
+
+def config_dir():
+    """ The CLI configuration directory. Mirrors utils.get_config_dir, which
+    we can't import here without pulling in click. """
+    base_dir = os.environ.get(CONFIG_DIR_ENVVAR, os.path.expanduser('~'))
+    return os.path.join(base_dir, '.config', NAME)
+
+
+def socket_path():
+    """ Path of the daemon's socket """
+    return os.path.join(config_dir(), SOCKET_NAME)
+
+
+def build_id():
+    """ Identifies this installation of the CLI. The client only hands off
+    to a daemon started from the same build. """
+    target = sys.executable if getattr(sys, 'frozen', False) else __file__
+    stat = os.stat(target)
+    return f'{sys.executable}:{os.path.realpath(target)}:' \
+        f'{stat.st_mtime_ns}:{stat.st_size}'
+
+
+def cli_command():
+    """ Command line that starts a fresh CLI process """
+    if getattr(sys, 'frozen', False):
+        return [sys.executable]
+    return [sys.executable, '-m', NAME]
+
+
+def send_message(sock, message, fds=None):
+    """ Send a length-prefixed JSON message, optionally with descriptors """
+    data = json.dumps(message).encode('utf-8')
+    header = _HEADER.pack(len(data))
+    if fds:
+        socket.send_fds(sock, [header], fds)
+        sock.sendall(data)
+    else:
+        sock.sendall(header + data)
+
+
+def _recv_exact(sock, size, data=b''):
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise EOFError('connection closed')
+        data += chunk
+    return data
+
+
+def recv_message(sock, maxfds=0):
+    """ Receive a message sent by `send_message`. Returns (message, fds),
+    or (None, []) if the peer closed the connection first. """
+    fds = []
+    try:
+        if maxfds:
+            header, fds, _, _ = socket.recv_fds(sock, _HEADER.size, maxfds)
+            if not header:
+                return None, fds
+            header = _recv_exact(sock, _HEADER.size, header)
+        else:
+            header = _recv_exact(sock, _HEADER.size)
+        size, = _HEADER.unpack(header)
+        return json.loads(_recv_exact(sock, size).decode('utf-8')), fds
+    except EOFError:
+        return None, fds
+
+
+def request(message, timeout=None):
+    """ Send a control message (e.g. status, stop) to the daemon and return
+    its reply, or None if no daemon is listening """
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(socket_path())
+            send_message(sock, dict(message, build=build_id()))
+            return recv_message(sock)[0]
+    except OSError:
+        return None
+
+
+def _first_command(argv):
+    return next((arg for arg in argv if not arg.startswith('-')), None)
+
+
+def _should_forward(argv):
+    if os.environ.get(DAEMON_ENVVAR, '1').strip().lower() in \
+            ('0', 'false', 'no', 'off'):
+        return False
+    # Profiling is about this process's startup.
+    if profiling.ENABLED or not hasattr(socket, 'send_fds'):
+        return False
+    if _first_command(argv) in LOCAL_COMMANDS:
+        return False
+    return os.path.exists(socket_path())
+
+
+def forward(argv):
+    """ Run `cray argv` in the daemon. Returns the exit code, or None if the
+    daemon didn't take the command and it should run locally. """
+    try:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(socket_path())
+    except OSError:
+        return None
+    with sock:
+        try:
+            try:
+                send_message(sock, {
+                    'type': 'run',
+                    'build': build_id(),
+                    'argv': argv,
+                    'env': dict(os.environ),
+                    'cwd': os.getcwd(),
+                }, fds=list(_STDIO))
+                reply, _ = recv_message(sock)
+            except OSError:
+                return None
+            if not reply or not reply.get('accepted'):
+                return None
+            # From here on the command is running against our descriptors.
+            try:
+                reply, _ = recv_message(sock)
+            except OSError:
+                reply = None
+        except KeyboardInterrupt:
+            _cancel(sock)
+            return 130
+    if reply is None:
+        sys.stderr.write(f'{NAME}: lost connection to the daemon\n')
+        return 1
+    if 'fallback' in reply:
+        # The daemon couldn't take on our state, nothing was run
+        return None
+    return reply.get('exit_code', 1)
+
+
+def _cancel(sock):
+    """ Tell the daemon to stop the command by closing our end, and wait
+    for it to finish so it isn't still writing to our terminal after we
+    exit """
+    try:
+        sock.shutdown(socket.SHUT_WR)
+        sock.settimeout(CANCEL_TIMEOUT)
+        recv_message(sock)
+    except (OSError, KeyboardInterrupt):
+        pass
+
+
+def main():
+    """ Entry point for `cray` """
+    argv = sys.argv[1:]
+    if _should_forward(argv):
+        exit_code = forward(argv)
+        if exit_code is not None:
+            sys.exit(exit_code)
+    with profiling.phase('import cray.cli'):
+        # pylint: disable=import-outside-toplevel
+        from cray.cli import cli
+    cli(prog_name=NAME)  # pylint: disable=no-value-for-parameter
+
+
+def _stamp(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (path, stat.st_mtime_ns, stat.st_size)
+
+
+def config_stamp(path=None):
+    """ Modification stamps of the configuration and token files """
+    path = path or config_dir()
+    stamps = [_stamp(os.path.join(path, 'active_config'))]
+    for sub in (CONFIG_DIR_NAME, AUTH_DIR_NAME):
+        sub_path = os.path.join(path, sub)
+        try:
+            names = sorted(os.listdir(sub_path))
+        except OSError:
+            continue
+        stamps.extend(_stamp(os.path.join(sub_path, n)) for n in names)
+    return stamps
+
+
+class Daemon(object):
+    """ Serves CLI invocations on a Unix socket, one at a time, in this
+    process. Connections that arrive while a command is running are told
+    the daemon is busy and run the command themselves. If a client goes away
+    while its command is running, the command is interrupted. """
+
+    def __init__(self, path=None, idle_timeout=0):
+        # pylint: disable=import-outside-toplevel
+        import queue
+        import threading
+        self.path = path or socket_path()
+        self.idle_timeout = idle_timeout
+        self.build = build_id()
+        self.started = None
+        self.served = 0
+        self._busy = threading.Lock()
+        self._queue = queue.Queue()
+        self._modules = set()
+        self._stamp = None
+        self._sock = None
+        self._main_thread = None
+        self._running = False
+        self._cancelled = False
+
+    def warm(self):
+        """ Import the CLI and build every module's command tree. The CLI
+        keeps evaluated modules, so later commands reuse them. """
+        # pylint: disable=import-outside-toplevel
+        import click
+        from cray.cli import cli
+        from cray.cli import new_context_obj
+
+        with click.Context(cli, obj=new_context_obj()) as ctx:
+            for name in cli.list_commands(ctx):
+                if name in LOCAL_COMMANDS or name in cli.commands:
+                    continue
+                try:
+                    cmd = cli.get_command(ctx, name)
+                except Exception:  # pylint: disable=broad-except
+                    # A broken module fails the same way when invoked.
+                    continue
+                if cmd is None:
+                    continue
+                _build_all(cmd)
+                self._modules.add(name)
+        self._stamp = config_stamp()
+
+    def reset(self):
+        """ Drop state that depends on configuration or credentials """
+        # pylint: disable=import-outside-toplevel
+        from cray import rest
+        from cray.cli import cli
+        cli.clear_modules()
+        self._modules = set()
+        rest.reset_pool()
+
+    def serve(self):
+        """ Listen until stopped or idle for `idle_timeout` seconds """
+        # pylint: disable=import-outside-toplevel
+        import queue
+        import threading
+        import time
+
+        self.warm()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o177)
+        try:
+            self._sock.bind(self.path)
+        finally:
+            os.umask(old_umask)
+        self._sock.listen(16)
+        self._main_thread = threading.get_ident()
+        signal.signal(CANCEL_SIGNAL, self._interrupt)
+        self.started = time.time()
+        threading.Thread(target=self._accept, daemon=True).start()
+        try:
+            while True:
+                try:
+                    item = self._queue.get(timeout=self.idle_timeout or None)
+                except queue.Empty:
+                    break
+                if item is None:
+                    break
+                self._run(*item)
+        finally:
+            self._sock.close()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+    def _peer_allowed(self, conn):
+        if not hasattr(socket, 'SO_PEERCRED'):
+            return True
+        creds = conn.getsockopt(
+            socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i')
+        )
+        _, uid, _ = struct.unpack('3i', creds)
+        return uid == os.getuid()
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            try:
+                self._dispatch(conn)
+            except Exception:  # pylint: disable=broad-except
+                conn.close()
+
+    def _dispatch(self, conn):
+        if not self._peer_allowed(conn):
+            conn.close()
+            return
+        message, fds = recv_message(conn, maxfds=len(_STDIO))
+        if not message or message.get('build') != self.build:
+            self._reject(conn, fds, 'build mismatch')
+            return
+        kind = message.get('type')
+        if kind == 'status':
+            send_message(conn, {
+                'pid': os.getpid(),
+                'started': self.started,
+                'served': self.served,
+                'modules': sorted(self._modules),
+                'busy': self._busy.locked(),
+            })
+            conn.close()
+        elif kind == 'stop':
+            send_message(conn, {'stopping': True})
+            conn.close()
+            self._queue.put(None)
+        elif kind == 'run' and len(fds) == len(_STDIO):
+            if not self._busy.acquire(blocking=False):
+                self._reject(conn, fds, 'busy')
+                return
+            send_message(conn, {'accepted': True})
+            self._queue.put((conn, message, fds))
+        else:
+            self._reject(conn, fds, 'bad request')
+
+    @staticmethod
+    def _reject(conn, fds, reason):
+        for fd in fds:
+            os.close(fd)
+        try:
+            send_message(conn, {'accepted': False, 'reason': reason})
+        except OSError:
+            pass
+        conn.close()
+
+    def _interrupt(self, signum, frame):
+        # pylint: disable=unused-argument
+        if self._running:
+            raise KeyboardInterrupt
+
+    def _watch(self, conn):
+        """ Interrupt the running command when the client closes its end.
+        Clients send nothing after the run request. """
+        try:
+            conn.recv(1)
+        except OSError:
+            pass
+        self._cancelled = True
+        if self._running:
+            signal.pthread_kill(self._main_thread, CANCEL_SIGNAL)
+
+    def _run(self, conn, message, fds):
+        # pylint: disable=import-outside-toplevel
+        import threading
+        reply = {}
+
+        def invoke():
+            self._running = True
+            try:
+                if self._cancelled:
+                    # The client left before the command started
+                    raise KeyboardInterrupt
+                reply['exit_code'] = _invoke(message['argv'])
+            except KeyboardInterrupt:
+                reply['exit_code'] = 130
+            finally:
+                self._running = False
+
+        watcher = None
+        self._cancelled = False
+        if self._main_thread is not None:
+            watcher = threading.Thread(target=self._watch, args=(conn,))
+            watcher.start()
+        try:
+            changed = config_stamp() != self._stamp
+            if changed:
+                self.reset()
+            try:
+                _with_client_process_state(message, fds, invoke)
+            except Exception as err:  # pylint: disable=broad-except
+                # Adopting the client's state failed, e.g. its working
+                # directory is gone. If the command didn't get to run, the
+                # client runs it itself.
+                if 'exit_code' not in reply:
+                    reply = {'fallback': str(err) or type(err).__name__}
+            if 'exit_code' in reply:
+                self.served += 1
+            try:
+                send_message(conn, reply)
+            except OSError:
+                pass
+        finally:
+            try:
+                # Wakes the watcher
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            if watcher:
+                watcher.join()
+            conn.close()
+            self._busy.release()
+        if changed:
+            self.warm()
+
+
+def _build_all(cmd):
+    """ Build every lazily generated subcommand """
+    for sub in getattr(cmd, 'commands', {}).values():
+        _build_all(sub)
+
+
+def _invoke(argv):
+    # pylint: disable=import-outside-toplevel
+    import traceback
+    from cray.cli import cli
+    from cray.cli import new_context_obj
+    try:
+        cli.main(args=argv, prog_name=NAME, obj=new_context_obj())
+    except SystemExit as err:
+        if err.code is None:
+            return 0
+        if isinstance(err.code, int):
+            return err.code
+        sys.stderr.write(f'{err.code}\n')
+        return 1
+    except Exception:  # pylint: disable=broad-except
+        traceback.print_exc()
+        return 1
+    return 0
+
+
+def _with_client_process_state(message, fds, func):
+    """ Call func with the client's stdio, environment and working
+    directory in place of our own """
+    saved_fds = [os.dup(fd) for fd in _STDIO]
+    saved_env = dict(os.environ)
+    saved_cwd = os.getcwd()
+    saved_stdin = sys.stdin
+    _flush()
+    try:
+        for target, fd in zip(_STDIO, fds):
+            os.dup2(fd, target)
+        os.environ.clear()
+        os.environ.update(message.get('env', {}))
+        os.chdir(message.get('cwd') or '/')
+        # Don't let input buffered for one client leak into the next.
+        with open(0, encoding=saved_stdin.encoding, closefd=False) as stdin:
+            sys.stdin = stdin
+            return func()
+    finally:
+        _flush()
+        sys.stdin = saved_stdin
+        for target, fd in zip(_STDIO, saved_fds):
+            os.dup2(fd, target)
+            os.close(fd)
+        for fd in fds:
+            os.close(fd)
+        os.environ.clear()
+        os.environ.update(saved_env)
+        os.chdir(saved_cwd)
+
+
+def _flush():
+    for stream in (sys.stdout, sys.stderr):
+        try:
+            stream.flush()
+        except (OSError, ValueError):
+            pass
@@ -69,3 +69,13 @@ class BadResponseError(UsageError):
         except:  # pylint: disable=bare-except
             pass
         UsageError.__init__(self, message, ctx=ctx)
+
+
+class CircuitOpenError(UsageError):
+    """ Requests to a host are being refused after repeated failures """
+
+    def __init__(self, host, wait, ctx=None):
+        message = f"Too many failed requests to {host}, not sending more " + \
+                  f"for {wait:.0f}s. Set retry.breaker_threshold=0 to " + \
+                  "disable this."
+        UsageError.__init__(self, message, ctx=ctx)
@@ -24,19 +24,44 @@
 """ Formatting Module. """
 # pylint: disable=too-few-public-methods
 import json
+import sys
 import click
-import requests
-import toml
-from ruamel import yaml
 
 from cray.echo import echo
 from cray.echo import LOG_DEBUG
+from cray.paging import Pages
+from cray.utils import lazy_import
 
+requests = lazy_import('requests')
+toml = lazy_import('toml')
+jmespath = lazy_import('jmespath')
+yaml = lazy_import('ruamel.yaml')
 
-def format_result(result, format_type='json', **kwargs):
-    """ Format a given result into the desired format """
-    # pylint: disable=broad-except
-    if isinstance(result, requests.Response):
+# Size of the pieces output is written to stdout in
+CHUNK_SIZE = 64 * 1024
+
+_ENCODER = json.JSONEncoder(indent=2)
+
+# Keys whose list holds the records of a collection response. NDJSON output
+# writes one line per record of these (or of a top-level list) and --fields
+# picks the fields of each record.
+COLLECTION_KEYS = (
+    'Components', 'components', 'artifacts', 'status', 'sessions',
+    'configurations', 'sources', 'results'
+)
+
+
+def _is_response(result):
+    # A Response can only exist once requests has been imported, so don't
+    # import it just to find out.
+    return 'requests' in sys.modules and isinstance(result, requests.Response)
+
+
+def to_data(result):
+    """ The plain data behind a command's result, e.g. a response's body """
+    if isinstance(result, Pages):
+        result = list(result.items())
+    if _is_response(result):
         try:
             result = result.json()
         except ValueError:  # pragma: NO COVER
@@ -45,7 +70,56 @@ def format_result(result, format_type='json', **kwargs):
         # Some formatters try to reinitialize the object which fails.
         # Cast into native dict to prevent this.
         result = dict(result)
-    if isinstance(result, (list, dict)):
+    return result
+
+
+def select(data, query=None, fields=None):
+    """ Narrow a result's data down to what the user asked for: `query` is a
+    JMESPath expression, `fields` a list of (dotted) field names to keep of
+    each record. """
+    if query:
+        data = jmespath.search(query, data)
+    if fields:
+        data = _project(data, fields)
+    return data
+
+
+def _project(data, fields):
+    if isinstance(data, list):
+        return [_pick(item, fields) for item in data]
+    if isinstance(data, dict):
+        for key in COLLECTION_KEYS:
+            if isinstance(data.get(key), list):
+                return dict(data, **{key: _project(data[key], fields)})
+    return _pick(data, fields)
+
+
+def _pick(item, fields):
+    if not isinstance(item, dict):
+        return item
+    picked = {}
+    for field in fields:
+        value = item
+        for part in field.split('.'):
+            if not isinstance(value, dict) or part not in value:
+                break
+            value = value[part]
+        else:
+            picked[field] = value
+    return picked
+
+
+def format_result(
+        result, format_type='json', query=None, fields=None, **kwargs
+):
+    """ Format a given result into the desired format """
+    # pylint: disable=broad-except
+    result = to_data(result)
+    # Scalars picked out by a query are formatted too
+    selected = bool(query or fields)
+    if selected:
+        result = select(result, query, fields)
+    if isinstance(result, (list, dict)) or selected:
         try:
             return _formatter(format_type)(result, **kwargs).parse()
         except Exception as e:
@@ -56,14 +130,159 @@ def format_result(result, format_type='json', **kwargs):
         return Formatter(result, **kwargs).parse()
 
 
+def write_result(
+        result, format_type='json', query=None, fields=None, **kwargs
+):
+    """ Format a result and write it to stdout. Unlike format_result the output
+    is encoded and written a chunk at a time, rather than built up into one
+    string. With the `raw` format a response's body is copied to stdout as it
+    is received, unless it has to be narrowed by `query` or `fields`. Paged
+    results are written a page at a time, unless there is a `query`: it sees
+    the items of every page collected into one list. """
+    # pylint: disable=broad-except
+    format_type = (format_type or 'json').lower()
+    if isinstance(result, Pages) and not query:
+        if fields:
+            result = (_project(page, fields) for page in result)
+        stream_result(result, format_type, **kwargs)
+        return
+    if format_type == 'raw' and _is_response(result) and not (query or fields):
+        for chunk in result.iter_content(CHUNK_SIZE):
+            click.echo(chunk, nl=False)
+        return
+    result = to_data(result)
+    selected = bool(query or fields)
+    if selected:
+        result = select(result, query, fields)
+    with _ChunkWriter() as out:
+        if isinstance(result, (list, dict)) or selected:
+            formatter = _formatter(format_type)(result, **kwargs)
+            try:
+                formatter.write(out)
+            except Exception as e:
+                echo(result, level=LOG_DEBUG)
+                echo(e, level=LOG_DEBUG)
+                raise click.ClickException("Error parsing results.")
+        else:
+            formatter = Formatter(result, **kwargs)
+            formatter.write(out)
+        if not formatter.terminated:
+            out.write('\n')
+
+
+def stream_result(pages, format_type='json', **kwargs):
+    """ Write a paged result to stdout page by page, so only one page is held
+    in memory at a time. TOML can't be written incrementally and is formatted
+    as a whole. """
+    format_type = (format_type or 'json').lower()
+    if format_type == 'yaml':
+        _stream_yaml(pages)
+    elif format_type == 'ndjson':
+        _stream_ndjson(pages)
+    elif format_type == 'json-compact':
+        _stream_json_compact(pages)
+    elif format_type == 'toml':
+        items = [item for page in pages for item in page]
+        click.echo(format_result(items, format_type, **kwargs))
+    else:
+        _stream_json(pages)
+
+
+def _stream_json(pages):
+    # Same layout as the JSON formatter gives the whole list
+    empty = True
+    with _ChunkWriter() as out:
+        for page in pages:
+            for item in page:
+                out.write('[\n  ' if empty else ',\n  ')
+                for chunk in _ENCODER.iterencode(item):
+                    out.write(chunk.replace('\n', '\n  '))
+                empty = False
+            out.flush()
+        out.write('[]\n' if empty else '\n]\n')
+
+
+def _stream_ndjson(pages):
+    with _ChunkWriter() as out:
+        for page in pages:
+            for item in page:
+                out.write(_compact(item))
+                out.write('\n')
+            out.flush()
+
+
+def _stream_json_compact(pages):
+    sep = '['
+    with _ChunkWriter() as out:
+        for page in pages:
+            for item in page:
+                out.write(sep)
+                out.write(_compact(item))
+                sep = ','
+            out.flush()
+        out.write('[]\n' if sep == '[' else ']\n')
+
+
+def _stream_yaml(pages):
+    empty = True
+    with _ChunkWriter() as out:
+        for page in pages:
+            if page:
+                YAML(page).write(out)
+                out.flush()
+                empty = False
+        out.write('[]\n\n' if empty else '\n')
+
+
+class _ChunkWriter:
+    """ File-like object that collects writes and passes them on to stdout in
+    chunks of about CHUNK_SIZE characters """
+
+    def __init__(self):
+        self.chunks = []
+        self.size = 0
+
+    def write(self, data):
+        """ Queue data to be written """
+        if not isinstance(data, str):
+            self.flush()
+            click.echo(data, nl=False)
+            return
+        self.chunks.append(data)
+        self.size += len(data)
+        if self.size >= CHUNK_SIZE:
+            self.flush()
+
+    def flush(self):
+        """ Write out everything queued so far """
+        if self.chunks:
+            click.echo(''.join(self.chunks), nl=False)
+            self.chunks = []
+            self.size = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.flush()
+
+
 def _formatter(format_type):
     if format_type.lower() == 'toml':
         return TOML
     if format_type.lower() == 'yaml':
         return YAML
+    if format_type.lower() == 'ndjson':
+        return NDJSON
+    if format_type.lower() == 'json-compact':
+        return CompactJSON
     return JSON
 
 
+def _compact(data):
+    return json.dumps(data, separators=(',', ':'))
+
+
 class _NullStream:
     """ NullStream used for YAML dump """
 
@@ -78,6 +297,8 @@ class _NullStream:
 
 class Formatter(object):
     """ Base formatter """
+    # Whether write() ends its output with a newline itself
+    terminated = False
 
     def __init__(self, data, **kwargs):
         self.data = data
@@ -87,6 +308,12 @@ class Formatter(object):
         """ Parse data into formatter format """
         return self.data
 
+    def write(self, out):
+        """ Write the formatted data to a file-like object """
+        data = self.parse()
+        if data is not None:
+            out.write(data)
+
 
 class JSON(Formatter):
     """ JSON Formatter """
@@ -94,6 +321,45 @@ class JSON(Formatter):
     def parse(self):
         return json.dumps(self.data, indent=2)
 
+    def write(self, out):
+        for chunk in _ENCODER.iterencode(self.data):
+            out.write(chunk)
+
+
+class CompactJSON(Formatter):
+    """ JSON Formatter without any whitespace """
+
+    def parse(self):
+        return _compact(self.data)
+
+
+class NDJSON(Formatter):
+    """ Newline delimited JSON Formatter, one compact record per line. The
+    records are the items of a top-level list or of a well known collection
+    key (see COLLECTION_KEYS); any other result is a single record. """
+    terminated = True
+
+    def records(self):
+        """ The records to write, one per line """
+        data = self.data
+        if isinstance(data, list):
+            return data
+        if isinstance(data, dict):
+            for key in COLLECTION_KEYS:
+                if isinstance(data.get(key), list):
+                    return data[key]
+        # Objects, and scalars or null picked out by a query
+        return [data]
+
+    def parse(self):
+        return '\n'.join(_compact(record) for record in self.records())
+
+    def write(self, out):
+        # Every record ends its line, so no records means no output at all
+        for record in self.records():
+            out.write(_compact(record))
+            out.write('\n')
+
 
 class YAML(Formatter):
     """ YAML Formatter """
@@ -109,14 +375,17 @@ class YAML(Formatter):
         yaml.YAML().dump(self.data, _NullStream(), transform=self._to_string)
         return self.yaml
 
+    def write(self, out):
+        yaml.YAML().dump(self.data, out)
+
 
 class TOML(Formatter):
     """ TOML Formatter """
 
     def __init__(self, data, **kwargs):
-        if isinstance(data, list):
+        if not isinstance(data, dict):
             resp = {}
-            # TOML doesn't like lists, so wrap in object
+            # TOML doesn't like lists (or scalars), so wrap in object
             resp[kwargs.get('name', 'results')] = data
             data = resp
         Formatter.__init__(self, data, **kwargs)
@@ -22,16 +22,19 @@
 #  OTHER DEALINGS IN THE SOFTWARE.
 #
 """ Generates CLI commands from parsed Swagger file """
+import functools
 import json
 import os
 import re
 import click
-from requests_toolbelt.multipart.encoder import MultipartEncoder
 from six import string_types
 from six.moves import urllib
 
+from cray import cache
 from cray import core
 from cray import hostlist
+from cray import paging
+from cray import profiling
 from cray import rest
 from cray import swagger
 from cray.constants import CONVERSION_FLAG
@@ -43,6 +46,9 @@ from cray.constants import HIDDEN_TAG
 from cray.constants import IGNORE_TAG
 from cray.constants import TAG_SPLIT
 from cray.nesteddict import NestedDict
+from cray.utils import lazy_import
+
+multipart_encoder = lazy_import('requests_toolbelt.multipart.encoder')
 
 PATH_ORIGIN = 'path'
 QUERY_ORIGIN = 'query'
@@ -54,13 +60,14 @@ PREFERRED_HOST_PREFIX = 'api-gw'
 PREFERRED_URL_PREFIX = "/apis"
 
 
-def api(data, callback, base=''):
+def api(data, callback, base='', pager=None):
     """ Decorator that will send endpoint data into commands """
 
     def tags_decorator(func):  # pylint: disable=missing-docstring
         def func_wrapper(
                 *args,
                 data_handler=None,
+                all_pages=False,
                 **kwargs,
         ):  # pylint: disable=missing-docstring
             kwargs['base'] = base
@@ -68,6 +75,14 @@ def api(data, callback, base=''):
             if data_handler:
                 args = data_handler(args)
             opts = args[-1]
+            if all_pages:
+                pages = paging.Pages(pager, args[0], args[1], opts)
+                ctx = click.get_current_context(silent=True)
+                if ctx is not None and ctx.obj and ctx.obj.get('batch'):
+                    # A batch converts results once the command's context
+                    # is gone, so fetch every page while it's still here
+                    return list(pages.items())
+                return pages
             opts['callback'] = callback
             return func(*args[:-1], **opts)
 
@@ -177,7 +192,7 @@ def _parse_data(data, base=None, **kwargs):
             # This explicitly returns an open file object, can't use 'with' here
             # pylint: disable=consider-using-with
             fields[k] = (os.path.basename(v), open(v, 'rb'))
-        args['data'] = MultipartEncoder(fields=fields)
+        args['data'] = multipart_encoder.MultipartEncoder(fields=fields)
         args.setdefault(HEADERS_ORIGIN, {})['Content-Type'] = args[
             'data'].content_type
     return (method, route, args)
@@ -353,84 +368,123 @@ def _add_confirmation_opt(func, msg=None):
     return core.option("-y", callback=_cb, **opts)(func)
 
 
+def _cli_tags(data):
+    return [i for i in data.get('tags', []) if 'cli_' in i.lower()]
+
+
+def _all_hidden(commands, name, hidden=False):
+    """ Determine, without building anything, whether every command beneath a
+    group would be hidden, in which case the group is hidden as well. """
+    if hidden:
+        return True
+    for command, data in commands.items():
+        tags = _cli_tags(data)
+        if IGNORE_TAG in tags:
+            continue
+        if 'route' in data:
+            if HIDDEN_TAG not in tags:
+                return False
+        elif command.lower() == name.lower():
+            if not _all_hidden(data, name):
+                return False
+        elif not _all_hidden(data, command[0].lower() + command[1:]):
+            return False
+    return True
+
+
+def _add_command(cli, name, factory):
+    """ Register a subcommand, lazily if the group supports it """
+    if isinstance(cli, core.LazyGroup):
+        cli.add_lazy_command(name, factory)
+    else:
+        cli.add_command(factory(), name)
+
+
+def _add_all_pages_opt(func):
+    opts = {
+        "is_flag": True,
+        "no_global": True,
+        "help": "Follow the paging cursor and list every item, writing out "
+                "each page as it arrives."
+    }
+    return core.option("--all-pages", **opts)(func)
+
+
+def _make_command(name, data, tags, base, callback, opts):
+    from_file = (FROM_FILE_TAG in tags)
+    pager = paging.find_pager(data)
+    decorator = api(data, callback, base, pager)(rest.request)
+    func = _set_params(
+        decorator,
+        data,
+        from_file
+    )
+    if pager is not None:
+        func = _add_all_pages_opt(func)
+    for tag in tags:
+        temp = tag.split(TAG_SPLIT)
+        if DANGER_TAG in temp:
+            msg = None
+            if len(temp) > 1:
+                msg = temp[1]
+            func = _add_confirmation_opt(func, msg=msg)
+    opts.setdefault('needs_globals', True)
+    return core.command(name, help=data.get('help', ''), **opts)(func)
+
+
+def _make_group(name, data, base, callback, opts):
+    func = core.group(name, cls=core.LazyGroup, help=_find_help(data), **opts)(
+        _base_group
+    )
+    create_commands(func, data, base=base, callback=callback, **opts)
+    # If all sub commands/groups are hidden, hide parent.
+    func.hidden = _all_hidden(data, name, opts.get('hidden', False))
+    return func
+
+
 def create_commands(cli, commands, base=None, callback=None, **kwargs):
-    """ Generate CLI commands/groups from a parsed Swagger file """
-    # pylint: disable=too-many-locals
+    """ Generate CLI commands/groups from a parsed Swagger file. Commands are
+    only built when they are resolved if ``cli`` is a ``core.LazyGroup``. """
     parent_name = cli.name.lower()
     for command, data in commands.items():
         command_name = command[0].lower() + command[1:]
         # filter out possible cli tags
-        tags = [i for i in data.get('tags', []) if 'cli_' in i.lower()]
+        tags = _cli_tags(data)
         if IGNORE_TAG in tags:
             continue
         opts = kwargs.copy()
         if 'route' in data:
             if HIDDEN_TAG in tags:
                 opts.update({"hidden": True})
-            from_file = (FROM_FILE_TAG in tags)
-            decorator = api(data, callback, base)(rest.request)
-            func = _set_params(
-                decorator,
-                data,
-                from_file
+            _add_command(
+                cli, command_name, functools.partial(
+                    _make_command, command_name, data, tags, base, callback,
+                    opts
+                )
             )
-            for tag in tags:
-                temp = tag.split(TAG_SPLIT)
-                if DANGER_TAG in temp:
-                    msg = None
-                    if len(temp) > 1:
-                        msg = temp[1]
-                    func = _add_confirmation_opt(func, msg=msg)
-            cli.command(name=command_name, help=data.get('help', ''), **opts)(
-                func
+        elif command.lower() == parent_name:
+            # Hack to prevent duplicate groups, i.e. cray uas uas create
+            create_commands(
+                cli,
+                data,
+                base=base,
+                callback=callback,
+                **opts
             )
         else:
-            if command.lower() == parent_name:
-                # Hack to prevent duplicate groups, i.e. cray uas uas create
-                create_commands(
-                    cli,
-                    data,
-                    base=base,
-                    callback=callback,
-                    **opts
-                )
-            else:
-                func = cli.group(command_name, help=_find_help(data), **opts)(
-                    _base_group
+            _add_command(
+                cli, command_name, functools.partial(
+                    _make_group, command_name, data, base, callback, opts
                 )
-                create_commands(
-                    func,
-                    data,
-                    base=base,
-                    callback=callback,
-                    **opts
-                )
-                # If all sub commands/groups are hidden, hide parent.
-                _hide_parent = True
-                for v in func.commands.values():
-                    if not v.hidden:
-                        _hide_parent = False
-                        break
-                func.hidden = _hide_parent
-                cli.add_command(func)
-
-                # Create hidden versions of any uppercase commands for backwards compat
-                if command != command_name:
-                    opts['deprecated'] = True
-                    opts['hidden'] = True
-                    old_func = cli.group(
-                        command,
-                        help=_find_help(data),
-                        **opts
-                    )(_base_group)
-                    create_commands(
-                        old_func,
-                        data,
-                        base=base,
-                        callback=callback,
-                        **opts
+            )
+            # Create hidden versions of any uppercase commands for backwards compat
+            if command != command_name:
+                old_opts = dict(opts, deprecated=True, hidden=True)
+                _add_command(
+                    cli, command, functools.partial(
+                        _make_group, command, data, base, callback, old_opts
                     )
-                    cli.add_command(old_func)
+                )
 
 
 def _get_path(dirpath, filename):
@@ -443,7 +497,8 @@ def _get_path(dirpath, filename):
     )
 
 
-def _get_data(path, opts=None):
+@profiling.timed('swagger parse')
+def _parse_file(path, opts=None):
     opts = opts or {}
     with open(path, encoding='utf-8') as parsed_file:
         data = NestedDict(json.load(parsed_file))
@@ -453,6 +508,28 @@ def _get_data(path, opts=None):
     return parsed
 
 
+@profiling.timed('swagger load')
+def _get_data(path, opts=None):
+    # pylint: disable=import-outside-toplevel,cyclic-import
+    from cray import codegen
+    opts = opts or {}
+    # Parsing is the bulk of the startup cost, so prefer a module generated
+    # at build time, then a previous parse of the same file with the same
+    # options, before parsing it here.
+    parsed = codegen.load(path, opts)
+    if parsed is not None:
+        return parsed
+    cache_path = cache.swagger_cache_path(path, opts)
+    parsed = cache.load(cache_path)
+    if parsed is not None:
+        return parsed
+    parsed = _parse_file(path, opts)
+    cache.save(cache_path, parsed)
+    # Drop what this entry replaces, e.g. from before an upgrade
+    cache.prune(cache_path)
+    return parsed
+
+
 def find_newest(versions):
     """ Find newest API version """
     return max(versions)
@@ -490,7 +567,7 @@ def generate(
     parsed = _get_data(swagger_path, opts=swagger_opts)
     description = description or find_name(parsed.get('info', {}))
 
-    @core.group(name, help=description)
+    @core.group(name, cls=core.LazyGroup, help=description)
     def base():  # pylint: disable=missing-docstring
         pass
 
@@ -28,9 +28,6 @@ import hashlib
 import json
 import os
 import sys
-import boto3
-from boto3.s3.transfer import TransferConfig
-from botocore.exceptions import ClientError
 
 from cray.core import argument
 from cray.core import group
@@ -38,6 +35,11 @@ from cray.core import pass_context
 from cray.echo import echo
 from cray.errors import BadResponseError
 from cray.rest import request
+from cray.utils import lazy_import
+
+boto3 = lazy_import('boto3')
+s3transfer = lazy_import('boto3.s3.transfer')
+botocore_exceptions = lazy_import('botocore.exceptions')
 
 
 def datetime_handler(x):
@@ -98,7 +100,7 @@ def list_buckets(ctx):
     s3client = get_s3_client()
     try:
         buckets = s3client.list_buckets()
-    except ClientError as err:
+    except botocore_exceptions.ClientError as err:
         sys.exit(str(err))
 
     return [bucket['Name'] for bucket in buckets.get('Buckets')]
@@ -121,7 +123,7 @@ def list_objects(ctx, bucket):
                 for obj in page['Contents']:
                     files.append(obj)
 
-    except (s3client.exceptions.NoSuchBucket, ClientError) as err:
+    except (s3client.exceptions.NoSuchBucket, botocore_exceptions.ClientError) as err:
         sys.exit(str(err))
     return {
         "artifacts": json.loads(json.dumps(files, default=datetime_handler))
@@ -137,7 +139,7 @@ def describe_object(ctx, bucket, obj):
     s3client = get_s3_client()
     try:
         files = s3client.head_object(Bucket=bucket, Key=obj)
-    except (s3client.exceptions.NoSuchBucket, ClientError) as err:
+    except (s3client.exceptions.NoSuchBucket, botocore_exceptions.ClientError) as err:
         sys.exit(str(err))
 
     files.pop("ResponseMetadata")  # not terribly useful info here
@@ -167,7 +169,7 @@ def upload_object(ctx, bucket, obj, filename):
         s3client.put_object(Bucket=bucket, Key=obj_id, ACL='public-read')
     except s3client.exceptions.NoSuchBucket as err:
         sys.exit(str(err))
-    except ClientError as err:
+    except botocore_exceptions.ClientError as err:
         try:
             s3client.delete_object(Bucket=bucket, Key=obj_id)
         except Exception as delete_err:
@@ -180,7 +182,7 @@ def upload_object(ctx, bucket, obj, filename):
     try:
         upload_args = (filename, bucket, obj_id)
 
-        config = TransferConfig(use_threads=False)
+        config = s3transfer.TransferConfig(use_threads=False)
         upload_kwargs = {
             'Config': config,
             'ExtraArgs': {
@@ -195,7 +197,7 @@ def upload_object(ctx, bucket, obj, filename):
         # Pass back the name/key as well
         return {"artifact": obj_id, "Key": obj}
 
-    except ClientError as err:
+    except botocore_exceptions.ClientError as err:
         try:
             s3client.delete_object(Bucket=bucket, Key=obj_id)
         except Exception as delete_err:
@@ -214,11 +216,11 @@ def upload_object(ctx, bucket, obj, filename):
 def download_object(ctx, bucket, obj, filename):
     """ Download an object from a bucket """
     s3client = get_s3_client()
-    config = TransferConfig(use_threads=False)
+    config = s3transfer.TransferConfig(use_threads=False)
 
     try:
         s3client.download_file(bucket, obj, filename, Config=config)
-    except (ClientError, s3client.exceptions.NoSuchBucket) as err:
+    except (botocore_exceptions.ClientError, s3client.exceptions.NoSuchBucket) as err:
         sys.exit(str(err))
 
 
@@ -231,7 +233,7 @@ def delete_object(ctx, bucket, obj):
     s3client = get_s3_client()
     try:
         s3client.head_object(Bucket=bucket, Key=obj)
-    except (ClientError, s3client.exceptions.NoSuchKey) as err:
+    except (botocore_exceptions.ClientError, s3client.exceptions.NoSuchKey) as err:
         if "404" in str(err):
             try:
                 Buckets = s3client.list_buckets().get('Buckets')
@@ -239,11 +241,11 @@ def delete_object(ctx, bucket, obj):
                     print("Error: Object was not found in bucket")
                 else:
                     print("Error: Bucket does not exist")
-            except ClientError as err:
+            except botocore_exceptions.ClientError as err:
                 sys.exit(str(err))
         sys.exit(str(err))
     try:
         output = s3client.delete_object(Bucket=bucket, Key=obj)
         echo(output)
-    except (ClientError, s3client.exceptions.NoSuchBucket) as err:
+    except (botocore_exceptions.ClientError, s3client.exceptions.NoSuchBucket) as err:
         sys.exit(str(err))
@@ -0,0 +1,206 @@
+#
+#  MIT License
+#
+#  (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a
+#  copy of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom the
+#  Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+#  THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+#  OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+#
+""" Run many CLI commands in one process """
+import collections
+import io
+import json
+import shlex
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import click
+
+from cray.constants import NAME
+from cray.core import command
+from cray.core import option
+from cray.daemon import LOCAL_COMMANDS
+from cray.formatting import to_data
+
+# Commands that can't run as one line of a batch.
+EXCLUDED_COMMANDS = LOCAL_COMMANDS + ('batch',)
+
+
+class _ThreadOutput(io.TextIOBase):
+    """ Stand-in for sys.stdout that sends each batch command's output to
+    its own buffer, so concurrent commands don't interleave with the
+    NDJSON stream. Threads without a buffer write through. """
+
+    def __init__(self, stream):
+        super().__init__()
+        self._stream = stream
+        self._local = threading.local()
+
+    @property
+    def encoding(self):
+        return getattr(self._stream, 'encoding', 'utf-8')
+
+    def capture(self):
+        """ Start capturing this thread's output """
+        self._local.buffer = io.StringIO()
+
+    def release(self):
+        """ Stop capturing this thread's output and return it """
+        buffer = self._local.__dict__.pop('buffer', None)
+        return buffer.getvalue() if buffer is not None else ''
+
+    def writable(self):
+        return True
+
+    def write(self, s):
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is not None:
+            return buffer.write(s)
+        return self._stream.write(s)
+
+    def flush(self):
+        if getattr(self._local, 'buffer', None) is None:
+            self._stream.flush()
+
+    def isatty(self):
+        return False
+
+
+def parse_lines(lines):
+    """ Yield (line number, command line, args) for each command. Blank
+    lines and # comments are skipped, and a leading `cray` is optional. """
+    for number, line in enumerate(lines, 1):
+        try:
+            args = shlex.split(line, comments=True)
+        except ValueError as err:
+            yield number, line.strip(), err
+            continue
+        if args and args[0] == NAME:
+            args = args[1:]
+        if args:
+            yield number, line.strip(), args
+
+
+def _first_command(args):
+    return next((arg for arg in args if not arg.startswith('-')), None)
+
+
+def run_line(ctx, output, number, line, args):
+    """ Run one command line and describe how it went """
+    record = {'line': number, 'command': line}
+    if isinstance(args, Exception):
+        record.update(exit_code=2, error=f'Unable to parse command: {args}')
+        return record
+    if _first_command(args) in EXCLUDED_COMMANDS:
+        record.update(
+            exit_code=2,
+            error=f"'{_first_command(args)}' can't be run in a batch"
+        )
+        return record
+
+    # Share the configuration, credentials and session already loaded for
+    # the batch, but let each command set its own options.
+    obj = dict(ctx.obj, globals=dict(ctx.obj['globals']), batch=True)
+    root = ctx.find_root().command
+    output.capture()
+    try:
+        result = root.main(
+            args=list(args), prog_name=NAME, obj=obj, standalone_mode=False
+        )
+        record.update(exit_code=0, result=to_data(result))
+    except click.ClickException as err:
+        record.update(exit_code=err.exit_code, error=err.format_message())
+    except click.exceptions.Exit as err:
+        record.update(exit_code=err.exit_code)
+    except click.Abort:
+        record.update(exit_code=1, error='Aborted!')
+    except Exception as err:  # pylint: disable=broad-except
+        record.update(exit_code=1, error=str(err) or type(err).__name__)
+    finally:
+        captured = output.release()
+    if captured:
+        record['output'] = captured
+    return record
+
+
+def run_all(func, items, concurrency):
+    """ Yield func(*item) for each item, in order, running up to
+    `concurrency` at once """
+    if concurrency <= 1:
+        for item in items:
+            yield func(*item)
+        return
+    pending = collections.deque()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        try:
+            for item in items:
+                pending.append(pool.submit(func, *item))
+                # Keep a bounded window of queued commands.
+                if len(pending) >= concurrency * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+@command(name='batch', needs_globals=True)
+@option(
+    '-f', '--file', 'command_file', type=click.File('r'), default='-',
+    no_global=True, help='File of commands, one per line. Default is stdin.'
+)
+@option(
+    '-j', '--concurrency', type=click.IntRange(1, 64), default=1,
+    no_global=True,
+    help='Number of commands to run at once. Set core.pool_size at least '
+         'this high so each can keep a connection open.'
+)
+@option(
+    '--fail-fast', is_flag=True, no_global=True,
+    help='Stop at the first command that fails.'
+)
+@click.pass_context
+def cli(ctx, command_file, concurrency, fail_fast):
+    """ Run many commands in one process.
+
+    Each line of the file is a command line, e.g. `bss bootparameters list
+    --hosts x3000c0s1b0n0`; a leading `cray` is optional and # starts a
+    comment. Modules, configuration, credentials and connections are loaded
+    once and shared by every command. One JSON object is written per
+    command, in order, with its `exit_code` and either its `result` or its
+    `error`. Exits non-zero if any command failed. """
+    output = _ThreadOutput(sys.stdout)
+    sys.stdout = output
+    failed = False
+    try:
+        items = (
+            (ctx, output) + parsed for parsed in parse_lines(command_file)
+        )
+        records = run_all(run_line, items, concurrency)
+        for record in records:
+            click.echo(json.dumps(record, default=str))
+            if record['exit_code']:
+                failed = True
+                if fail_fast:
+                    records.close()
+                    break
+    finally:
+        sys.stdout = output._stream  # pylint: disable=protected-access
+    ctx.exit(1 if failed else 0)
@@ -44,16 +44,14 @@ else:
     cli.commands = cli.commands[CURRENT_VERSION].commands
 
 
-def strip_tenant_header_params(cmd=cli):
+def strip_tenant_header_params(cmd):
     """
     Remove tenant header parameters from CLI commands, because those are
-    handled differently by the CLI
+    handled differently by the CLI. Registered as a hook on the generated
+    commands so it is applied to each one as it is built.
     """
     if hasattr(cmd, 'params'):
         cmd.params = [ p for p in cmd.params if p.payload_name != 'Cray-Tenant-Name' ]
-    if hasattr(cmd, 'commands'):
-        for c in cmd.commands.values():
-            strip_tenant_header_params(c)
 
 
 # Add --file parameter for specifying session template data
@@ -276,7 +274,7 @@ def setup_v2_template_create():
     cli.commands['v2'].commands['sessiontemplates'].commands['create'] = \
         temp_cli.commands['v2'].commands['sessiontemplates'].commands['create']
 
-strip_tenant_header_params()
+cli.add_hook(strip_tenant_header_params)
 
 setup_v2_template_create()
 
@@ -26,14 +26,16 @@
 import asyncio
 import json
 import click
-import websockets
-import aioconsole
 
 from cray.constants import TENANT_HEADER_NAME_KEY
 from cray.core import argument
 from cray.core import group
 from cray.core import pass_context
 from cray.core import option
+from cray.utils import lazy_import
+
+websockets = lazy_import('websockets')
+aioconsole = lazy_import('aioconsole')
 
 # Header name keys for console apis
 CONSOLE_HEADER_TAIL_KEY = "Cray-Console-Lines"
@@ -0,0 +1,115 @@
+#
+#  MIT License
+#
+#  (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a
+#  copy of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom the
+#  Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+#  THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+#  OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+#
+""" Manage the local CLI daemon """
+import os
+import subprocess
+import time
+
+import click
+
+from cray import daemon
+from cray.constants import DAEMON_ENVVAR
+from cray.constants import LOG_DIR_NAME
+from cray.core import group
+from cray.core import option
+
+START_TIMEOUT = 30
+
+
+@group()  # Name for main group is inferred from the directory name.
+def cli():
+    """ Run CLI commands through a long-lived local process """
+    pass
+
+
+def _log_path():
+    log_dir = os.path.join(daemon.config_dir(), LOG_DIR_NAME)
+    os.makedirs(log_dir, exist_ok=True)
+    return os.path.join(log_dir, 'daemon.log')
+
+
+@cli.command(name='start', needs_globals=False)
+@option(
+    '--foreground', is_flag=True, no_global=True,
+    help='Run in this process instead of in the background.'
+)
+@option(
+    '--idle-timeout', type=int, default=0, no_global=True,
+    help='Exit after this many seconds without a command. 0 never exits.'
+)
+def start(foreground, idle_timeout):
+    """ Start the daemon. While it is running, `cray` commands are handed to
+    it instead of starting the CLI from scratch. Set CRAY_DAEMON=0 to run a
+    command without it. """
+    status = daemon.request({'type': 'status'}, timeout=5)
+    if status:
+        return f"Daemon already running (pid {status['pid']})"
+    os.makedirs(daemon.config_dir(), exist_ok=True)
+    if foreground:
+        daemon.Daemon(idle_timeout=idle_timeout).serve()
+        return 'Daemon stopped'
+
+    env = dict(os.environ)
+    env[DAEMON_ENVVAR] = '0'
+    args = daemon.cli_command() + [
+        'daemon', 'start', '--foreground', '--idle-timeout', str(idle_timeout)
+    ]
+    with open(_log_path(), 'ab') as log:
+        proc = subprocess.Popen(  # pylint: disable=consider-using-with
+            args, env=env, stdin=subprocess.DEVNULL, stdout=log,
+            stderr=subprocess.STDOUT, start_new_session=True
+        )
+    deadline = time.monotonic() + START_TIMEOUT
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise click.ClickException(
+                f'Daemon exited with {proc.returncode}, see {_log_path()}'
+            )
+        status = daemon.request({'type': 'status'}, timeout=5)
+        if status:
+            return f"Daemon started (pid {status['pid']})"
+        time.sleep(0.1)
+    raise click.ClickException(f'Daemon did not start, see {_log_path()}')
+
+
+@cli.command(name='stop', needs_globals=False)
+def stop():
+    """ Stop the daemon """
+    if daemon.request({'type': 'stop'}, timeout=30) is None:
+        return 'Daemon is not running'
+    return 'Daemon stopped'
+
+
+@cli.command(name='status', needs_globals=False)
+def status():
+    """ Show whether the daemon is running """
+    found = daemon.request({'type': 'status'}, timeout=5)
+    if found is None:
+        return 'Daemon is not running'
+    state = 'busy' if found['busy'] else 'idle'
+    return (
+        f"Daemon running (pid {found['pid']}, {state}), "
+        f"{found['served']} commands served, "
+        f"{len(found['modules'])} modules loaded"
+    )
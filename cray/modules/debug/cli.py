@@ -0,0 +1,83 @@
+#
+#  MIT License
+#
+#  (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a
+#  copy of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom the
+#  Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+#  THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+#  OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+#
+""" Hidden commands for debugging the CLI itself """
+import os
+import subprocess
+
+import click
+
+from cray import profiling
+from cray import timing
+from cray.constants import PROFILE_STARTUP_ENVVAR
+from cray.core import argument
+from cray.core import group
+from cray.core import option
+from cray.daemon import cli_command
+
+
+@group(hidden=True)  # Name for main group is inferred from the directory name.
+def cli():
+    """ Debug the Cray CLI """
+    pass
+
+
+@cli.command(
+    name='startup-profile', needs_globals=False,
+    context_settings={
+        'ignore_unknown_options': True,
+        'allow_interspersed_args': False,
+    }
+)
+@option(
+    '--profile-format', type=click.Choice(profiling.FORMATS), default='text',
+    no_global=True, help='Format of the startup breakdown.'
+)
+@argument('args', nargs=-1, type=click.UNPROCESSED)
+@click.pass_context
+def startup_profile(ctx, profile_format, args):
+    """ Run `cray ARGS...` in a new process and print how long each startup
+    phase took. The breakdown is printed to stderr after the command's own
+    output. """
+    env = dict(os.environ)
+    env[PROFILE_STARTUP_ENVVAR] = profile_format
+    proc = subprocess.run(
+        cli_command() + list(args), env=env, check=False,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    click.echo(proc.stdout.decode(errors='replace'), nl=False)
+    click.echo(proc.stderr.decode(errors='replace'), nl=False, err=True)
+    ctx.exit(proc.returncode)
+
+
+@cli.command(name='stats')
+@click.pass_context
+def stats(ctx):
+    """ Summarize the request log: latency percentiles per service and per
+    endpoint, slowest first. Requests are logged unless `log.requests` is
+    set to false. """
+    records = list(timing.read(timing.log_path(ctx)))
+    return dict(
+        log=timing.log_path(ctx), requests=len(records),
+        **timing.summarize(records)
+    )
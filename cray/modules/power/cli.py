@@ -27,6 +27,7 @@ from http import HTTPStatus
 import json
 # pylint: disable=invalid-name
 import re
+from urllib.parse import urlencode
 import click
 
 from cray import hostlist
@@ -36,6 +37,7 @@ from cray.core import pass_context
 from cray.errors import BadResponseError
 from cray.generator import generate
 from cray.rest import request
+from cray.utils import concurrent_map
 
 PCS = 'apis/power-control/v1'
 SMD = 'apis/smd/hsm/v2'
@@ -43,6 +45,10 @@ SMD = 'apis/smd/hsm/v2'
 CONTROL_NAME = 0
 CONTROL_VALUE = 1
 
+# Longest query string sent in one request. Istio rejects requests with
+# oversized headers, so large xname sets are split across several requests.
+MAX_QUERY_LENGTH = 4096
+
 ###########################################################################
 # cray power
 ###########################################################################
@@ -102,27 +108,28 @@ def get_chassis(xname):
     return ""
 
 
-def component_valid(xname, globalComponents):
+def component_index():
     """
-    Check with the state manager to determine if the xname is valid. Checks for
-    enable/disabled or empty state will be done by PCS. This is used to weed out
-    hardware that doesn't exist such as chassis and compute/router modules in
-    River racks.
+    Fetch every component from the state manager and return the set of their
+    xnames, so any number of component_valid checks cost a single request.
     """
-    if len(globalComponents) == 0:
-        url = SMD + "/State/Components"
-        resp = request('GET', url)
+    url = SMD + "/State/Components"
+    resp = request('GET', url)
 
-        if resp.status_code >= HTTPStatus.BAD_REQUEST:
-            raise BadResponseError(resp)
+    if resp.status_code >= HTTPStatus.BAD_REQUEST:
+        raise BadResponseError(resp)
 
-        globalComponents = json.loads(resp.content)
+    return {c['ID'] for c in json.loads(resp.content)['Components']}
 
-    for c in globalComponents['Components']:
-        if xname == c['ID']:
-            return True
 
-    return False
+def component_valid(xname, index):
+    """
+    Check with the state manager to determine if the xname is valid. Checks for
+    enable/disabled or empty state will be done by PCS. This is used to weed out
+    hardware that doesn't exist such as chassis and compute/router modules in
+    River racks. `index` is the set returned by component_index.
+    """
+    return xname in index
 
 
 def add_parents(xarr):
@@ -130,22 +137,22 @@ def add_parents(xarr):
     Take an array of xnames and return a new array that has been expanded to
     include all parents of the original xnames, along with the original xames.
     """
-    globalComponents = []
-    narr = xarr.copy()
+    parents = []
     for x in xarr:
-        slot = ''
-        chassis = ''
         if is_Node(x) is True:
-            slot = get_module(x)
-            chassis = get_chassis(x)
-        if is_Module(x) is True:
-            chassis = get_chassis(x)
-        if slot != '':
-            if component_valid(slot, globalComponents) is True:
-                narr.append(slot)
-        if chassis != '':
-            if component_valid(chassis, globalComponents) is True:
-                narr.append(chassis)
+            parents += [get_module(x), get_chassis(x)]
+        elif is_Module(x) is True:
+            parents.append(get_chassis(x))
+
+    narr = xarr.copy()
+    if not parents:
+        return narr
+
+    # One fetch of the component list serves every lookup
+    index = component_index()
+    for p in parents:
+        if component_valid(p, index) is True:
+            narr.append(p)
 
     return narr
 
@@ -156,30 +163,59 @@ def add_children(xarr):
     include all children of the original xnames, along with the original xnames.
     """
     url = SMD + "/State/Components/Query/"
-    query = ''
-    narr = xarr.copy()
+    exclude = "&state!=empty&enabled=true"
+    queries = []
     for x in xarr:
         if is_Node(x) is True:
             continue
+        query = ''
         if is_Module(x) is True:
             query = "?type=computemodule&type=routermodule&type=node"
         elif is_Chassis(x) is True:
             query = "?type=chassis&type=computemodule&type=routermodule&type=node"
+        queries.append(url + x + query + exclude)
 
-        exclude = "&state!=empty&enabled=true"
-
-        resp = request('GET', url + x + query + exclude)
+    def get_children(query):
+        resp = request('GET', query)
 
         if resp.status_code >= HTTPStatus.BAD_REQUEST:
             raise BadResponseError(resp)
 
         body = json.loads(resp.content)
-        for c in body['Components']:
-            narr.append(c['ID'])
+        return [c['ID'] for c in body['Components']]
+
+    # The lookups are independent, so issue them concurrently (up to
+    # core.concurrency at a time). Results come back in the order of xarr.
+    narr = xarr.copy()
+    for children in concurrent_map(get_children, queries):
+        narr += children
 
     return narr
 
 
+def chunk_params(params, xarr, limit=MAX_QUERY_LENGTH):
+    """
+    Split the xnames into lists of URL parameters whose encoded query string
+    stays under `limit` characters. Every list starts with `params`. At least
+    one list is always returned, even when there are no xnames.
+    """
+    base = len(urlencode(params))
+    chunks = []
+    chunk = list(params)
+    length = base
+    for x in xarr:
+        tParam = ('xname', x)
+        size = len(urlencode([tParam])) + 1
+        if len(chunk) > len(params) and length + size > limit:
+            chunks.append(chunk)
+            chunk = list(params)
+            length = base
+        chunk.append(tParam)
+        length += size
+    chunks.append(chunk)
+    return chunks
+
+
 def execute_transition(ctx, xnames, include, op):
     """ Initiates a transition to the xnames based on the 'op' """
     # pylint: disable=unused-argument
@@ -454,7 +490,8 @@ def status_list(ctx, xnames, powerfilter, mgmtfilter, include):
     # There is a limit to the length of the URL that can be used due to istio.
     # If there are too many query parameters, they need to be broken up into
     # multiple requests to PCS. CAPMC previous used 2k chunks for the maximum
-    # number of xnames it queried HSM with at one time.
+    # number of xnames it queried HSM with at one time. Here the chunks are
+    # sized by the length of the query string (see chunk_params).
     xarr = xname_array(xnames)
     # Always gather the children first, otherwise we will get everything
     # in the cabinet.
@@ -479,16 +516,22 @@ def status_list(ctx, xnames, powerfilter, mgmtfilter, include):
         tParam = ('managementStateFilter', mgmtfilter)
         aParams.append(tParam)
 
-    for x in xarr:
-        tParam = ('xname', x)
-        aParams.append(tParam)
+    def get_status(params):
+        resp = request('GET', PCS + '/power-status', params=params)
 
-    resp = request('GET', PCS + '/power-status', params=aParams)
+        if resp.status_code >= HTTPStatus.BAD_REQUEST:
+            raise BadResponseError(resp)
 
-    if resp.status_code >= HTTPStatus.BAD_REQUEST:
-        raise BadResponseError(resp)
+        return resp.json()
 
-    return resp.json()
+    # The chunks are queried concurrently and their status lists are merged
+    # in xname order.
+    results = concurrent_map(get_status, chunk_params(aParams, xarr))
+    body = results[0]
+    for result in results[1:]:
+        body['status'] += result['status']
+
+    return body
 
 
 ###########################################################################
@@ -23,6 +23,7 @@
 #
 """ mpir.py - MPIR attach implementation. """
 # pylint: disable=broad-exception-raised
+import array
 import ctypes
 import os
 
@@ -108,6 +109,16 @@ def init_libMpirAttach_functions():
         libMpirAttach = None
 
 
+def MPIR_attach_available():
+    """ Determine if the MPIR attach library could be loaded """
+
+    # Load MPIR initialization functions from shared library
+    if libMpirAttach is None:
+        init_libMpirAttach_functions()
+
+    return libMpirAttach is not None
+
+
 def get_MPIR_being_debugged():
     """ Get C variable MPIR_being_debugged """
 
@@ -132,9 +143,20 @@ def MPIR_proctable_filled():
     return bool(libMpirAttach.get_MPIR_proctable_size() > 0)
 
 
-def fill_MPIR_proctable(proctable_elems):
-    """ Use proctable element array to fill C MPIR_proctable """
-    # pylint: disable=too-many-locals,too-many-branches
+def _cstr_array(strings):
+    """ NULL-terminated char* array. ctypes keeps the encoded strings alive
+    for as long as the array. """
+    return (ctypes.c_char_p * (len(strings) + 1))(
+        *[string.encode('utf-8') for string in strings], None
+    )
+
+
+def fill_MPIR_proctable_indexed(hostnames, host_idxs, executables, exe_idxs,
+                                pids):
+    """ Fill C MPIR_proctable from per-rank index arrays: rank i runs
+    executables[exe_idxs[i]] on hostnames[host_idxs[i]] as pids[i]. The
+    arrays may be lists or anything else holding ints, such as array.array
+    or NumPy arrays. """
 
     # Load MPIR initialization functions from shared library
     if libMpirAttach is None:
@@ -142,56 +164,34 @@ def fill_MPIR_proctable(proctable_elems):
         if libMpirAttach is None:
             return
 
-    if not proctable_elems:
+    size = len(pids)
+    if not size:
         raise Exception("proctable is empty")
+    if len(host_idxs) != size or len(exe_idxs) != size:
+        raise Exception("proctable arrays differ in length")
 
-    hostnames = []
-    hostname_indices = {}
-
-    executables = []
-    executable_indices = {}
-
-    for (hostname, executable, pid) in proctable_elems:
-        if hostname not in hostnames:
-            hostname_indices[hostname] = len(hostnames)
-            hostnames.append(hostname)
-        if executable not in executables:
-            executable_indices[executable] = len(executables)
-            executables.append(executable)
-
-    hostname_cstr_arr = (ctypes.c_char_p * (len(hostnames) + 1))()
-    hostname_cstr_storage = [
-        ctypes.create_string_buffer(host.encode('utf-8')) for host in hostnames
-    ]
-    for (i, host_cstr) in enumerate(hostname_cstr_storage):
-        hostname_cstr_arr[i] = ctypes.cast(host_cstr, ctypes.c_char_p)
-    hostname_cstr_arr[len(hostname_cstr_storage)] = None
-
-    executable_cstr_arr = (ctypes.c_char_p * (len(executables) + 1))()
-    executable_cstr_storage = [
-        ctypes.create_string_buffer(exe.encode('utf-8')) for exe in executables
-    ]
-    for (i, exe_cstr) in enumerate(executable_cstr_storage):
-        executable_cstr_arr[i] = ctypes.cast(exe_cstr, ctypes.c_char_p)
-    executable_cstr_arr[len(executable_cstr_storage)] = None
+    # Contiguous machine-int copies, so the loop below only unboxes
+    # small ints and creates no per-rank Python objects of its own
+    host_idxs = array.array('i', host_idxs)
+    exe_idxs = array.array('i', exe_idxs)
+    pids = array.array('L', pids)
 
     if libMpirAttach.allocate_MPIR_proctable(
-            len(proctable_elems),
-            hostname_cstr_arr, len(hostnames),
-            executable_cstr_arr, len(executables)
+            size,
+            _cstr_array(hostnames), len(hostnames),
+            _cstr_array(executables), len(executables)
     ):
         raise Exception("failed: allocate_MPIR_proctable")
 
-    for (idx, (hostname, executable, pid)) in enumerate(proctable_elems):
-        if libMpirAttach.set_MPIR_proctable_elem(
-                idx,
-                hostname_indices[hostname],
-                executable_indices[executable],
-                pid
-        ):
+    # libMpirAttach has no bulk setter, keep the per-rank call tight
+    set_elem = libMpirAttach.set_MPIR_proctable_elem
+    for idx, host_idx, exe_idx, pid in zip(
+            range(size), host_idxs, exe_idxs, pids
+    ):
+        if set_elem(idx, host_idx, exe_idx, pid):
             raise Exception("failed: set_MPIR_proctable_elem")
 
-    if libMpirAttach.finalize_MPIR_proctable(len(proctable_elems)):
+    if libMpirAttach.finalize_MPIR_proctable(size):
         raise Exception("failed: finalize_MPIR_proctable")
 
     # Set debug state to spawned / proctable filled
@@ -199,6 +199,28 @@ def fill_MPIR_proctable(proctable_elems):
         raise Exception("failed: set_MPIR_debug_state")
 
 
+def fill_MPIR_proctable(proctable_elems):
+    """ Use proctable element array to fill C MPIR_proctable """
+    hostname_indices = {}
+    executable_indices = {}
+    host_idxs = array.array('i')
+    exe_idxs = array.array('i')
+    pids = array.array('L')
+    for (hostname, executable, pid) in proctable_elems:
+        host_idxs.append(
+            hostname_indices.setdefault(hostname, len(hostname_indices))
+        )
+        exe_idxs.append(
+            executable_indices.setdefault(executable, len(executable_indices))
+        )
+        pids.append(pid)
+
+    fill_MPIR_proctable_indexed(
+        list(hostname_indices), host_idxs,
+        list(executable_indices), exe_idxs, pids
+    )
+
+
 def set_current_apid(apid):
     """ Make currently-running apid available to debugger client """
 
@@ -52,12 +52,12 @@ class NestedDict(dict):
         E: `d.get('a.b.c', 'bar')` is the same as: \n
         `d.get('a', {}).get('b', {}).get('c', 'bar')`
         """
-        keys = key.split('.')
-        found = dict(self.items())
-        for k in keys:
+        found = self
+        for k in key.split('.'):
             if not isinstance(found, dict):
                 return default
-            found = found.get(k)
+            # dict.get so nested NestedDicts don't split the key again
+            found = dict.get(found, k)
             if found is None:
                 return default
         return found
@@ -25,30 +25,32 @@
 import os
 import click
 
+from cray import profiling
 from cray.auth import AuthFile
 from cray.auth import AuthUsername
 from cray.config import Config
 from cray.constants import ACTIVE_CONFIG
-from cray.constants import CONFIG_DIR_ENVVAR
 from cray.constants import CONFIG_ENVVAR
 from cray.constants import DEFAULT_CONFIG
 from cray.constants import EMPTY_CONFIG
 from cray.constants import FORMAT_ENVVAR
-from cray.constants import NAME
 from cray.constants import QUIET_ENVVAR
 from cray.constants import TOKEN_ENVVAR
+from cray.utils import get_config_dir
 from cray.utils import get_hostname
+from cray.utils import lazy_import
+
+jmespath = lazy_import('jmespath')
 
 
 def _has_changed(ctx, param, value):
     return param.name not in ctx.obj['globals'] or param.default != value
 
 
-def _set_config(ctx, param, value):
+def _load_config(ctx, param, value):
     ignored_commands = ['init']
     command_name = ctx.command.name
-    base_dir = os.environ.get(CONFIG_DIR_ENVVAR, os.path.expanduser("~"))
-    config_dir = os.path.join(base_dir, '.config', NAME)
+    config_dir = get_config_dir()
 
     ctx.obj['config_dir'] = config_dir
     if _has_changed(ctx, param, value) and value is not None:
@@ -78,13 +80,33 @@ def _set_config(ctx, param, value):
     return ctx.obj['globals'][param.name]
 
 
+def _set_config(ctx, param, value):
+    with profiling.phase('config load'):
+        return _load_config(ctx, param, value)
+
+
 def _set_global(ctx, param, value):
     if _has_changed(ctx, param, value):
         ctx.obj['globals'][param.name] = value
     return ctx.obj['globals'][param.name]
 
 
-def _set_token(ctx, param, value):
+def _set_query(ctx, param, value):
+    if value:
+        try:
+            jmespath.compile(value)
+        except jmespath.exceptions.ParseError as err:
+            raise click.BadParameter(str(err), ctx=ctx, param=param)
+    return _set_global(ctx, param, value)
+
+
+def _set_fields(ctx, param, value):
+    if value and not isinstance(value, list):
+        value = [field.strip() for field in value.split(',') if field.strip()]
+    return _set_global(ctx, param, value)
+
+
+def _load_token(ctx, param, value):
     # pylint: disable=unused-argument
     token = ctx.obj['globals'].get(param.name)
     if ctx.info_name != 'init' and _has_changed(ctx, param, value):
@@ -103,6 +125,11 @@ def _set_token(ctx, param, value):
     return token
 
 
+def _set_token(ctx, param, value):
+    with profiling.phase('token load'):
+        return _load_token(ctx, param, value)
+
+
 def global_options(func):
     """ Set of global options that should be added to every command """
     # pylint: disable=cyclic-import,import-outside-toplevel
@@ -121,11 +148,36 @@ def global_options(func):
     func = option(
         '--format',
         default='toml',
-        type=click.Choice(['json', 'toml', 'yaml']),
+        type=click.Choice(
+            ['json', 'json-compact', 'ndjson', 'toml', 'yaml', 'raw']
+        ),
         envvar=FORMAT_ENVVAR,
         callback=_set_global,
         **opts
     )(func)
+    func = option(
+        '--query', metavar='JMESPATH', callback=_set_query,
+        help="JMESPath expression applied to the result before it is "
+             "formatted, e.g. \"Components[?State=='Off'].ID\"", **opts
+    )(func)
+    func = option(
+        '--fields', metavar='FIELD,...', callback=_set_fields,
+        help="Only output these fields of each result record. Nested fields "
+             "are separated with dots, e.g. ID,State,Flag", **opts
+    )(func)
+    func = option(
+        '--retries', metavar='N', type=click.IntRange(min=1),
+        callback=_set_global,
+        help="Send a failed idempotent request at most this many times. "
+             "Defaults to retry.attempts from the configuration", **opts
+    )(func)
+    func = option(
+        '--cache-ttl', metavar='SECONDS', type=click.FloatRange(min=0),
+        callback=_set_global,
+        help="Answer GET requests from the response cache for this many "
+             "seconds. Defaults to cache.ttl from the configuration, 0 turns "
+             "the cache off", **opts
+    )(func)
     func = option(
         "--token", metavar='TOKEN_FILE_PATH', callback=_set_token,
         envvar=TOKEN_ENVVAR, show_envvar=True, **opts
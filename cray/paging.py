@@ -0,0 +1,116 @@
+#
+#  MIT License
+#
+#  (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a
+#  copy of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom the
+#  Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+#  THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+#  OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+#
+""" Follow the paging cursors of list endpoints (`--all-pages`). """
+import abc
+
+from cray import rest
+
+# Page size asked for when the user didn't pick one and the API would
+# otherwise return everything at once.
+DEFAULT_PAGE_SIZE = 1000
+
+
+class Pager(abc.ABC):
+    """ Base pager, knows which query parameters make up the cursor """
+    params = ()
+
+    @classmethod
+    def matches(cls, names):
+        """ Whether an endpoint with these query parameters can be paged """
+        return set(cls.params).issubset(names)
+
+    @abc.abstractmethod
+    def pages(self, method, route, opts):
+        """ Yield the items of each page, requesting pages as needed """
+
+
+class NextPager(Pager):
+    """ CFS v3 style paging. Responses carry their items in a collection key
+    and a `next` object with the `limit`/`after_id` of the following page,
+    or null on the last page. """
+    params = ('limit', 'after_id')
+
+    def pages(self, method, route, opts):
+        params = dict(opts.get('params') or {})
+        while True:
+            body = rest.request(method, route, **dict(opts, params=params)).json()
+            items = [v for k, v in body.items() if isinstance(v, list)]
+            yield items[0] if items else []
+            cursor = body.get('next')
+            if not cursor:
+                return
+            params.update(cursor)
+
+
+class AfterIdPager(Pager):
+    """ BOS v2 style paging. Responses are plain lists of at most `page_size`
+    items, the next page starts after the `id` of the last item. A short page
+    isn't necessarily the last, the server may cap the page size, so paging
+    stops at the first empty page. """
+    params = ('start_after_id', 'page_size')
+
+    def pages(self, method, route, opts):
+        params = dict(opts.get('params') or {})
+        if not params.get('page_size'):
+            params['page_size'] = DEFAULT_PAGE_SIZE
+        while True:
+            page = rest.request(method, route, **dict(opts, params=params)).json()
+            if not page:
+                return
+            yield page
+            params['start_after_id'] = page[-1]['id']
+
+
+PAGERS = (NextPager, AfterIdPager)
+
+
+def find_pager(data):
+    """ The pager for a parsed Swagger endpoint, or None if it can't be paged """
+    if data.get('method', '').lower() != 'get':
+        return None
+    names = {param['name'] for param in data.get('query', [])}
+    for pager in PAGERS:
+        if pager.matches(names):
+            return pager()
+    return None
+
+
+class Pages(object):
+    """ The result of an `--all-pages` command: an iterable over the pages
+    of a collection, each page being a list of items. Pages are requested as
+    they are consumed so they can be written out as they arrive. """
+
+    def __init__(self, pager, method, route, opts):
+        self.pager = pager
+        self.method = method
+        self.route = route
+        self.opts = opts
+
+    def __iter__(self):
+        return self.pager.pages(self.method, self.route, self.opts)
+
+    def items(self):
+        """ Iterate over the items of every page """
+        for page in self:
+            yield from page
@@ -23,25 +23,24 @@
 #
 """ pals.py - Common functions for launching applications with PALS. """
 # pylint: disable=fixme
+import asyncio
 import base64
-import errno
+import collections
 import fcntl
+import io
 import json
 import os
 import resource
 import signal
-import socket
-import ssl
 import stat
 import sys
-import threading
 import time
 import uuid
-import websocket
 import click
 from six.moves import urllib
 
 from cray import atp
+from cray import cache
 from cray import mpir
 from cray.echo import echo
 from cray.echo import LOG_DEBUG
@@ -50,12 +49,20 @@ from cray.echo import LOG_RAW
 from cray.echo import LOG_WARN
 from cray.errors import BadResponseError
 from cray.rest import request
+from cray.utils import concurrent_map
 from cray.utils import get_hostname
+from cray.utils import lazy_import
 from cray.utils import open_atomic
 
+ssl = lazy_import('ssl')
+websockets = lazy_import('websockets')
+
 SIGNAL_RECEIVED = 0  # Last signal number received
 PING_INTERVAL = 20  # WebSocket ping interval
+MPIR_ATTACH_SIGNAL = signal.SIGURG  # Check for MPIR attach right away
 MPIR_ATTACH_INTERVAL = 1  # Check for MPIR attach variable
+OUTPUT_FLUSH_BYTES = 256 * 1024  # Write buffered output once this large
+OUTPUT_FLUSH_INTERVAL = 0.1  # or once the oldest of it is this old (seconds)
 
 
 def split_mpmd_args(args):
@@ -167,7 +174,7 @@ def setup_signals():
     for signum in [signal.SIGHUP, signal.SIGINT, signal.SIGQUIT,
                    signal.SIGABRT, signal.SIGALRM, signal.SIGTERM,
                    signal.SIGUSR1,
-                   signal.SIGUSR2, ]:
+                   signal.SIGUSR2, MPIR_ATTACH_SIGNAL, ]:
         signal.signal(signum, signal_handler)
 
     # Ignore SIGTTIN so we don't stop in the background
@@ -193,113 +200,119 @@ def send_rpc(websock, method, reqid=None, **params):
     websock.send(req)
 
 
-def forward_stdin(websock, stdin=sys.stdin):
-    """ Read stdin content and write to application """
+def read_stdin(websock, stdin):
+    """ Send what can be read from stdin without blocking to the application.
+    Returns False once stdin is at EOF. """
     try:
-        while True:
-            try:
-                # Wait for content on stdin
-                content = os.read(stdin.fileno(), 4096)
-
-                # Empty read signifies EOF
-                if not content:
-                    send_rpc(websock, "stdin", eof=True)
-                    break
-
-                # Attempt to decode UTF-8
-                content = content.decode("utf-8")
-                send_rpc(websock, "stdin", content=content, encoding="UTF-8")
-            except OSError:
-                # I/O error, send EOF
-                send_rpc(websock, "stdin", eof=True)
-                break
-            except UnicodeError:
-                # Fall back on base64
-                content = base64.b64encode(content).decode("utf-8")
-                send_rpc(websock, "stdin", content=content, encoding="base64")
-    except websocket.WebSocketException:
-        pass
+        # Wait for content on stdin
+        content = os.read(stdin.fileno(), 4096)
+    except OSError:
+        # I/O error, send EOF
+        content = b""
 
+    # Empty read signifies EOF
+    if not content:
+        send_rpc(websock, "stdin", eof=True)
+        return False
 
-def forward_signals(websock, sig_pipe):
-    """ Forward signals to the application """
     try:
-        while True:
-            # Block until a signal arrives
-            os.read(sig_pipe, 4096)
+        # Attempt to decode UTF-8
+        send_rpc(
+            websock, "stdin", content=content.decode("utf-8"),
+            encoding="UTF-8"
+        )
+    except UnicodeError:
+        # Fall back on base64
+        content = base64.b64encode(content).decode("utf-8")
+        send_rpc(websock, "stdin", content=content, encoding="base64")
+    return True
 
-            # Send it to the app
-            send_rpc(
-                websock, "signal", str(uuid.uuid4()), signum=SIGNAL_RECEIVED
-            )
-    except (OSError, websocket.WebSocketException):
+
+def forward_stdin(websock, stdin=sys.stdin):
+    """ Read stdin content and write to application """
+    while read_stdin(websock, stdin):
         pass
 
 
-def send_pings(websock):
-    """ Avoid connection drops by sending periodic pings """
+def forward_signals(websock, sig_pipe, on_attach=None):
+    """ Forward the signals waiting in the wakeup pipe to the application.
+    MPIR_ATTACH_SIGNAL is for us, it calls `on_attach` instead. """
     try:
-        while True:
-            time.sleep(PING_INTERVAL)
-            echo("Sending keepalive ping", level=LOG_RAW)
-            websock.ping()
-    except websocket.WebSocketException:
-        pass
+        signums = os.read(sig_pipe, 4096)
+    except OSError:
+        return
+    # The wakeup fd gets the number of each signal as a byte
+    for signum in signums:
+        if signum == MPIR_ATTACH_SIGNAL:
+            if on_attach is not None:
+                on_attach()
+            continue
+        send_rpc(websock, "signal", str(uuid.uuid4()), signum=signum)
+
+
+def fill_proctable(apid):
+    """ Fill in the MPIR proctable from the application's procinfo """
+    # Make request to procinfo endpoint
+    resp = request("GET", "apis/pals/v1/apps/" + apid + "/procinfo")
+    procinfo = resp.json()
+    # procinfo is already in the proctable's indexed form: each rank has
+    # an index into the node list, one into the executable list, and a pid
+    nranks = len(procinfo["cmdidxs"])
+    mpir.fill_MPIR_proctable_indexed(
+        procinfo["nodes"], procinfo["placement"][:nranks],
+        procinfo["executables"], procinfo["cmdidxs"],
+        procinfo["pids"][:nranks]
+    )
+    mpir.call_MPIR_Breakpoint()
 
 
-def spawn_threads(websock):
-    """ Spawn threads to handle stdin, signals, and pings """
-    sig_read = setup_signals()
+async def monitor_mpir(apid, attach=None):
+    """ Wait on MPIR variable to fill in proctable. It is checked every
+    MPIR_ATTACH_INTERVAL, and right away when the `attach` event is set
+    (see MPIR_ATTACH_SIGNAL). """
+    # Nothing can attach without the MPIR library, don't keep waking up
+    if not mpir.MPIR_attach_available():
+        return
+    attach = attach or asyncio.Event()
+    # Look for MPIR debug flag
+    while not mpir.get_MPIR_being_debugged():
+        try:
+            await asyncio.wait_for(attach.wait(), MPIR_ATTACH_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        attach.clear()
+    # If proctable is not already filled, use procinfo to fill
+    if not mpir.MPIR_proctable_filled():
+        fill_proctable(apid)
 
-    stdin_thread = threading.Thread(target=forward_stdin, args=(websock,))
-    stdin_thread.daemon = True
-    stdin_thread.start()
 
-    signal_thread = threading.Thread(
-        target=forward_signals, args=(websock, sig_read)
-    )
-    signal_thread.daemon = True
-    signal_thread.start()
-
-    ping_thread = threading.Thread(target=send_pings, args=(websock,))
-    ping_thread.daemon = True
-    ping_thread.start()
-
-
-def monitor_mpir(ctx, apid):
-    """ Wait on MPIR variable to fill in proctable """
-    while True:
-        # Look for MPIR debug flag
-        if mpir.get_MPIR_being_debugged():
-            # If proctable is not already filled, use procinfo to fill
-            if not mpir.MPIR_proctable_filled():
-                # Make request to procinfo endpoint
-                with ctx:
-                    resp = request(
-                        "GET", "apis/pals/v1/apps/" + apid + "/procinfo"
-                    )
-                procinfo = resp.json()
-                # Extract MPIR information
-                proctable_elems = []
-                for rank in range(len(procinfo["cmdidxs"])):
-                    hostname = procinfo["nodes"][procinfo["placement"][rank]]
-                    executable = procinfo["executables"][
-                        procinfo["cmdidxs"][rank]]
-                    pid = procinfo["pids"][rank]
-                    proctable_elems.append((hostname, executable, pid))
-                # Call C library to set C MPIR variables
-                mpir.fill_MPIR_proctable(proctable_elems)
-                mpir.call_MPIR_Breakpoint()
-                # Now that MPIR proctable is set, exit the monitoring thread
-                return
-        time.sleep(MPIR_ATTACH_INTERVAL)
-
-
-def spawn_mpir_thread(ctx, apid):
-    """ Create MPIR watcher thread """
-    mpir_thread = threading.Thread(target=monitor_mpir, args=(ctx, apid))
-    mpir_thread.daemon = True
-    mpir_thread.start()
+class RPCQueue(object):
+    """ RPCs waiting to be sent to the application. `send` can be called from
+    synchronous code, `drain` sends the RPCs over the current connection in
+    order. RPCs not sent when a connection drops go out on the next one. """
+
+    def __init__(self):
+        self._rpcs = collections.deque()
+        self._ready = asyncio.Event()
+
+    def send(self, msg):
+        """ Queue an RPC """
+        self._rpcs.append(msg)
+        self._ready.set()
+
+    async def drain(self, websock):
+        """ Send queued RPCs until cancelled or the connection drops """
+        try:
+            while True:
+                while self._rpcs:
+                    await websock.send(self._rpcs[0])
+                    self._rpcs.popleft()
+                self._ready.clear()
+                await self._ready.wait()
+        except websockets.ConnectionClosed:
+            # The receiving side notices too and reconnects
+            pass
+
 
 
 def get_exit_code(status):
@@ -311,25 +324,99 @@ def get_exit_code(status):
     return 255
 
 
-def print_output(params, a_file, label):
-    """ Print output from a stdout/stderr RPC to the given file """
+def format_output(params, label, prefixes=None):
+    """ Render the content of a stdout/stderr RPC as bytes. `prefixes`
+    caches the rendered label of each host and rank. """
     content = params.get("content")
     if not content:
-        return
+        return b""
 
     encoding = params.get("encoding")
     if encoding == "base64":
         # Decode and output base64 content
-        click.echo(base64.b64decode(content), nl=False, file=a_file)
-    elif label and "host" in params and "rankid" in params:
+        return base64.b64decode(content)
+    if label and "host" in params and "rankid" in params:
         # Label each line if requested and host/rank available
-        host = params["host"]
-        rankid = int(params["rankid"])
-        for line in content.splitlines():
-            click.echo(f"{host} {rankid:d}: {line}", file=a_file)
-    else:
-        # Otherwise, print without processing
-        click.echo(content, nl=False, file=a_file)
+        key = (params["host"], params["rankid"])
+        prefix = prefixes.get(key) if prefixes is not None else None
+        if prefix is None:
+            prefix = f"{params['host']} {int(params['rankid']):d}: "
+            if prefixes is not None:
+                prefixes[key] = prefix
+        lines = content.splitlines()
+        if not lines:
+            return b""
+        return (prefix + ("\n" + prefix).join(lines) + "\n").encode()
+    # Otherwise, print without processing
+    return content.encode()
+
+
+def print_output(params, a_file, label):
+    """ Print output from a stdout/stderr RPC to the given file """
+    data = format_output(params, label)
+    if data:
+        click.echo(data, nl=False, file=a_file)
+
+
+class OutputWriter(object):
+    """ Collects application output for stdout or stderr and writes it to
+    the file descriptor in large chunks, once `flush_bytes` are buffered or
+    the oldest buffered output is `flush_interval` seconds old. """
+
+    def __init__(self, a_file, flush_bytes=OUTPUT_FLUSH_BYTES,
+                 flush_interval=OUTPUT_FLUSH_INTERVAL):
+        self.file = a_file
+        self.flush_bytes = flush_bytes
+        self.flush_interval = flush_interval
+        self.prefixes = {}
+        self._chunks = []
+        self._size = 0
+        self._since = None
+        try:
+            self._fd = a_file.fileno()
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            # Not backed by a file descriptor, e.g. captured by tests
+            self._fd = None
+
+    @property
+    def pending(self):
+        """ Whether there is output waiting to be written """
+        return self._size > 0
+
+    def add(self, params, label):
+        """ Buffer the content of a stdout/stderr RPC """
+        data = format_output(params, label, self.prefixes)
+        if not data:
+            return
+        self._chunks.append(data)
+        self._size += len(data)
+        now = time.monotonic()
+        if self._since is None:
+            self._since = now
+        if self._size >= self.flush_bytes or \
+                now - self._since >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """ Write out everything buffered so far """
+        if not self._chunks:
+            return
+        data = b"".join(self._chunks)
+        self._chunks = []
+        self._size = 0
+        self._since = None
+        if self._fd is None:
+            click.echo(data, nl=False, file=self.file)
+            return
+        # Anything written through the file object has to go out first
+        self.file.flush()
+        view = memoryview(data)
+        while view:
+            try:
+                written = os.write(self._fd, view)
+            except InterruptedError:
+                continue
+            view = view[written:]
 
 
 def log_rank_exit(rankid, host, status):
@@ -397,19 +484,28 @@ def get_resource_limits(limitnames):
     return limits
 
 
-def connect_websock(apid):
-    # pylint: disable=no-member
+async def connect_websock(apid):
     """ Connect to the application websocket """
     try:
         url = make_ws_url(f"apis/pals/v1/apps/{apid}/stdio")
-        headers = get_ws_headers()
-        # TODO: enable SSL verification
-        sslopt = {"cert_reqs": ssl.CERT_NONE}
+        headers = [
+            tuple(header.split(": ", 1)) for header in get_ws_headers()
+        ]
+        sslopt = None
+        if url.startswith("wss:"):
+            # TODO: enable SSL verification
+            sslopt = ssl.create_default_context()
+            sslopt.check_hostname = False
+            sslopt.verify_mode = ssl.CERT_NONE
         echo(f"Connecting to {url}", level=LOG_DEBUG)
-        return websocket.create_connection(
-            url, header=headers, sslopt=sslopt, enable_multithread=True
+        # Pings keep idle connections from being dropped, output isn't
+        # compressed and can be arbitrarily large.
+        return await websockets.connect(
+            url, additional_headers=headers, ssl=sslopt,
+            ping_interval=PING_INTERVAL, ping_timeout=None,
+            compression=None, max_size=None
         )
-    except (websocket.WebSocketException, socket.error) as err:
+    except (websockets.WebSocketException, OSError) as err:
         raise click.ClickException(f"Connection error: {str(err)}")
 
 
@@ -425,6 +521,16 @@ class PALSApp(object):
         self.procinfo_rpcid = str(uuid.uuid4())
         self.complete = False
         self.started = False
+        self.stdin = sys.stdin
+        self.stdout = OutputWriter(sys.stdout)
+        self.stderr = OutputWriter(sys.stderr)
+        self.rpcs = None
+        self._flush_handle = None
+
+    def flush_output(self):
+        """ Write out all buffered application output """
+        self.stdout.flush()
+        self.stderr.flush()
 
     def launch(
             self, launchreq, transfer=False, label=False, procinfo_file=None
@@ -461,8 +567,7 @@ class PALSApp(object):
 
             # Transfer executables
             if transfer:
-                for executable in executables:
-                    self.transfer(executable)
+                self.transfer_all(executables)
 
             return self.run(label, procinfo_file)
         finally:
@@ -478,14 +583,21 @@ class PALSApp(object):
                     # Ignore 404 errors
                     pass
 
-    def transfer(self, executable):
-        """ Transfer a file to application compute nodes """
+    def transfer(self, executable, digest=None):
+        """ Transfer a file to application compute nodes. Returns the
+        number of bytes sent. """
         try:
             mode: int = stat.S_IMODE(os.stat(executable).st_mode)
             params = {
                 "mode": f"0{mode:o}", "name": os.path.basename(executable)
             }
             headers = {"Content-Type": "application/octet-stream"}
+            if digest:
+                # RFC 3230 instance digest, lets the service check (or
+                # dedupe) the upload
+                encoded = base64.b64encode(bytes.fromhex(digest))
+                headers["Digest"] = "sha-256=" + encoded.decode("ascii")
+            # The file object is streamed, never read into memory
             with open(executable, "rb") as a_execfile:
                 resp = request(
                     "POST",
@@ -495,11 +607,48 @@ class PALSApp(object):
                     data=a_execfile, )
                 path = resp.json().get("path")
                 echo(f"Transferred executable to {path}", level=LOG_DEBUG)
+                return a_execfile.tell()
         except (OSError, IOError) as err:
             raise click.ClickException(
                 f"Couldn't transfer binary: {str(err)}"
             )
 
+    def transfer_all(self, executables):
+        """ Transfer binaries to application compute nodes, several at once.
+        Binaries with the same name and contents are only sent once. """
+        uploads = []
+        seen = set()
+        hashed = reused = saved = 0
+        for executable in sorted(executables):
+            try:
+                digest, cached = cache.cached_file_digest(executable)
+                size = os.path.getsize(executable)
+            except (OSError, IOError) as err:
+                raise click.ClickException(
+                    f"Couldn't transfer binary: {str(err)}"
+                )
+            if cached:
+                reused += size
+            else:
+                hashed += size
+            key = (os.path.basename(executable), digest)
+            if key in seen:
+                saved += size
+                continue
+            seen.add(key)
+            uploads.append((executable, digest))
+
+        # Uploads are limited by the network, not the GIL, so send up to
+        # core.concurrency of them at once
+        sent = sum(concurrent_map(lambda args: self.transfer(*args), uploads))
+
+        echo(
+            f"Transferred {len(uploads)} executables ({sent} bytes), "
+            f"{saved} bytes saved, {hashed} bytes hashed, "
+            f"{reused} bytes of hashes reused",
+            level=LOG_DEBUG
+        )
+
     def handle_rpc(self, websock, rpc, label=False, procinfo_file=None):
         """ Handle a received RPC. Return True if complete. """
         # Parse the RPC
@@ -511,14 +660,15 @@ class PALSApp(object):
 
         # Handle stdout notification
         if method == "stdout":
-            print_output(params, sys.stdout, label)
+            self.stdout.add(params, label)
 
         # Handle stderr notification
         elif method == "stderr":
-            print_output(params, sys.stderr, label)
+            self.stderr.add(params, label)
 
         # Handle exit notification
         elif method == "exit":
+            self.flush_output()
             rankid = int(params.get("rankid", -1))
             host = params.get("host", "unknown")
             status = int(params.get("status", 0))
@@ -527,6 +677,7 @@ class PALSApp(object):
 
         # Handle complete notification
         elif method == "complete":
+            self.flush_output()
             self.complete = True
 
         # Handle unknown RPC method
@@ -535,6 +686,7 @@ class PALSApp(object):
 
         # Handle error responses
         elif errmsg:
+            self.flush_output()
             raise click.ClickException(errmsg)
 
         # Handle stream response
@@ -558,51 +710,123 @@ class PALSApp(object):
 
     def run(self, label=False, procinfo_file=None):
         """ Run this application """
+        return asyncio.run(self.run_async(label, procinfo_file))
+
+    def _schedule_flush(self, loop):
+        """ Write out buffered output OUTPUT_FLUSH_INTERVAL from now, unless
+        more output fills the buffers first """
+        if self._flush_handle is None and \
+                (self.stdout.pending or self.stderr.pending):
+            self._flush_handle = loop.call_later(
+                OUTPUT_FLUSH_INTERVAL, self._timed_flush
+            )
 
-        connected = False
-        spawn_mpir_thread(click.get_current_context(), self.apid)
+    def _timed_flush(self):
+        self._flush_handle = None
+        self.flush_output()
 
-        while not self.complete:
-            try:
-                if not connected:
-                    # Connect to stdio websocket endpoint
-                    websock = connect_websock(self.apid)
-                    connected = True
+    async def _forward_file_stdin(self):
+        # Regular files can't be waited on, but reading them never blocks
+        while read_stdin(self.rpcs, self.stdin):
+            await asyncio.sleep(0)
 
-                    # Spawn threads to handle signals, stdin, and pings
-                    spawn_threads(websock)
+    def _start_stdin(self, loop):
+        """ Forward stdin as it becomes readable. Returns a task forwarding
+        it if stdin can't be waited on, otherwise None. """
+        try:
+            fd = self.stdin.fileno()
+        except (AttributeError, OSError, ValueError):
+            send_rpc(self.rpcs, "stdin", eof=True)
+            return None
 
-                    # Send the stream RPC to start things off
-                    send_rpc(websock, "stream", self.stream_rpcid)
+        def on_readable():
+            if not read_stdin(self.rpcs, self.stdin):
+                loop.remove_reader(fd)
 
-                # Read an RPC off the socket
-                rpc = json.loads(websock.recv())
-                echo(f"Received RPC {rpc}", level=LOG_RAW)
+        try:
+            loop.add_reader(fd, on_readable)
+        except PermissionError:
+            return asyncio.ensure_future(self._forward_file_stdin())
+        return None
+
+    async def _stream(self, websock, label, procinfo_file, verbose):
+        """ Handle RPCs from one connection until the application completes
+        or the connection drops """
+        loop = asyncio.get_running_loop()
+        # Send the stream RPC to start things off, ahead of anything queued
+        req = get_rpc("stream", self.stream_rpcid)
+        echo(f"Sending RPC {req}", level=LOG_RAW)
+        await websock.send(req)
+        sender = asyncio.ensure_future(self.rpcs.drain(websock))
+        try:
+            async for message in websock:
+                try:
+                    rpc = json.loads(message)
+                except ValueError as err:
+                    echo(
+                        f"Error decoding application message: {str(err)}",
+                        level=LOG_WARN
+                    )
+                    continue
+                if verbose:
+                    echo(f"Received RPC {rpc}", level=LOG_RAW)
 
                 # Handle the RPC
-                self.handle_rpc(websock, rpc, label, procinfo_file)
-
-            except websocket.WebSocketException as err:
-                echo(
-                    f"Lost application connection ({str(err)}), reconnecting",
-                    level=LOG_WARN, )
-                websock.close()
-                connected = False
-            except socket.error as err:  # pylint: disable=no-member
-                if err.errno != errno.EINTR:
-                    echo(
-                        f"Lost application connection ({str(err)}), reconnecting",
-                        level=LOG_WARN, )
-                    websock.close()
-                    connected = False
-            except ValueError as err:
-                echo(
-                    f"Error decoding application message: {str(err)}",
-                    level=LOG_WARN
-                )
+                self.handle_rpc(self.rpcs, rpc, label, procinfo_file)
+                if self.complete:
+                    return
+                self._schedule_flush(loop)
+            echo("Lost application connection, reconnecting", level=LOG_WARN)
+        except websockets.ConnectionClosed as err:
+            echo(
+                f"Lost application connection ({str(err)}), reconnecting",
+                level=LOG_WARN, )
+        finally:
+            sender.cancel()
+            await websock.close()
+
+    async def run_async(self, label=False, procinfo_file=None):
+        """ Run this application on the running event loop. The websocket,
+        stdin, forwarded signals, output flushes, keepalive pings and the
+        MPIR attach check all share this one thread. """
+        loop = asyncio.get_running_loop()
+        ctx = click.get_current_context()
+        # Rendering every RPC for the log is expensive with a lot of output
+        verbose = (ctx.obj or {}).get("globals", {}).get("verbose", 0) >= \
+            LOG_RAW
+        self.rpcs = RPCQueue()
+
+        attach = asyncio.Event()
+        sig_read = setup_signals()
+        loop.add_reader(
+            sig_read, forward_signals, self.rpcs, sig_read, attach.set
+        )
+        stdin_task = self._start_stdin(loop)
+        mpir_task = asyncio.ensure_future(monitor_mpir(self.apid, attach))
+        try:
+            while not self.complete:
+                websock = await connect_websock(self.apid)
+                await self._stream(websock, label, procinfo_file, verbose)
+        finally:
+            # Don't lose buffered output if the loop is interrupted
+            if self._flush_handle is not None:
+                self._flush_handle.cancel()
+                self._flush_handle = None
+            self.flush_output()
+            for task in (stdin_task, mpir_task):
+                if task is not None:
+                    task.cancel()
+            try:
+                loop.remove_reader(self.stdin.fileno())
+            except (AttributeError, OSError, ValueError):
+                pass
+            loop.remove_reader(sig_read)
+            sig_write = signal.set_wakeup_fd(-1)
+            for fd in (sig_read, sig_write):
+                if fd >= 0:
+                    os.close(fd)
 
         # Clean up after ourselves
-        websock.close()
         mpir.free_MPIR_proctable()
 
         return self.exit_codes
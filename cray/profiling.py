@@ -0,0 +1,188 @@
+#
+#  MIT License
+#
+#  (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a
+#  copy of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom the
+#  Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+#  THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+#  OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+#
+""" Startup profiling.
+
+Setting ``CRAY_PROFILE_STARTUP=1`` (or ``json``) records the wall time of
+each startup phase - importing the CLI and its heavy dependencies, loading
+configuration and credentials, evaluating the service module, loading the
+Swagger tree, the request and formatting the result - and prints a breakdown
+to stderr when the process exits. ``cray debug startup-profile`` runs a
+command this way.
+
+This module is imported before anything else in the package, so it must only
+use the standard library.
+"""
+import atexit
+import functools
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+from cray.constants import PROFILE_STARTUP_ENVVAR
+
+_START = time.perf_counter()
+
+# Third party modules that make up most of our import time.
+HEAVY_IMPORTS = (
+    'boto3',
+    'ruamel.yaml',
+    'requests',
+    'requests_oauthlib',
+    'websockets',
+    'aioconsole',
+)
+FORMATS = ('text', 'json')
+
+# name -> [total seconds, count]
+_phases = {}
+
+
+def _get_format():
+    value = os.environ.get(PROFILE_STARTUP_ENVVAR, '').strip().lower()
+    if value in ('', '0', 'false', 'no', 'off'):
+        return None
+    return 'json' if value == 'json' else 'text'
+
+
+FORMAT = _get_format()
+ENABLED = FORMAT is not None
+
+
+def record(name, elapsed):
+    """ Add elapsed seconds to a phase """
+    found = _phases.setdefault(name, [0.0, 0])
+    found[0] += elapsed
+    found[1] += 1
+
+
+@contextmanager
+def phase(name):
+    """ Time the enclosed block as phase `name` when profiling """
+    if not ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def timed(name):
+    """ Decorator that times each call as phase `name` when profiling.
+    Functions are returned unchanged when profiling is off. """
+
+    def decorator(func):  # pylint: disable=missing-docstring
+        if not ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with phase(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def results():
+    """ Recorded phases, slowest first. Phases are inclusive, so nested
+    phases (e.g. a heavy import during module eval) are counted in both. """
+    phases = [
+        {'name': name, 'ms': round(total * 1000, 3), 'count': count}
+        for name, (total, count) in _phases.items()
+    ]
+    phases.sort(key=lambda p: p['ms'], reverse=True)
+    return {
+        'total_ms': round((time.perf_counter() - _START) * 1000, 3),
+        'phases': phases,
+    }
+
+
+def report(fmt='text'):
+    """ Render the recorded phases """
+    data = results()
+    if fmt == 'json':
+        return json.dumps(data)
+    total = data['total_ms'] or 1
+    width = max([len(p['name']) for p in data['phases']] + [len('total')])
+    lines = [f"{'phase':<{width}}  {'ms':>9}  {'%':>5}  count"]
+    for found in data['phases']:
+        lines.append(
+            f"{found['name']:<{width}}  {found['ms']:>9.1f}  "
+            f"{found['ms'] * 100 / total:>5.1f}  {found['count']:>5}"
+        )
+    lines.append(f"{'total':<{width}}  {data['total_ms']:>9.1f}")
+    return '\n'.join(lines)
+
+
+class _TimedLoader:
+    """ Wraps a module loader to time executing the module """
+
+    def __init__(self, loader, name):
+        self._loader = loader
+        self._name = name
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        with phase(f'import {self._name}'):
+            self._loader.exec_module(module)
+
+    def __getattr__(self, attr):
+        return getattr(self._loader, attr)
+
+
+class _ImportTimer:
+    """ Times the first import of each of HEAVY_IMPORTS, including the
+    modules they import in turn. """
+
+    def find_spec(self, fullname, path, target=None):
+        # pylint: disable=missing-function-docstring
+        if fullname not in HEAVY_IMPORTS:
+            return None
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and \
+                        hasattr(spec.loader, 'exec_module'):
+                    spec.loader = _TimedLoader(spec.loader, fullname)
+                return spec
+        return None
+
+
+def _print_report():
+    sys.stderr.write(report(FORMAT) + '\n')
+    sys.stderr.flush()
+
+
+if ENABLED:
+    sys.meta_path.insert(0, _ImportTimer())
+    atexit.register(_print_report)
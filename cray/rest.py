@@ -24,16 +24,18 @@
 """Functions for making REST Calls. """
 # pylint: disable=fixme
 
+import time
 import warnings
 
-import requests
 import click
 
-from oauthlib.oauth2 import InsecureTransportError
-from oauthlib.oauth2 import InvalidGrantError
 from six.moves import urllib
-from urllib3.exceptions import InsecureRequestWarning
 
+from cray import cache
+from cray import profiling
+from cray import retry
+from cray import timing
+from cray.constants import DEFAULT_HTTP_CACHE_BYTES
 from cray.constants import HEADERS_ORIGIN
 from cray.constants import TENANT_HEADER_NAME_KEY
 from cray.echo import echo
@@ -43,7 +45,20 @@ from cray.errors import BadResponseError
 from cray.errors import InsecureError
 from cray.errors import UnauthorizedError
 from cray.utils import get_hostname
+from cray.utils import get_pool_size
+from cray.utils import get_service
 from cray.utils import get_tenant
+from cray.utils import lazy_import
+
+requests = lazy_import('requests')
+oauth2 = lazy_import('oauthlib.oauth2')
+urllib3_exceptions = lazy_import('urllib3.exceptions')
+
+# Every request in the process goes through one connection pool, so calls to
+# the same host reuse (keep-alive) connections instead of reconnecting.
+_SESSION = None
+_ADAPTER = None
+_ADAPTER_SIZE = None
 
 
 def make_url(route, url=None, default_scheme='https', ctx=None):
@@ -63,15 +78,223 @@ def make_url(route, url=None, default_scheme='https', ctx=None):
     return urllib.parse.urlunsplit((scheme, netloc, path, query, fragment))
 
 
+def get_adapter(pool_size):
+    """ Get the process-wide pooled adapter, keeping up to `pool_size`
+    connections open per host """
+    global _ADAPTER, _ADAPTER_SIZE  # pylint: disable=global-statement
+    if _ADAPTER is None or _ADAPTER_SIZE != pool_size:
+        if _ADAPTER is not None:
+            _ADAPTER.close()
+        _ADAPTER = requests.adapters.HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size
+        )
+        # Note connection setup times for the request log
+        _ADAPTER.poolmanager.pool_classes_by_scheme = timing.pool_classes()
+        _ADAPTER_SIZE = pool_size
+    return _ADAPTER
+
+
+def reset_pool():
+    """ Close every pooled connection and forget failures seen so far """
+    global _SESSION, _ADAPTER, _ADAPTER_SIZE  # pylint: disable=global-statement
+    if _ADAPTER is not None:
+        _ADAPTER.close()
+    _SESSION = _ADAPTER = _ADAPTER_SIZE = None
+    retry.reset_breakers()
+
+
+def mount_pool(session, ctx=None):
+    """ Route a session's requests through the process-wide pool """
+    adapter = get_adapter(get_pool_size(ctx))
+    for prefix in ('https://', 'http://'):
+        if session.adapters.get(prefix) is not adapter:
+            session.mount(prefix, adapter)
+    return session
+
+
+def get_session(ctx=None):
+    """ Get the process-wide session used for unauthenticated requests """
+    global _SESSION  # pylint: disable=global-statement
+    if _SESSION is None:
+        _SESSION = requests.Session()
+    return mount_pool(_SESSION, ctx)
+
+
+def pool_stats():
+    """ Connections opened, and requests made, through the pool so far """
+    opened = made = 0
+    if _ADAPTER is not None:
+        pools = _ADAPTER.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                opened += pool.num_connections
+                made += pool.num_requests
+    return {'opened': opened, 'reused': max(0, made - opened)}
+
+
+def _log_pool_stats(ctx):
+    stats = pool_stats()
+    echo(
+        f"POOL: {stats['opened']} connections opened, "
+        f"{stats['reused']} reused",
+        ctx=ctx, level=LOG_RAW
+    )
+
+
 def _default_cb(response):
     """ Default callback in case the user doesn't pass one"""
     return response
 
 
+def _replayable(opts):
+    """ Whether the request body can be sent more than once """
+    return not opts.get('files') and not hasattr(opts.get('data'), 'read')
+
+
+def _send(requester, method, url, opts, ctx):
+    """ Send a request as the retry policy allows and log its timing """
+    timing.start()
+    started = time.perf_counter()
+    sent = {}
+    response = error = None
+    try:
+        response = retry.send(
+            method, url,
+            lambda: requester.request(method, url, **opts),
+            ctx, replayable=_replayable(opts), sent=sent
+        )
+        return response
+    except Exception as err:
+        error = err
+        raise
+    finally:
+        timing.log(
+            ctx, method, url, started, response=response,
+            retries=sent.get('retries', 0), error=error,
+            streamed=opts.get('stream', False)
+        )
+
+
+def get_requester(ctx):
+    """ Get the session to send requests with, authenticated if we have
+    credentials """
+    requester = None
+    auth = ctx.obj['auth']
+    if auth:
+        requester = auth.session
+    if requester is None:
+        requester = get_session(ctx)
+    return requester
+
+
+def get_cache_ttl(ctx, url):
+    """ Seconds a GET response may be answered from the response cache:
+    `--cache-ttl`, else `cache.services.<service>`, else `cache.ttl`.
+    0, the default, turns the cache off. """
+    ttl = ctx.obj.get('globals', {}).get('cache_ttl')
+    if ttl is None:
+        config = ctx.obj['config']
+        ttl = config.get(f'cache.services.{get_service(url)}')
+        if ttl is None:
+            ttl = config.get('cache.ttl', 0)
+    try:
+        return max(0, float(ttl))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _cache_entry(response):
+    return {
+        'stored': time.time(),
+        'status': response.status_code,
+        'reason': response.reason,
+        'headers': dict(response.headers),
+        'encoding': response.encoding,
+        'content': response.content,
+    }
+
+
+def _from_cache(entry, url):
+    response = requests.models.Response()
+    response.status_code = entry['status']
+    response.reason = entry['reason']
+    response.headers = requests.structures.CaseInsensitiveDict(
+        entry['headers']
+    )
+    response.encoding = entry['encoding']
+    response._content = entry['content']  # pylint: disable=protected-access
+    response.url = url
+    return response
+
+
+def _validators(entry):
+    """ Conditional request headers that let the server answer 304 if our
+    copy is still current """
+    headers = {}
+    found = requests.structures.CaseInsensitiveDict(entry['headers'])
+    if found.get('ETag'):
+        headers['If-None-Match'] = found['ETag']
+    if found.get('Last-Modified'):
+        headers['If-Modified-Since'] = found['Last-Modified']
+    return headers
+
+
+def _cacheable(response):
+    return response.status_code == 200 and 'no-store' not in \
+        response.headers.get('Cache-Control', '').lower()
+
+
+def _cached_send(method, url, opts, ctx):
+    """ Answer GETs from the response cache while their entry is fresh,
+    revalidate stale entries with the server, and send the rest """
+    path = entry = None
+    ttl = 0
+    if method.upper() == 'GET' and not opts.get('stream'):
+        ttl = get_cache_ttl(ctx, url)
+        if ttl:
+            path = cache.http_cache_path(
+                get_tenant(ctx=ctx), url, opts.get('params')
+            )
+            entry = cache.load(path)
+    if entry is not None:
+        if time.time() - entry['stored'] < ttl:
+            echo(f'CACHE: hit for {url}', ctx=ctx, level=LOG_DEBUG)
+            cache.touch(path)
+            return _from_cache(entry, url)
+        validators = _validators(entry)
+        if validators:
+            opts = dict(opts, headers=dict(
+                opts.get(HEADERS_ORIGIN) or {}, **validators
+            ))
+    response = _send(get_requester(ctx), method, url, opts, ctx)
+    if path is None:
+        return response
+    if response.status_code == 304 and entry is not None:
+        echo(f'CACHE: {url} not modified', ctx=ctx, level=LOG_DEBUG)
+        entry['stored'] = time.time()
+        entry['headers'].update(
+            (k, v) for k, v in response.headers.items()
+            if k.lower() in ('etag', 'last-modified', 'cache-control')
+        )
+        response = _from_cache(entry, url)
+    elif not _cacheable(response):
+        return response
+    else:
+        entry = _cache_entry(response)
+    max_bytes = ctx.obj['config'].get('cache.max_bytes',
+                                      DEFAULT_HTTP_CACHE_BYTES)
+    if len(entry['content']) <= max_bytes:
+        cache.save(path, entry)
+        cache.evict(cache.HTTP_CACHE_NAME, max_bytes)
+    return response
+
+
 def _log_request_error(err, ctx):
     echo(f'ERROR: {err}', ctx=ctx, level=LOG_RAW)
 
 
+@profiling.timed('request')
 def request(method, route, callback=None, **kwargs):
     """ This is our REST caller. Will call endpoint and return response """
     # pylint: disable=unused-argument
@@ -79,15 +302,11 @@ def request(method, route, callback=None, **kwargs):
     if callback is None:
         callback = _default_cb
     ctx = click.get_current_context()
-    requester = requests
-    session = None
-    auth = ctx.obj['auth']
-    if auth:
-        session = auth.session
-        if session:
-            requester = session
     # TODO Get Real Certs
     kwargs.setdefault('verify', False)
+    if ctx.obj.get('globals', {}).get('format') == 'raw':
+        # The body is copied to stdout as it arrives, don't read it all first
+        kwargs.setdefault('stream', True)
 
     opts = {k: v for k, v in kwargs.items() if v is not None}
 
@@ -100,16 +319,19 @@ def request(method, route, callback=None, **kwargs):
         echo(f'OPTIONS: {opts}', ctx=ctx, level=LOG_RAW)
         # TODO: Find solution for this.
         with warnings.catch_warnings():
-            warnings.filterwarnings("ignore", category=InsecureRequestWarning)
-            response = requester.request(method, url, **opts)
+            warnings.filterwarnings(
+                "ignore", category=urllib3_exceptions.InsecureRequestWarning
+            )
+            response = _cached_send(method, url, opts, ctx)
+            _log_pool_stats(ctx)
             if not response.ok:
                 _log_request_error(response.text, ctx)
                 raise BadResponseError(response, ctx=ctx)
-    except InsecureTransportError as err:
+    except oauth2.InsecureTransportError as err:
         # pragma: NO COVER
         _log_request_error(err, ctx) # pylint: disable=raise-missing-from
         raise InsecureError(ctx=ctx)
-    except InvalidGrantError as err:
+    except oauth2.InvalidGrantError as err:
         # pragma: NO COVER
         _log_request_error(err, ctx) # pylint: disable=raise-missing-from
         raise UnauthorizedError(ctx=ctx)
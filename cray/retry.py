@@ -0,0 +1,259 @@
+#
+#  MIT License
+#
+#  (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a
+#  copy of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom the
+#  Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+#  THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+#  OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+#
+""" Retry and circuit breaker policy for REST calls (`retry.*` config). """
+import email.utils
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import click
+
+from cray.constants import DEFAULT_BREAKER_RESET
+from cray.constants import DEFAULT_BREAKER_THRESHOLD
+from cray.constants import DEFAULT_RETRY_ATTEMPTS
+from cray.constants import DEFAULT_RETRY_BACKOFF
+from cray.constants import DEFAULT_RETRY_MAX_BACKOFF
+from cray.echo import echo
+from cray.echo import LOG_DEBUG
+from cray.errors import CircuitOpenError
+from cray.utils import lazy_import
+
+requests = lazy_import('requests')
+
+# Methods that can be sent again without changing the result
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')
+# Responses that mean the server may answer if asked again later
+RETRY_STATUSES = (429, 502, 503, 504)
+
+_BREAKERS = {}
+_BREAKERS_LOCK = threading.Lock()
+
+
+def _setting(ctx, name, default, convert):
+    """ Get `retry.<name>` from the command's own config section, falling
+    back to the [retry] section and then to `default` """
+    config = ctx.obj['config']
+    key = f'retry.{name}'
+    value = None
+    if hasattr(config, 'get_from_ctx'):
+        value = config.get_from_ctx(ctx, key)
+    if value is None:
+        value = config.get(key)
+    try:
+        return default if value is None else convert(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _methods(value):
+    if isinstance(value, str):
+        value = value.split(',')
+    return tuple(m.strip().upper() for m in value)
+
+
+def retry_after(response):
+    """ Seconds the server asked us to wait through a `Retry-After` header,
+    given either as a number of seconds or as an HTTP date """
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+class RetryPolicy(object):
+    """ How often, and how long apart, a failed request is sent again """
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, attempts=DEFAULT_RETRY_ATTEMPTS,
+                 backoff=DEFAULT_RETRY_BACKOFF,
+                 max_backoff=DEFAULT_RETRY_MAX_BACKOFF,
+                 methods=IDEMPOTENT_METHODS,
+                 breaker_threshold=DEFAULT_BREAKER_THRESHOLD,
+                 breaker_reset=DEFAULT_BREAKER_RESET):
+        self.attempts = max(1, attempts)
+        self.backoff = max(0.0, backoff)
+        self.max_backoff = max(0.0, max_backoff)
+        self.methods = methods
+        self.breaker_threshold = max(0, breaker_threshold)
+        self.breaker_reset = max(0.0, breaker_reset)
+
+    @classmethod
+    def from_ctx(cls, ctx=None):
+        """ The policy of the current command, from its config and the
+        `--retries` global option. Resolved once per command. """
+        ctx = ctx or click.get_current_context()
+        key = ('retry_policy', id(ctx))
+        policy = ctx.meta.get(key)
+        if policy is None:
+            attempts = ctx.obj.get('globals', {}).get('retries')
+            if attempts is None:
+                attempts = _setting(
+                    ctx, 'attempts', DEFAULT_RETRY_ATTEMPTS, int
+                )
+            policy = cls(
+                attempts=attempts,
+                backoff=_setting(
+                    ctx, 'backoff', DEFAULT_RETRY_BACKOFF, float
+                ),
+                max_backoff=_setting(
+                    ctx, 'max_backoff', DEFAULT_RETRY_MAX_BACKOFF, float
+                ),
+                methods=_setting(
+                    ctx, 'methods', IDEMPOTENT_METHODS, _methods
+                ),
+                breaker_threshold=_setting(
+                    ctx, 'breaker_threshold', DEFAULT_BREAKER_THRESHOLD, int
+                ),
+                breaker_reset=_setting(
+                    ctx, 'breaker_reset', DEFAULT_BREAKER_RESET, float
+                ),
+            )
+            ctx.meta[key] = policy
+        return policy
+
+    def attempts_for(self, method):
+        """ How many times a request with this method may be sent """
+        return self.attempts if method.upper() in self.methods else 1
+
+    def delay(self, attempt, response=None):
+        """ Seconds to wait before sending attempt `attempt + 1`. The server's
+        `Retry-After` wins, otherwise exponential backoff with full jitter """
+        wait = retry_after(response) if response is not None else None
+        if wait is None:
+            wait = random.uniform(0, self.backoff * 2 ** (attempt - 1))
+        return min(wait, self.max_backoff)
+
+
+class CircuitBreaker(object):
+    """ Stops sending requests to a host after `threshold` failures in a
+    row, until `reset` seconds have passed. Then one request is let through
+    and its outcome decides whether the host is used again. """
+
+    def __init__(self, threshold, reset):
+        self.threshold = threshold
+        self.reset = reset
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def check(self):
+        """ Seconds until requests may be sent again, 0 if they may now """
+        with self._lock:
+            if self.opened_at is None:
+                return 0
+            now = time.monotonic()
+            wait = self.opened_at + self.reset - now
+            if wait > 0:
+                return wait
+            # Let this request probe the host, hold back the rest until it
+            # is answered.
+            self.opened_at = now
+            return 0
+
+    def record(self, ok):
+        """ Count the outcome of a request """
+        with self._lock:
+            if ok:
+                self.failures = 0
+                self.opened_at = None
+                return
+            self.failures += 1
+            if self.threshold and self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+
+def get_breaker(url, policy):
+    """ The circuit breaker of the host of `url` """
+    host = urlsplit(url).netloc
+    with _BREAKERS_LOCK:
+        breaker = _BREAKERS.get(host)
+        if breaker is None:
+            breaker = _BREAKERS[host] = CircuitBreaker(
+                policy.breaker_threshold, policy.breaker_reset
+            )
+        breaker.threshold = policy.breaker_threshold
+        breaker.reset = policy.breaker_reset
+    return breaker
+
+
+def reset_breakers():
+    """ Forget every host's failures """
+    with _BREAKERS_LOCK:
+        _BREAKERS.clear()
+
+
+def _failed(response):
+    return response.status_code in RETRY_STATUSES or \
+        response.status_code >= 500
+
+
+# pylint: disable=too-many-arguments
+def send(method, url, do_request, ctx, replayable=True, sent=None):
+    """ Call `do_request` until it gets an answer worth returning, as the
+    current command's RetryPolicy allows. Connection errors and timeouts
+    are raised once the attempts are used up, responses are returned.
+    The number of retries made is kept in `sent['retries']`. """
+    policy = RetryPolicy.from_ctx(ctx)
+    breaker = get_breaker(url, policy)
+    attempts = policy.attempts_for(method) if replayable else 1
+    attempt = 0
+    while True:
+        attempt += 1
+        if sent is not None:
+            sent['retries'] = attempt - 1
+        wait = breaker.check()
+        if wait:
+            raise CircuitOpenError(urlsplit(url).netloc, wait, ctx=ctx)
+        try:
+            response = do_request()
+        except (requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout) as err:
+            breaker.record(False)
+            if attempt >= attempts:
+                raise
+            delay = policy.delay(attempt)
+            reason = err
+        else:
+            breaker.record(not _failed(response))
+            if response.status_code not in RETRY_STATUSES or \
+                    attempt >= attempts:
+                return response
+            delay = policy.delay(attempt, response)
+            reason = f'{response.status_code} {response.reason}'
+            response.close()
+        echo(
+            f'RETRY: {method} to {url} in {delay:.2f}s '
+            f'(attempt {attempt + 1} of {attempts}): {reason}',
+            ctx=ctx, level=LOG_DEBUG
+        )
+        time.sleep(delay)
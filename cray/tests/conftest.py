@@ -37,6 +37,7 @@ from cray.constants import CONFIG_ENVVAR
 from cray.constants import CONFIG_DIR_ENVVAR
 from cray import cli
 from cray import generator
+from cray import retry
 from cray.config import initialize_dirs
 
 from cray.tests.utils import new_username
@@ -46,6 +47,28 @@ from cray.tests.utils import new_tenant
 from cray.tests.utils import create_config_file
 
 
+# Timing tests are noisy on shared machines, they only run when asked for
+BENCHMARK_ENVVAR = 'CRAY_BENCHMARKS'
+
+
+def pytest_configure(config):
+    """ Register the benchmark marker """
+    config.addinivalue_line(
+        'markers', f'benchmark: timing test, run with {BENCHMARK_ENVVAR}=1'
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    """ Skip benchmarks unless they were asked for """
+    # pylint: disable=unused-argument
+    if os.environ.get(BENCHMARK_ENVVAR, '0') == '1':
+        return
+    skip = pytest.mark.skip(reason=f'set {BENCHMARK_ENVVAR}=1 to run')
+    for item in items:
+        if 'benchmark' in item.keywords:
+            item.add_marker(skip)
+
+
 @pytest.fixture()
 def pets():
     """Fixture to add pets swagger generated commands"""
@@ -89,6 +112,8 @@ def cli_runner(request):
 
     # Reload the cli module so we are truly starting over each for each test.
     reload(cli)
+    # Failures seen by earlier tests shouldn't trip the circuit breakers
+    retry.reset_breakers()
 
     params = getattr(request, 'param', {})
     is_init = params.get('is_init')
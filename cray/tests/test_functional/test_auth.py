@@ -22,6 +22,7 @@
 #  OTHER DEALINGS IN THE SOFTWARE.
 #
 """ Test the main CLI command (`cray`) and options. """
+import json
 
 
 # pylint: disable=unused-argument
@@ -51,3 +52,22 @@ def test_cray_auth_success(cli_runner, rest_mock):
     print(result.output)
     assert result.exit_code == 2
     assert 'Invalid Credentials' in result.output
+
+
+def test_cray_auth_stats(cli_runner, tmpdir):
+    """ Test `cray auth stats` reports the counters of the given token """
+    runner, cli, _ = cli_runner
+    token = tmpdir.join('token')
+    token.write('{"access_token": "foo"}')
+    tmpdir.join('token.stats').write('{"refreshed": 2, "avoided": 3}')
+    result = runner.invoke(
+        cli, ['auth', 'stats', '--token', str(token), '--format', 'json']
+    )
+    print(result.output)
+    assert result.exit_code == 0
+    assert json.loads(result.output) == {
+        'token': str(token),
+        'refreshed': 2,
+        'refreshed_ahead': 0,
+        'avoided': 3
+    }
@@ -78,3 +78,37 @@ def test_cray_deprecated_upper(cli_runner, pets):
     outputs = ["(DEPRECATED)"]
     for txt in outputs:
         assert txt in result.output
+
+
+def test_cray_query(cli_runner, rest_mock):
+    """ Test `--query` narrows the output """
+
+    runner, cli, _ = cli_runner
+    result = runner.invoke(
+        cli, ['cfs', 'v3', 'components', 'list', '--query', 'method']
+    )
+    assert result.exit_code == 0
+    assert result.output == '"GET"\n'
+
+
+def test_cray_fields(cli_runner, rest_mock):
+    """ Test `--fields` narrows the output """
+
+    runner, cli, _ = cli_runner
+    result = runner.invoke(
+        cli, ['cfs', 'v3', 'components', 'list', '--fields', 'method',
+              '--format', 'json-compact']
+    )
+    assert result.exit_code == 0
+    assert result.output == '{"method":"GET"}\n'
+
+
+def test_cray_query_invalid(cli_runner, rest_mock):
+    """ Test an invalid `--query` is rejected before any request is made """
+
+    runner, cli, _ = cli_runner
+    result = runner.invoke(
+        cli, ['cfs', 'v3', 'components', 'list', '--query', 'foo[?']
+    )
+    assert result.exit_code == 2
+    assert "Invalid value for '--query'" in result.output
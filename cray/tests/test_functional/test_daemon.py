@@ -0,0 +1,165 @@
+#
+#  MIT License
+#
+#  (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a
+#  copy of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom the
+#  Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+#  THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+#  OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+#
+""" Test handing commands to the local CLI daemon. """
+# pylint: disable=redefined-outer-name
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+import cray
+from cray import daemon
+from cray.constants import ACTIVE_CONFIG
+from cray.constants import CONFIG_DIR_ENVVAR
+from cray.constants import CONFIG_DIR_NAME
+from cray.constants import DAEMON_ENVVAR
+from cray.constants import NAME
+
+ROOT = os.path.dirname(os.path.dirname(cray.__file__))
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(daemon.socket, 'send_fds'), reason='needs socket.send_fds'
+)
+
+
+def _cray(env, *args, **kwargs):
+    return subprocess.run(
+        [sys.executable, '-m', NAME] + list(args), env=env, check=False,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, **kwargs
+    )
+
+
+@pytest.fixture()
+def env(tmp_path, monkeypatch):
+    """ Environment with a configuration in a temp dir """
+    config_dir = tmp_path / '.config' / NAME
+    (config_dir / CONFIG_DIR_NAME).mkdir(parents=True)
+    (config_dir / CONFIG_DIR_NAME / 'default').write_text(
+        '[core]\nhostname = "https://api.example.com"\n'
+    )
+    (config_dir / ACTIVE_CONFIG).write_text('default')
+    monkeypatch.setenv(CONFIG_DIR_ENVVAR, str(tmp_path))
+    environ = dict(os.environ)
+    environ['PYTHONPATH'] = ROOT
+    environ.pop(DAEMON_ENVVAR, None)
+    return environ
+
+
+@pytest.fixture()
+def running(env):
+    """ A daemon serving the temp configuration """
+    proc = subprocess.Popen(  # pylint: disable=consider-using-with
+        [sys.executable, '-m', NAME, 'daemon', 'start', '--foreground'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 30
+    while daemon.request({'type': 'status'}, timeout=5) is None:
+        assert proc.poll() is None and time.monotonic() < deadline
+        time.sleep(0.05)
+    yield proc
+    daemon.request({'type': 'stop'}, timeout=30)
+    proc.wait(timeout=30)
+
+
+def _served():
+    return daemon.request({'type': 'status'}, timeout=5)['served']
+
+
+def test_daemon_runs_commands(env, running):
+    """ Commands run in the daemon match running them locally """
+    local = _cray(dict(env, **{DAEMON_ENVVAR: '0'}), 'config', 'list')
+    remote = _cray(env, 'config', 'list')
+    assert _served() == 1
+    assert remote.returncode == local.returncode == 0
+    assert remote.stdout == local.stdout
+
+    failed = _cray(env, 'config', 'get', 'no.such.key')
+    assert failed.returncode == 2
+    assert 'Unable to find property' in failed.stderr
+    assert _served() == 2
+
+
+def test_daemon_sees_config_changes(env, running):
+    """ Changing the configuration is picked up by the next command """
+    assert _cray(env, 'config', 'set', 'core', 'tenant=blue').returncode == 0
+    found = _cray(env, 'config', 'get', 'core.tenant')
+    assert found.stdout.strip() == 'blue'
+    assert _served() == 2
+
+
+def test_daemon_local_commands_and_fallback(env, running):
+    """ Local-only commands and a stopped daemon run in the caller """
+    assert _cray(env, 'daemon', 'status').returncode == 0
+    assert _served() == 0
+    daemon.request({'type': 'stop'}, timeout=30)
+    running.wait(timeout=30)
+    assert not os.path.exists(daemon.socket_path())
+    assert _cray(env, 'config', 'list').returncode == 0
+
+
+def test_daemon_missing_cwd_falls_back(env, running, monkeypatch):
+    """ A command the daemon can't take on runs in the caller, and the
+    daemon keeps serving """
+    with monkeypatch.context() as patch:
+        patch.setattr(os, 'getcwd', lambda: '/no/such/directory')
+        assert daemon.forward(['config', 'list']) is None
+    assert running.poll() is None
+    assert _served() == 0
+    assert _cray(env, 'config', 'list').returncode == 0
+    assert _served() == 1
+
+
+def test_daemon_interrupted_command(env, running, tmp_path):
+    """ Interrupting the client stops its command in the daemon, which
+    keeps serving """
+    with socket.socket() as server:
+        # Takes the command's request and never answers it.
+        server.bind(('127.0.0.1', 0))
+        server.listen(8)
+        server.settimeout(30)
+        port = server.getsockname()[1]
+        (tmp_path / '.config' / NAME / CONFIG_DIR_NAME / 'default').write_text(
+            f'[core]\nhostname = "http://127.0.0.1:{port}"\n'
+        )
+        client = subprocess.Popen(  # pylint: disable=consider-using-with
+            [sys.executable, '-m', NAME, 'cfs', 'v3', 'components', 'list'],
+            env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            text=True
+        )
+        conn, _ = server.accept()
+        client.send_signal(signal.SIGINT)
+        _, stderr = client.communicate(timeout=daemon.CANCEL_TIMEOUT + 5)
+        conn.close()
+        assert client.returncode == 130
+        assert 'Aborted!' in stderr
+        status = daemon.request({'type': 'status'}, timeout=5)
+        assert not status['busy']
+        assert status['served'] == 1
+    assert running.poll() is None
+    assert _cray(env, 'config', 'list').returncode == 0
+    assert _served() == 2
@@ -26,6 +26,9 @@
 # pylint: disable=invalid-name
 
 import pytest
+import requests_mock as req_mock
+
+from cray import retry
 
 
 @pytest.fixture
@@ -69,3 +72,27 @@ def test_cray_http_error(cli_runner):
         "You've configured your cray hostname with http. Please " + "reconfigure for https."]
     for out in outputs:
         assert out in result.output
+
+
+def test_cray_retries_option(cli_runner, requests_mock, monkeypatch):
+    """ Test --retries overrides how often a failed request is sent """
+    monkeypatch.setattr(retry.time, 'sleep', lambda _: None)
+    requests_mock.register_uri('GET', req_mock.ANY, status_code=503)
+    runner, cli, _ = cli_runner
+    result = runner.invoke(cli, ['bss', 'hosts', 'list', '--retries', '2'])
+    print(result.output)
+    assert result.exit_code == 2
+    assert '503' in result.output
+    assert requests_mock.call_count == 2
+
+
+def test_cray_cache_ttl_option(cli_runner, requests_mock):
+    """ Test --cache-ttl answers a repeated GET from the response cache """
+    requests_mock.register_uri('GET', req_mock.ANY, json=[])
+    runner, cli, _ = cli_runner
+    for _ in range(2):
+        result = runner.invoke(
+            cli, ['bss', 'hosts', 'list', '--cache-ttl', '60']
+        )
+        assert result.exit_code == 0
+    assert requests_mock.call_count == 1
@@ -0,0 +1,159 @@
+#
+#  MIT License
+#
+#  (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a
+#  copy of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom the
+#  Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+#  THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+#  OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+#
+""" Startup cost regression checks.
+
+Each case runs the CLI in a fresh interpreter and checks how many modules it
+loaded, that heavy dependencies it doesn't need stayed unloaded, and how long
+importing `cray.cli` took. If a change trips one of these budgets, find the
+new import with `CRAY_PROFILE_STARTUP=1` or `python -X importtime` and defer
+it with `cray.utils.lazy_import` rather than raising the budget.
+"""
+# pylint: disable=redefined-outer-name
+import json
+import os
+import subprocess
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+import cray
+from cray.constants import ACTIVE_CONFIG
+from cray.constants import CONFIG_DIR_ENVVAR
+from cray.constants import CONFIG_DIR_NAME
+from cray.constants import NAME
+
+ROOT = os.path.dirname(os.path.dirname(cray.__file__))
+HSM_SWAGGER = os.path.join(
+    os.path.dirname(cray.__file__), 'modules', 'hsm', 'swagger3_v2.json'
+)
+
+# Only checked by the opt-in benchmark, see conftest.BENCHMARK_ENVVAR
+IMPORT_SECONDS = 0.5
+HEAVY = ('boto3', 'requests_oauthlib', 'ruamel.yaml', 'websockets',
+         'aioconsole')
+BUDGETS = {
+    # case: (args, max modules, modules that must not be loaded)
+    'help': (['--help'], 350, HEAVY + ('requests',)),
+    'config': (['config', 'list'], 220, HEAVY + ('requests', 'cray.pals')),
+    'hsm_get': (['hsm', 'service', 'ready', 'list'], 500,
+                HEAVY + ('cray.pals',)),
+}
+# `cray --help` evaluates every module, HSM included.
+NEEDS_HSM = ('help', 'hsm_get')
+
+_RUNNER = '''
+import json, sys, time
+start = time.perf_counter()
+from cray.cli import cli
+imported = time.perf_counter() - start
+code = 0
+try:
+    cli.main(sys.argv[2:], prog_name='cray')
+except SystemExit as err:
+    code = err.code
+with open(sys.argv[1], 'w', encoding='utf-8') as stats:
+    json.dump({'exit_code': code, 'import_seconds': imported,
+               'modules': sorted(sys.modules)}, stats)
+'''
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):  # pylint: disable=invalid-name,missing-function-docstring
+        body = json.dumps({'code': 0, 'message': 'ready'}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+@pytest.fixture()
+def server():
+    """ Local HTTP server standing in for the API gateway """
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{httpd.server_address[1]}'
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture()
+def config_home(tmp_path, server):
+    """ Configuration pointing at the local server, without credentials """
+    config_dir = tmp_path / '.config' / NAME
+    (config_dir / CONFIG_DIR_NAME).mkdir(parents=True)
+    (config_dir / CONFIG_DIR_NAME / 'default').write_text(
+        f'[core]\nhostname = "{server}"\n'
+    )
+    (config_dir / ACTIVE_CONFIG).write_text('default')
+    return tmp_path
+
+
+def _run(config_home, args):
+    stats_path = config_home / 'stats.json'
+    env = dict(os.environ)
+    env.update({
+        CONFIG_DIR_ENVVAR: str(config_home),
+        'PYTHONPATH': ROOT,
+    })
+    env.pop('CRAY_PROFILE_STARTUP', None)
+    subprocess.run(
+        [sys.executable, '-c', _RUNNER, str(stats_path)] + args,
+        env=env, cwd=str(config_home), check=True,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    with open(stats_path, encoding='utf-8') as stats:
+        return json.load(stats)
+
+
+def _run_case(config_home, case):
+    args = BUDGETS[case][0]
+    if case in NEEDS_HSM and not os.path.isfile(HSM_SWAGGER):
+        pytest.skip('HSM Swagger file has not been converted')
+    stats = _run(config_home, args)
+    assert stats['exit_code'] == 0
+    return stats
+
+
+@pytest.mark.parametrize('case', sorted(BUDGETS))
+def test_startup_budget(config_home, case):
+    """ Commands stay within their module budgets """
+    _, max_modules, unloaded = BUDGETS[case]
+    loaded = set(_run_case(config_home, case)['modules'])
+    assert not loaded & set(unloaded)
+    assert len(loaded) <= max_modules
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize('case', sorted(BUDGETS))
+def test_startup_import_time(config_home, case):
+    """ Importing the CLI stays within its time budget """
+    assert _run_case(config_home, case)['import_seconds'] <= IMPORT_SECONDS
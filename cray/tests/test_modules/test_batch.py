@@ -0,0 +1,112 @@
+#
+#  MIT License
+#
+#  (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a
+#  copy of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom the
+#  Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+#  THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+#  OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+#
+""" Tests for running many commands with `cray batch` """
+# pylint: disable=unused-argument
+# pylint: disable=invalid-name
+
+import json
+
+import pytest
+
+COMMANDS = '''\
+# Component states
+cray cfs components describe x1
+cfs components describe x2
+
+config get no.such.property
+cfs components describe "x3
+daemon status
+'''
+
+
+def _records(output):
+    return [json.loads(line) for line in output.splitlines()]
+
+
+@pytest.mark.parametrize('concurrency', ['1', '4'])
+def test_cray_batch(cli_runner, rest_mock, concurrency):
+    """ Each command gets one NDJSON record, in input order """
+    runner, cli, opts = cli_runner
+    hostname = opts['default']['hostname']
+    result = runner.invoke(
+        cli, ['batch', '-j', concurrency], input=COMMANDS
+    )
+    assert result.exit_code == 1
+    records = _records(result.output)
+    assert [r['line'] for r in records] == [2, 3, 5, 6, 7]
+    assert [r['exit_code'] for r in records] == [0, 0, 2, 2, 2]
+    for record, xname in zip(records, ['x1', 'x2']):
+        assert record['result']['method'] == 'GET'
+        assert record['result']['url'] == \
+            f'{hostname}/apis/cfs/v2/components/{xname}'
+    assert records[2]['error'] == 'Unable to find property.'
+    assert 'Unable to parse' in records[3]['error']
+    assert "can't be run in a batch" in records[4]['error']
+
+
+def test_cray_batch_fail_fast(cli_runner, rest_mock, tmp_path):
+    """ --fail-fast stops at the first failing command """
+    runner, cli, _ = cli_runner
+    path = tmp_path / 'commands.txt'
+    path.write_text(
+        'config get no.such.property\ncfs components describe x1\n'
+    )
+    result = runner.invoke(cli, ['batch', '--file', str(path), '--fail-fast'])
+    assert result.exit_code == 1
+    assert [r['line'] for r in _records(result.output)] == [1]
+
+
+def test_cray_batch_success(cli_runner, rest_mock):
+    """ A batch where every command succeeds exits 0 """
+    runner, cli, _ = cli_runner
+    result = runner.invoke(cli, ['batch'], input='config list\n')
+    assert result.exit_code == 0
+    record, = _records(result.output)
+    assert record['exit_code'] == 0
+    assert record['result']['configurations']
+
+
+@pytest.mark.parametrize('concurrency', ['1', '2'])
+def test_cray_batch_all_pages(cli_runner, requests_mock, concurrency):
+    """ --all-pages lines fetch every page while their command runs """
+    runner, cli, opts = cli_runner
+    url = f"{opts['default']['hostname']}/apis/cfs/v3/components"
+
+    def page(request, context):
+        if 'after_id' in request.qs:
+            return {'components': [{'id': 'x2'}], 'next': None}
+        return {'components': [{'id': 'x1'}],
+                'next': {'limit': 1, 'after_id': 'x1'}}
+
+    requests_mock.get(url, json=page)
+    result = runner.invoke(
+        cli, ['batch', '-j', concurrency],
+        input='cfs v3 components list --all-pages\n' * 2
+    )
+    assert result.exit_code == 0, result.output
+    records = _records(result.output)
+    assert len(records) == 2
+    for record in records:
+        assert record['exit_code'] == 0
+        assert sorted(item['id'] for item in record['result']) == ['x1', 'x2']
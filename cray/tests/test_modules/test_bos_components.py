@@ -222,3 +222,49 @@ def test_cray_bos_v2_components_updatemany_by_session(cli_runner, rest_mock):
     verify_commands_equal(runner, cli, data,
                           [common_command_prefix + command_args
                            for command_args in command_arguments_list[1:]])
+
+
+def test_cray_bos_v2_components_list_all_pages(cli_runner, requests_mock):
+    """ Test cray bos v2 components list --all-pages follows start_after_id """
+    runner, cli, config = cli_runner
+    url = bos_url(config, ver='v2', uri='/components')
+    requests_mock.get(url, [
+        {'json': [{'id': 'x1'}, {'id': 'x2'}]},
+        {'json': [{'id': 'x3'}]},
+        {'json': []},
+    ])
+    result = runner.invoke(
+        cli, ['bos', 'v2', 'components', 'list', '--page-size', '2',
+              '--all-pages']
+    )
+    assert result.exit_code == 0
+    assert json.loads(result.output) == [{'id': 'x1'}, {'id': 'x2'},
+                                         {'id': 'x3'}]
+    first, second, third = requests_mock.request_history
+    assert first.qs == {'page_size': ['2']}
+    assert second.qs == {'page_size': ['2'], 'start_after_id': ['x2']}
+    assert third.qs == {'page_size': ['2'], 'start_after_id': ['x3']}
+
+
+def test_cray_bos_v2_components_list_all_pages_capped(cli_runner,
+                                                      requests_mock):
+    """ Test --all-pages keeps going when the server caps the page size """
+    runner, cli, config = cli_runner
+    url = bos_url(config, ver='v2', uri='/components')
+    components = [{'id': f'x{i}'} for i in range(5)]
+
+    def page(request, context):
+        # Return at most 2 components, whatever page_size asked for
+        after = request.qs.get('start_after_id', [None])[0]
+        ids = [c['id'] for c in components]
+        start = ids.index(after) + 1 if after else 0
+        return components[start:start + 2]
+
+    requests_mock.get(url, json=page)
+    result = runner.invoke(
+        cli, ['bos', 'v2', 'components', 'list', '--page-size', '10',
+              '--all-pages']
+    )
+    assert result.exit_code == 0
+    assert json.loads(result.output) == components
+    assert requests_mock.call_count == 4
@@ -356,3 +356,62 @@ def test_cray_cfs_v2_components_updatemany_by_config_name_filter(cli_runner, res
     verify_commands_equal(runner, cli, data,
                           [common_command_prefix + command_args
                            for command_args in command_arguments_list[1:]])
+
+
+def test_cray_cfs_v3_components_list_all_pages(cli_runner, requests_mock):
+    """ Test cray cfs v3 components list --all-pages follows the cursor """
+    runner, cli, config = cli_runner
+    url = cfs_url(config, uri='/components')
+    requests_mock.get(url, [
+        {'json': {'components': [{'id': 'x1'}, {'id': 'x2'}],
+                  'next': {'limit': 2, 'after_id': 'x2'}}},
+        {'json': {'components': [{'id': 'x3'}], 'next': None}},
+    ])
+    result = runner.invoke(
+        cli, ['cfs', 'v3', 'components', 'list', '--status', 'configured',
+              '--all-pages']
+    )
+    assert result.exit_code == 0
+    assert json.loads(result.output) == [{'id': 'x1'}, {'id': 'x2'},
+                                         {'id': 'x3'}]
+    first, second = requests_mock.request_history
+    assert 'after_id' not in first.qs
+    assert second.qs == {'status': ['configured'], 'limit': ['2'],
+                         'after_id': ['x2']}
+
+
+def test_cray_cfs_v3_components_list_all_pages_query(cli_runner,
+                                                     requests_mock):
+    """ Test --query sees the items of every page as one list """
+    runner, cli, config = cli_runner
+    url = cfs_url(config, uri='/components')
+    pages = [
+        {'json': {'components': [{'id': 'x1', 'enabled': True},
+                                 {'id': 'x2', 'enabled': False}],
+                  'next': {'limit': 2, 'after_id': 'x2'}}},
+        {'json': {'components': [{'id': 'x3', 'enabled': True}],
+                  'next': None}},
+    ]
+    requests_mock.get(url, pages)
+    result = runner.invoke(
+        cli, ['cfs', 'v3', 'components', 'list', '--all-pages',
+              '--query', '[?enabled].id']
+    )
+    assert result.exit_code == 0
+    assert json.loads(result.output) == ['x1', 'x3']
+
+    requests_mock.get(url, pages)
+    result = runner.invoke(
+        cli, ['cfs', 'v3', 'components', 'list', '--all-pages',
+              '--query', 'length(@)']
+    )
+    assert result.exit_code == 0
+    assert json.loads(result.output) == 3
+
+
+def test_cray_cfs_v2_components_list_no_all_pages(cli_runner, rest_mock):
+    """ Test --all-pages is only offered where the API can page """
+    runner, cli, _ = cli_runner
+    result = runner.invoke(cli, ['cfs', 'v2', 'components', 'list', '--help'])
+    assert result.exit_code == 0
+    assert '--all-pages' not in result.output
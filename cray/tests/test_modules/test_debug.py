@@ -0,0 +1,75 @@
+#
+#  MIT License
+#
+#  (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a
+#  copy of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom the
+#  Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+#  THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+#  OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+#
+""" Test the hidden debug commands. """
+# pylint: disable=unused-argument
+# pylint: disable=invalid-name
+
+import json
+import os
+
+import cray
+
+
+def test_cray_debug_startup_profile(cli_runner, monkeypatch):
+    """ Profile a command in a new process """
+    runner, cli, _ = cli_runner
+    root = os.path.dirname(os.path.dirname(cray.__file__))
+    monkeypatch.setenv('PYTHONPATH', root)
+    result = runner.invoke(
+        cli,
+        ['debug', 'startup-profile', '--profile-format', 'json',
+         'config', 'list', '--quiet']
+    )
+    assert result.exit_code == 0
+    profile = json.loads(result.output.strip().splitlines()[-1])
+    phases = {p['name'] for p in profile['phases']}
+    assert {'import cray.cli', 'module eval config', 'config load',
+            'token load', 'format result'} <= phases
+    assert profile['total_ms'] > 0
+
+
+def test_cray_debug_stats(cli_runner, rest_mock):
+    """ Requests are logged and summarized per service and endpoint """
+    runner, cli, _ = cli_runner
+    for _ in range(3):
+        result = runner.invoke(cli, ['bss', 'hosts', 'list'])
+        assert result.exit_code == 0
+    result = runner.invoke(cli, ['debug', 'stats', '--format', 'json'])
+    print(result.output)
+    assert result.exit_code == 0
+    data = json.loads(result.output)
+    assert data['requests'] == 3
+    assert os.path.isfile(data['log'])
+    endpoint, = data['endpoints']
+    assert endpoint['service'] == 'bss'
+    assert endpoint['endpoint'].endswith('bss.hosts.list')
+    assert endpoint['count'] == 3
+    assert endpoint['errors'] == 0
+    assert endpoint['p50_ms'] <= endpoint['p95_ms'] <= endpoint['p99_ms']
+    with open(data['log'], encoding='utf-8') as log:
+        record = json.loads(log.readline())
+    assert record['method'] == 'GET'
+    assert record['status'] == 200
+    assert record['retries'] == 0
+    assert record['bytes_in'] > 0
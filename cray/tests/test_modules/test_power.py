@@ -27,18 +27,23 @@
 # pylint: disable=too-many-lines
 
 import json
+from urllib.parse import parse_qsl
+from urllib.parse import urlsplit
 
+import click
+import requests_mock as req_mock
+
+from cray.modules.power.cli import add_parents
+from cray.modules.power.cli import chunk_params
+from cray.modules.power.cli import component_index
+from cray.modules.power.cli import component_valid
 from cray.modules.power.cli import get_chassis
 from cray.modules.power.cli import get_module
 from cray.modules.power.cli import is_Chassis
 from cray.modules.power.cli import is_Module
 from cray.modules.power.cli import is_Node
-# from cray.modules.power.cli import component_valid
 from cray.modules.power.cli import xname_array
-
-
-# import click
-# from cray.core import pass_context
+from cray.tests.test_modules.conftest import _x1000c0_request_cb
 
 
 ##############################################################################
@@ -204,27 +209,53 @@ def test_get_chassis():
     assert output == ""
 
 
-#####
-# Following tests fail because there is no click context. Figure out how to
-# get a click context and re-enable them.
-#####
-# def test_component_valid(rest_mock):
-#     """ Test to make sure we have a valid xname """
-#     xname = 'x1000c0'
-#     output = component_valid(xname)
-#     assert output
+def _parents_context(requests_mock):
+    """ Click context for calling the power helpers outside of a command """
+    requests_mock.get(
+        'https://api-gw-service-nmn.local/apis/smd/hsm/v2/State/Components',
+        text=_x1000c0_request_cb
+    )
+    config = {'core.hostname': 'https://api-gw-service-nmn.local'}
+    return click.Context(
+        click.Command('power'),
+        obj={'config': config, 'globals': {}, 'auth': None}
+    )
+
+
+def test_component_valid(requests_mock):
+    """ Test to make sure we have a valid xname """
+    with _parents_context(requests_mock):
+        index = component_index()
+    assert component_valid(chassis_str, index)
+    assert component_valid(cmodule, index)
+    assert not component_valid('x1000c1', index)
+
+
+def test_add_parents(requests_mock):
+    """ Test generating parent xnames """
+    with _parents_context(requests_mock):
+        output = add_parents([n])
+        assert output == [n, cmodule, chassis_str]
+
+        output = add_parents([cmodule])
+        assert output == [cmodule, chassis_str]
+
+        output = add_parents([chassis_str])
+        assert output == [chassis_str]
+    # Chassis have no parents to check, so only two fetches were needed
+    assert requests_mock.call_count == 2
+
+
+def test_add_parents_request_count(requests_mock):
+    """ Test the parent lookup costs one request regardless of input size """
+    xnames = xname_array(('x1000c[0-7]s[0-7]b[0-1]n[0-1]',))
+    for size in (1, 16, len(xnames)):
+        with _parents_context(requests_mock):
+            before = requests_mock.call_count
+            output = add_parents(xnames[:size])
+        assert requests_mock.call_count - before == 1
+        assert output[:size] == xnames[:size]
 
-# def test_add_parents():
-#     """ Test generating parent xnames """
-#
-#     output = add_parents([n])
-#     assert output == [n, cmodule, chassis_str]
-#
-#     output = add_parents([cmodule])
-#     assert output == [cmodule, chassis_str]
-#
-#     output = add_parents([chassis_str])
-#     assert output == [chassis_str]
 
 power_url_base = '/power-control/v1'
 
@@ -581,6 +612,31 @@ def test_transition_children_chassis(
             assert data['body']['operation'] == op
 
 
+def test_transition_children_multi(
+        cli_runner,
+        rest_mock,
+        pcs_rest_mock
+):
+    """ Test children of several targets are looked up and merged in order """
+    runner, cli, _ = cli_runner
+    result = runner.invoke(
+        cli, ['config', 'set', 'core', 'concurrency=4']
+    )
+    assert result.exit_code == 0
+    result = runner.invoke(
+        cli, ['power', 'transition', 'on',
+              '--xnames', 'x1000c0s0,x1000c0',
+              '--include', 'children']
+    )
+    print(result.output)
+    assert result.exit_code == 0
+    data = json.loads(result.output)
+    xarr = [loc['xname'] for loc in data['body']['location']]
+    assert len(xarr) == 49
+    assert xarr == sorted(xarr)
+    assert 'x1000c0s0b1n1' in xarr and 'x1000c0r7' in xarr
+
+
 def test_transition_both_slot(
         cli_runner,
         rest_mock,
@@ -864,6 +920,44 @@ def test_status_list_hostlist_multi(cli_runner, rest_mock):
     assert params == 'xname=x1000c0&xname=x1000c1&xname=x1000c6&xname=x1000c7'
 
 
+def test_chunk_params():
+    """ Test xnames are split into URL-safe chunks """
+    params = [('powerStateFilter', 'on')]
+    xarr = [f'x1000c0s{s}b0n{n}' for s in range(8) for n in range(2)]
+    chunks = chunk_params(params, xarr, limit=120)
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert chunk[0] == params[0]
+        assert len(chunk) > 1
+        assert len('&'.join(f'{k}={v}' for k, v in chunk)) <= 120
+    assert [v for chunk in chunks for k, v in chunk if k == 'xname'] == xarr
+    assert chunk_params(params, []) == [params]
+
+
+def test_status_list_chunked(cli_runner, requests_mock):
+    """ Test `cray power status list` splits large xname sets """
+    def status_cb(request, context):
+        xnames = [v for k, v in parse_qsl(urlsplit(request.url).query)
+                  if k == 'xname']
+        assert len(request.url) < 5000
+        return {'status': [{'xname': x, 'powerState': 'on'} for x in xnames]}
+
+    requests_mock.register_uri(
+        req_mock.GET, req_mock.ANY, json=status_cb
+    )
+    runner, cli, _ = cli_runner
+    result = runner.invoke(
+        cli, ['power', 'status', 'list',
+              '--xnames', 'x[1000-1015]c[0-7]s[0-7]b[0-1]n[0-1]']
+    )
+    assert result.exit_code == 0
+    assert requests_mock.call_count > 1
+    data = json.loads(result.output)
+    xnames = [s['xname'] for s in data['status']]
+    assert len(xnames) == 16 * 8 * 8 * 2 * 2
+    assert xnames == sorted(xnames)
+
+
 def test_status_describe_missing_xname(cli_runner, rest_mock):
     """ Test `cray power status describe` """
     runner, cli, _ = cli_runner
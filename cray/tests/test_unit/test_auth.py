@@ -26,6 +26,9 @@
 # pylint: disable=protected-access
 import json
 import os
+import threading
+import time
+
 import click
 
 from cray import auth
@@ -175,3 +178,85 @@ def test_auth_existing(cli_runner):
     result = runner.invoke(cli, ['test'])
     print(result.output)
     assert result.exit_code == 0
+
+
+def _write_token(auth_obj, **fields):
+    token = dict(get_token(), **fields)
+    with open(auth_obj._token_path, 'w', encoding='utf-8') as token_file:
+        json.dump(token, token_file)
+    return token
+
+
+def test_auth_refresh_single_flight(cli_runner):
+    """ Test concurrent refreshes of one token only reach Keycloak once """
+    runner, cli, opts = cli_runner
+    username = opts['default']['username']
+    hostname = opts['default']['hostname']
+    fetches = []
+
+    def fetch():
+        fetches.append(1)
+        time.sleep(0.2)
+        return dict(get_token(), access_token=f'new-{len(fetches)}',
+                    expires_at=time.time() + 300)
+
+    @cli.command('test')
+    @click.pass_context
+    def cli_obj(ctx):
+        """ Sub cli """
+        first = auth.AuthUsername(username, hostname, ctx=ctx)
+        # Far enough from expiry that loading it doesn't refresh it ahead
+        _write_token(first, expires_at=time.time() + 3000)
+        auths = [auth.AuthUsername(username, hostname, ctx=ctx)
+                 for _ in range(6)]
+        for auth_obj in auths:
+            auth_obj.load()
+        results = {}
+
+        def refresh(i, auth_obj):
+            results[i] = auth_obj.refresh(auth_obj.session, fetch)
+
+        threads = [threading.Thread(target=refresh, args=(i, auth_obj))
+                   for i, auth_obj in enumerate(auths)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(fetches) == 1
+        assert {r['access_token'] for r in results.values()} == {'new-1'}
+        assert first.stats() == {'refreshed': 1, 'refreshed_ahead': 0,
+                                 'avoided': 5}
+        assert first.load()['access_token'] == 'new-1'
+
+    result = runner.invoke(cli, ['test'])
+    print(result.output)
+    assert result.exit_code == 0
+
+
+def test_auth_refresh_ahead(cli_runner, requests_mock):
+    """ Test a token about to expire is refreshed before it is used """
+    runner, cli, opts = cli_runner
+    username = opts['default']['username']
+    hostname = opts['default']['hostname']
+    new_token = dict(get_token(), access_token='refreshed',
+                     expires_at=time.time() + 300)
+
+    @cli.command('test')
+    @click.pass_context
+    def cli_obj(ctx):
+        """ Sub cli """
+        auth_obj = auth.AuthUsername(username, hostname, ctx=ctx)
+        requests_mock.post(auth_obj.url, json=new_token)
+        _write_token(auth_obj, expires_at=time.time() + 20)
+        auth_obj.load()
+        assert auth_obj.session.token['access_token'] == 'refreshed'
+        assert auth_obj.load()['access_token'] == 'refreshed'
+        assert auth_obj.stats()['refreshed_ahead'] == 1
+        # A fresh token is left alone
+        auth_obj.load()
+        assert auth_obj.session.token['access_token'] == 'refreshed'
+        assert requests_mock.call_count == 1
+
+    result = runner.invoke(cli, ['test'])
+    print(result.output)
+    assert result.exit_code == 0
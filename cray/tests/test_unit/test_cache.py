@@ -0,0 +1,171 @@
+#
+#  MIT License
+#
+#  (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a
+#  copy of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom the
+#  Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+#  THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+#  OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+#
+""" Test the on-disk swagger parse cache. """
+# pylint: disable=invalid-name,redefined-outer-name,unused-argument
+import os
+import time
+
+import pytest
+
+from cray import cache
+from cray import generator
+from cray import swagger
+from cray.constants import CONFIG_DIR_ENVVAR
+from cray.constants import SWAGGER_CACHE_ENVVAR
+
+SWAGGER_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), 'files', 'swagger3.json'
+)
+
+
+@pytest.fixture()
+def config_dir(tmp_path, monkeypatch):
+    """ Point the CLI configuration (and so the cache) at a temp dir """
+    monkeypatch.setenv(CONFIG_DIR_ENVVAR, str(tmp_path))
+    monkeypatch.delenv(SWAGGER_CACHE_ENVVAR, raising=False)
+    return tmp_path
+
+
+def test_cache_swagger_parse_is_reused(config_dir, monkeypatch):
+    """ A warm cache returns the parsed tree without parsing again """
+    first = generator._get_data(SWAGGER_FILE)
+    path = cache.swagger_cache_path(SWAGGER_FILE)
+    assert os.path.isfile(path)
+
+    def _fail(*args, **kwargs):
+        raise AssertionError('swagger file was parsed again')
+
+    monkeypatch.setattr(swagger, 'Swagger', _fail)
+    assert generator._get_data(SWAGGER_FILE) == first
+
+
+def test_cache_swagger_key_includes_options(config_dir):
+    """ Different swagger options must not share a cache entry """
+    plain = cache.swagger_cache_path(SWAGGER_FILE)
+    vocab = cache.swagger_cache_path(
+        SWAGGER_FILE, {'vocabulary': {'put': 'replace'}}
+    )
+    assert plain != vocab
+
+
+def test_cache_swagger_key_includes_contents(config_dir, tmp_path):
+    """ Changing the swagger file invalidates the cache entry """
+    copy = tmp_path / 'swagger3.json'
+    with open(SWAGGER_FILE, encoding='utf-8') as src:
+        copy.write_text(src.read())
+    before = cache.swagger_cache_path(str(copy))
+    copy.write_text(copy.read_text().replace('Petstore', 'Pet store'))
+    assert cache.swagger_cache_path(str(copy)) != before
+
+
+def test_cache_swagger_disabled(config_dir, monkeypatch):
+    """ CRAY_SWAGGER_CACHE=0 turns the cache off """
+    monkeypatch.setenv(SWAGGER_CACHE_ENVVAR, '0')
+    assert cache.swagger_cache_path(SWAGGER_FILE) is None
+    assert generator._get_data(SWAGGER_FILE)['endpoints']
+
+
+def test_cache_corrupt_entry_is_a_miss(config_dir):
+    """ A damaged cache file is ignored and rewritten """
+    path = cache.swagger_cache_path(SWAGGER_FILE)
+    with open(path, 'wb') as corrupt:
+        corrupt.write(b'not a pickle')
+    assert generator._get_data(SWAGGER_FILE)['endpoints']
+    assert cache.load(path)['endpoints']
+
+
+def test_cache_file_digest_reused(config_dir, tmp_path, monkeypatch):
+    """ File digests are reused until the file changes """
+    binary = tmp_path / 'a.out'
+    binary.write_bytes(b'\x7fELF' * 1024)
+    digest, cached = cache.cached_file_digest(str(binary))
+    assert not cached
+    assert digest == cache.file_digest(str(binary))
+
+    def _fail(path):
+        raise AssertionError('file was hashed again')
+
+    monkeypatch.setattr(cache, 'file_digest', _fail)
+    assert cache.cached_file_digest(str(binary)) == (digest, True)
+
+    monkeypatch.undo()
+    binary.write_bytes(b'\x7fELF' * 2048)
+    changed, cached = cache.cached_file_digest(str(binary))
+    assert not cached
+    assert changed != digest
+
+
+def test_cache_swagger_stale_entries_pruned(config_dir, tmp_path):
+    """ Parsing a changed swagger file drops the entry it replaces, but not
+    those of other files or options """
+    module = tmp_path / 'petstore'
+    module.mkdir()
+    copy = module / 'swagger3.json'
+    with open(SWAGGER_FILE, encoding='utf-8') as src:
+        copy.write_text(src.read())
+    generator._get_data(str(copy))
+    generator._get_data(SWAGGER_FILE)
+    old = cache.swagger_cache_path(str(copy))
+    other = cache.swagger_cache_path(SWAGGER_FILE)
+    assert os.path.isfile(old) and os.path.isfile(other)
+
+    copy.write_text(copy.read_text().replace('Petstore', 'Pet store'))
+    generator._get_data(str(copy))
+    assert not os.path.exists(old)
+    assert os.path.isfile(cache.swagger_cache_path(str(copy)))
+    assert os.path.isfile(other)
+
+
+def test_cache_swagger_key_skips_package_metadata(config_dir, monkeypatch):
+    """ Working out the key doesn't read the installed package's metadata,
+    which can take as long as the parse the cache saves """
+    # pylint: disable=import-outside-toplevel
+    import importlib.metadata
+
+    def _fail(*args, **kwargs):
+        raise AssertionError('package metadata was read')
+
+    monkeypatch.setattr(importlib.metadata, 'version', _fail)
+    monkeypatch.setattr(importlib.metadata, 'distribution', _fail)
+    assert cache.swagger_cache_path(SWAGGER_FILE)
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize('module', ['bos', 'cfs'])
+def test_cache_swagger_hit_benchmark(config_dir, module):
+    """ Time a cache hit, key included, against parsing the swagger file """
+    path = os.path.join(
+        os.path.dirname(generator.__file__), 'modules', module,
+        'swagger3.json'
+    )
+    start = time.perf_counter()
+    parsed = generator._parse_file(path, {})
+    parse = time.perf_counter() - start
+    cache.save(cache.swagger_cache_path(path, {}), parsed)
+
+    start = time.perf_counter()
+    assert cache.load(cache.swagger_cache_path(path, {})) == parsed
+    hit = time.perf_counter() - start
+    print(f'{module}: parse {parse * 1e3:.1f}ms, cache hit {hit * 1e3:.1f}ms')
+
@@ -0,0 +1,85 @@
+#
+#  MIT License
+#
+#  (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a
+#  copy of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom the
+#  Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+#  THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+#  OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+#
+""" Test the build-time generated Swagger modules. """
+# pylint: disable=invalid-name,redefined-outer-name,unused-argument
+import os
+import shutil
+
+import pytest
+
+from cray import codegen
+from cray import generator
+from cray import swagger
+from cray.constants import SWAGGER_CACHE_ENVVAR
+
+SWAGGER_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), 'files', 'swagger3.json'
+)
+OPTIONS = [{}, {'vocabulary': {'put': 'replace'}}]
+
+
+@pytest.fixture()
+def swagger_copy(tmp_path, monkeypatch):
+    """ A Swagger file outside the package with a generated module """
+    monkeypatch.setenv(SWAGGER_CACHE_ENVVAR, '0')
+    path = str(tmp_path / 'swagger3.json')
+    shutil.copy(SWAGGER_FILE, path)
+    codegen.write_module(path, OPTIONS)
+    return path
+
+
+def test_codegen_generated_module_is_used(swagger_copy, monkeypatch):
+    """ generate() reads the pre-parsed tree instead of parsing """
+    expected = generator._parse_file(swagger_copy, OPTIONS[1])
+
+    def _fail(*args, **kwargs):
+        raise AssertionError('swagger file was parsed')
+
+    monkeypatch.setattr(swagger, 'Swagger', _fail)
+    assert generator._get_data(swagger_copy, OPTIONS[1]) == expected
+    assert codegen.load(swagger_copy, OPTIONS[0]) is not None
+
+
+def test_codegen_unknown_options_fall_back(swagger_copy):
+    """ Options that weren't generated aren't served from the module """
+    assert codegen.load(swagger_copy, {'vocabulary': {'get': 'fetch'}}) is None
+
+
+def test_codegen_check_detects_drift(swagger_copy):
+    """ Editing the Swagger file makes the generated module stale """
+    assert not codegen.check_module(swagger_copy, OPTIONS)
+    with open(swagger_copy, encoding='utf-8') as src:
+        data = src.read()
+    with open(swagger_copy, 'w', encoding='utf-8') as dst:
+        dst.write(data.replace('Petstore', 'Pet store'))
+    assert codegen.check_module(swagger_copy, OPTIONS)
+    assert codegen.load(swagger_copy) is None
+
+
+def test_codegen_missing_module(tmp_path):
+    """ A Swagger file without a generated module is reported """
+    path = str(tmp_path / 'swagger3.json')
+    shutil.copy(SWAGGER_FILE, path)
+    assert codegen.load(path) is None
+    assert codegen.check_module(path, OPTIONS)
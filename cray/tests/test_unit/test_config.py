@@ -0,0 +1,150 @@
+#
+#  MIT License
+#
+#  (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a
+#  copy of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom the
+#  Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+#  THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+#  OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+#
+""" Test the configuration lookups. """
+# pylint: disable=invalid-name
+import time
+
+import click
+import pytest
+import toml
+
+from cray import config as config_module
+from cray import core
+from cray.cli import cli
+from cray.config import Config
+from cray.config import initialize_dirs
+
+
+def _config(tmp_path, data):
+    initialize_dirs(str(tmp_path))
+    path = tmp_path / 'configurations' / 'default'
+    path.write_text(toml.dumps(data))
+    return Config(str(tmp_path), 'default')
+
+
+def test_config_get(tmp_path):
+    """ Test deep gets through the flat index """
+    config = _config(tmp_path, {'core': {'hostname': 'https://api'},
+                                'auth': {'login': {'username': 'me'}}})
+    assert config.get('core.hostname') == 'https://api'
+    assert config.get('auth.login') == {'username': 'me'}
+    assert config.get('auth.login.username.more', 'none') == 'none'
+    assert config.get('nope', 'default') == 'default'
+
+
+def test_config_get_after_change(tmp_path):
+    """ Test the index follows changes made through the config """
+    config = _config(tmp_path, {'core': {'hostname': 'https://api'}})
+    assert config.get('auth.login.username') is None
+    config.set_deep('auth.login.username', 'me')
+    assert config.get('auth.login.username') == 'me'
+    config['core'] = {'hostname': 'https://other'}
+    assert config.get('core.hostname') == 'https://other'
+    config.update({'extra': {'key': 1}})
+    assert config.get('extra.key') == 1
+    del config['extra']
+    assert config.get('extra.key') is None
+
+
+def _command_context(config, path):
+    """ Contexts for a generated command, as click would create them """
+    ctx = click.Context(
+        cli, info_name='cray', obj={'globals': {}, 'config': config}
+    )
+    command = cli
+    for name in path:
+        command = command.get_command(ctx, name)
+        ctx = click.Context(command, info_name=name, parent=ctx)
+    return ctx
+
+
+def test_config_get_from_ctx(tmp_path, monkeypatch):
+    """ Test option defaults come from the command's config section """
+    config = _config(tmp_path, {
+        'core': {'format': 'json'},
+        'cfs': {'v3': {'components': {'list': {'limit': 5}}}},
+    })
+    ctx = _command_context(config, ['cfs', 'v3', 'components', 'list'])
+    walks = []
+    original = config_module._get_cmd_call
+    monkeypatch.setattr(
+        config_module, '_get_cmd_call',
+        lambda *args: walks.append(args) or original(*args)
+    )
+    assert config.get_from_ctx(ctx, 'limit') == 5
+    assert config.get_from_ctx(ctx, 'format') == 'json'
+    assert config.get_from_ctx(ctx, 'after_id', 'x') == 'x'
+    # The command path is only worked out once per context
+    assert len([args for args in walks if len(args) == 1]) == 1
+
+
+def _defaults_context(tmp_path):
+    config = _config(tmp_path, {
+        'core': {'hostname': 'https://api', 'format': 'json'},
+        'cfs': {'v3': {'components': {'list': {'limit': 5}}}},
+        'filler': {f'section{i}': {f'key{j}': j for j in range(20)}
+                   for i in range(50)},
+    })
+    ctx = _command_context(config, ['cfs', 'v3', 'components', 'list'])
+    options = [p for p in ctx.command.params if isinstance(p, core.Option)]
+    assert len(options) > 10
+    return ctx, options
+
+
+def test_config_get_default_uses_index(tmp_path, monkeypatch):
+    """ Resolving every option default reuses one flat index and one walk
+    of the command path """
+    ctx, options = _defaults_context(tmp_path)
+    flattened = []
+    walks = []
+    flatten = config_module._flatten
+    get_cmd_call = config_module._get_cmd_call
+    monkeypatch.setattr(
+        config_module, '_flatten',
+        lambda data, *args: flattened.append(args) or flatten(data, *args)
+    )
+    monkeypatch.setattr(
+        config_module, '_get_cmd_call',
+        lambda *args: walks.append(args) or get_cmd_call(*args)
+    )
+    for _ in range(3):
+        defaults = {opt.name: opt.get_default(ctx) for opt in options}
+    assert defaults['limit'] == 5
+    # _flatten recurses, top level calls have no prefix
+    assert len([args for args in flattened if not args]) == 1
+    assert len([args for args in walks if len(args) == 1]) == 1
+
+
+@pytest.mark.benchmark
+def test_config_get_default_benchmark(tmp_path):
+    """ Microbenchmark resolving the defaults of a generated command """
+    ctx, options = _defaults_context(tmp_path)
+    rounds = 200
+    start = time.perf_counter()
+    for _ in range(rounds):
+        defaults = {opt.name: opt.get_default(ctx) for opt in options}
+    elapsed = time.perf_counter() - start
+    print(f'get_default: {elapsed / (rounds * len(options)) * 1e6:.2f}us '
+          'per option')
+    assert defaults['limit'] == 5
@@ -23,12 +23,15 @@
 #
 """ Test the main CLI command (`cray`) and options. """
 # pylint: disable=invalid-name
+import io
 import json
 import click
 import pytest
+import requests
 import toml
 
 from cray import formatting
+from cray import paging
 
 
 def test_formatting_format_results():
@@ -69,3 +72,163 @@ def test_formatting_format_results_raises():
     d1 = {'foo': {'bar': {'oh': temp}}}
     with pytest.raises(click.ClickException):
         formatting.format_result(d1, 'json')
+
+
+@pytest.mark.parametrize(
+    'format_type', ['json', 'json-compact', 'ndjson', 'yaml', 'toml']
+)
+def test_formatting_stream_result(capsys, format_type):
+    """ Test streamed pages read back the same as the formatted list """
+    pages = [[{'id': 'x1', 'on': True}, {'id': 'x2'}], [], [{'id': 'x3'}]]
+    formatting.stream_result(pages, format_type)
+    out = capsys.readouterr().out
+    items = [item for page in pages for item in page]
+    assert out == formatting.format_result(items, format_type) + '\n'
+
+
+@pytest.mark.parametrize('format_type', ['json', 'yaml'])
+def test_formatting_stream_result_empty(capsys, format_type):
+    """ Test streaming no items still writes an empty list """
+    formatting.stream_result([[]], format_type)
+    out = capsys.readouterr().out
+    assert out == formatting.format_result([], format_type) + '\n'
+
+
+@pytest.mark.parametrize('format_type', ['json', 'yaml', 'toml'])
+def test_formatting_write_result(capsys, format_type):
+    """ Test written results match the formatted string """
+    d1 = {'foo': [{'bar': i, 'oh': 'no' * i} for i in range(300)]}
+    formatting.write_result(d1, format_type)
+    out = capsys.readouterr().out
+    assert out == formatting.format_result(d1, format_type) + '\n'
+
+
+def test_formatting_write_result_chunks(monkeypatch):
+    """ Test large results are written in pieces """
+    writes = []
+    monkeypatch.setattr(
+        formatting.click, 'echo', lambda data, nl=True: writes.append(data)
+    )
+    d1 = [{'id': f'x{i}'} for i in range(20000)]
+    formatting.write_result(d1, 'json')
+    assert len(writes) > 1
+    assert max(len(w) for w in writes) < 2 * formatting.CHUNK_SIZE
+    assert json.loads(''.join(writes)) == d1
+
+
+def test_formatting_write_result_raw(capsysbinary):
+    """ Test the raw format copies the response body through unchanged """
+    body = b'{"Components":[{"ID":"x1000c0"}]}'
+    response = requests.Response()
+    response.status_code = 200
+    response.raw = io.BytesIO(body)
+    formatting.write_result(response, 'raw')
+    assert capsysbinary.readouterr().out == body
+
+
+def test_formatting_write_result_raw_data(capsys):
+    """ Test the raw format falls back to JSON for other results """
+    d1 = {'foo': 'bar'}
+    formatting.write_result(d1, 'raw')
+    assert capsys.readouterr().out == json.dumps(d1, indent=2) + '\n'
+
+
+def test_formatting_format_results_json_compact():
+    """ Test compact JSON has no whitespace """
+    d1 = {'foo': [{'bar': 1}, {'oh': 'no'}]}
+    result = formatting.format_result(d1, 'json-compact')
+    assert result == '{"foo":[{"bar":1},{"oh":"no"}]}'
+
+
+@pytest.mark.parametrize('data', [
+    [{'ID': 'x1'}, {'ID': 'x2'}],
+    {'Components': [{'ID': 'x1'}, {'ID': 'x2'}]},
+    {'status': [{'ID': 'x1'}, {'ID': 'x2'}], 'other': 1},
+])
+def test_formatting_format_results_ndjson(data):
+    """ Test NDJSON writes one line per record of a collection """
+    result = formatting.format_result(data, 'ndjson')
+    assert result == '{"ID":"x1"}\n{"ID":"x2"}'
+
+
+def test_formatting_format_results_ndjson_object():
+    """ Test NDJSON writes other objects as a single record """
+    d1 = {'foo': {'bar': [1, 2]}}
+    assert formatting.format_result(d1, 'ndjson') == '{"foo":{"bar":[1,2]}}'
+
+
+@pytest.mark.parametrize('query, expected', [
+    ('Components[0].ID', '"x1"\n'),
+    ('length(Components)', '2\n'),
+    ("Components[?ID=='x9'].ID | [0]", 'null\n'),
+])
+def test_formatting_write_result_ndjson_query_scalar(capsys, query, expected):
+    """ Test NDJSON writes a scalar or no-match query result as one record """
+    data = {'Components': [{'ID': 'x1'}, {'ID': 'x2'}]}
+    formatting.write_result(data, 'ndjson', query=query)
+    assert capsys.readouterr().out == expected
+
+
+@pytest.mark.parametrize('data', [[], {'Components': []}])
+def test_formatting_write_result_ndjson_empty(capsys, data):
+    """ Test NDJSON writes nothing at all for an empty collection """
+    formatting.write_result(data, 'ndjson')
+    assert capsys.readouterr().out == ''
+    formatting.stream_result([[]], 'ndjson')
+    assert capsys.readouterr().out == ''
+
+
+@pytest.mark.parametrize('format_type', ['ndjson', 'json-compact'])
+def test_formatting_write_result_compact(capsys, format_type):
+    """ Test written compact results match the formatted string """
+    d1 = {'Components': [{'ID': f'x{i}'} for i in range(20000)]}
+    formatting.write_result(d1, format_type)
+    out = capsys.readouterr().out
+    assert out == formatting.format_result(d1, format_type) + '\n'
+
+
+def test_formatting_select_query():
+    """ Test --query narrows the result before it is formatted """
+    d1 = {'Components': [{'ID': 'x1', 'State': 'On'},
+                         {'ID': 'x2', 'State': 'Off'}]}
+    query = "Components[?State=='Off'].ID"
+    assert formatting.select(d1, query=query) == ['x2']
+    result = formatting.format_result(d1, 'json', query=query)
+    assert json.loads(result) == ['x2']
+    result = formatting.format_result(d1, 'toml', query='length(Components)')
+    assert toml.loads(result) == {'results': 2}
+
+
+def test_formatting_select_fields():
+    """ Test --fields keeps only the named fields of each record """
+    d1 = {'Components': [{'ID': 'x1', 'State': 'On', 'Flag': 'OK',
+                          'Meta': {'Role': 'Compute', 'Other': 1}}],
+          'Count': 1}
+    result = formatting.select(d1, fields=['ID', 'Meta.Role', 'Missing'])
+    assert result == {'Components': [{'ID': 'x1', 'Meta.Role': 'Compute'}],
+                      'Count': 1}
+    assert formatting.select([{'ID': 'x1', 'State': 'On'}], fields=['ID']) \
+        == [{'ID': 'x1'}]
+    result = formatting.format_result(d1['Components'], 'toml', fields=['ID'])
+    assert toml.loads(result) == {'results': [{'ID': 'x1'}]}
+
+
+class _StaticPager(paging.Pager):
+    """ Pager over pages that are already known """
+
+    def __init__(self, pages):
+        self.static_pages = pages
+
+    def pages(self, method, route, opts):
+        return iter(self.static_pages)
+
+
+def test_formatting_write_result_query_pages(capsys):
+    """ Test --query runs over every page's items and --fields picks from
+    each record """
+    pages = paging.Pages(_StaticPager([
+        [{'id': 'x1', 'on': True}, {'id': 'x2', 'on': False}],
+        [{'id': 'x3', 'on': True}],
+    ]), 'GET', '/', {})
+    formatting.write_result(pages, 'ndjson', query='[?on]', fields=['id'])
+    assert capsys.readouterr().out == '{"id":"x1"}\n{"id":"x3"}\n'
@@ -27,6 +27,10 @@
 
 import json
 
+import click
+
+from cray import core
+from cray import generator
 from cray.tests.utils import strip_confirmation
 
 
@@ -271,3 +275,56 @@ def test_generator_hidden_tag_only_hides_self(cli_runner, pets):
         "uploadImage"]
     for out in outputs:
         assert out in result.output
+
+
+def test_generator_lazy_commands():
+    """ Only the groups along a resolved path are built """
+    cli = generator.generate(__file__, '../files/swagger3.json')
+    assert isinstance(cli, core.LazyGroup)
+    groups = {'pet', 'store', 'user', 'upperCase', 'UpperCase'}
+    assert set(cli._pending) == groups
+
+    ctx = click.Context(cli)
+    pet = cli.get_command(ctx, 'pet')
+    assert set(cli._pending) == groups - {'pet'}
+    assert pet._commands == {}
+    describe = pet.get_command(ctx, 'describe')
+    assert describe.name == 'describe'
+    assert list(pet._commands) == ['describe']
+    assert 'describe' in pet.list_commands(ctx)
+    assert 'update' in pet.list_commands(ctx)
+
+    # The backwards compatible uppercase group is still hidden.
+    old = cli.get_command(ctx, 'UpperCase')
+    assert old.hidden and old.deprecated
+    assert not cli.get_command(ctx, 'upperCase').hidden
+
+
+def test_generator_lazy_commands_dict_access():
+    """ Accessing .commands directly builds one level of the tree """
+    cli = generator.generate(__file__, '../files/swagger3.json')
+    assert 'describe' in cli.commands['pet'].commands
+    assert cli._pending == {}
+    assert cli.commands['store']._pending
+
+
+def test_generator_lazy_hooks():
+    """ Hooks are applied to commands as they are built """
+    cli = generator.generate(__file__, '../files/swagger3.json')
+    seen = []
+    cli.add_hook(lambda cmd: seen.append(cmd.name))
+    cli.add_hook(
+        lambda cmd: cmd.params.pop(), path=('pet', 'describe')
+    )
+    assert not seen
+
+    ctx = click.Context(cli)
+    describe = cli.get_command(ctx, 'pet').get_command(ctx, 'describe')
+    assert seen == ['pet', 'describe']
+    names = [p.name for p in describe.params]
+    assert 'verbose' not in names
+
+    # Hooks added after a command is built are applied right away.
+    late = []
+    cli.add_hook(late.append, path=('pet', 'describe'))
+    assert late == [describe]
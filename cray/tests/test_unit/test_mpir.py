@@ -0,0 +1,173 @@
+#
+#  MIT License
+#
+#  (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a
+#  copy of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom the
+#  Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+#  THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+#  OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+#
+""" Test filling the MPIR proctable """
+# pylint: disable=invalid-name
+import time
+
+import pytest
+
+from cray import mpir
+
+
+class FakeMpirAttach(object):
+    """ Stands in for libMpirAttach, recording the proctable it is given """
+
+    def __init__(self):
+        self.hostnames = []
+        self.executables = []
+        self.elems = []
+        self.debug_state = 0
+
+    def allocate_MPIR_proctable(self, size, hostnames, nhosts, executables,
+                                nexes):
+        """ Record the string tables """
+        assert hostnames[nhosts] is None and executables[nexes] is None
+        self.hostnames = [host.decode() for host in hostnames[:nhosts]]
+        self.executables = [exe.decode() for exe in executables[:nexes]]
+        self.elems = [None] * size
+        return 0
+
+    def set_MPIR_proctable_elem(self, idx, host_idx, exe_idx, pid):
+        """ Record one rank """
+        self.elems[idx] = (host_idx, exe_idx, pid)
+        return 0
+
+    def finalize_MPIR_proctable(self, size):
+        """ Every rank must have been set """
+        assert len(self.elems) == size and None not in self.elems
+        return 0
+
+    def set_MPIR_debug_state(self, state):
+        """ Record the debug state """
+        self.debug_state = state
+        return 0
+
+    def proctable(self):
+        """ The proctable as (hostname, executable, pid) tuples """
+        return [
+            (self.hostnames[host_idx], self.executables[exe_idx], pid)
+            for host_idx, exe_idx, pid in self.elems
+        ]
+
+
+@pytest.fixture()
+def libmpirattach(monkeypatch):
+    """ Replace libMpirAttach with a recording fake """
+    lib = FakeMpirAttach()
+    monkeypatch.setattr(mpir, "libMpirAttach", lib)
+    return lib
+
+
+def _procinfo(nranks, ppn=128):
+    nodes = [f"nid{node:06d}" for node in range((nranks + ppn - 1) // ppn)]
+    return {
+        "nodes": nodes,
+        "executables": ["/home/users/me/a.out", "/home/users/me/b.out"],
+        "placement": [rank // ppn for rank in range(nranks)],
+        "cmdidxs": [rank % 2 for rank in range(nranks)],
+        "pids": [1000 + rank % ppn for rank in range(nranks)],
+    }
+
+
+def test_fill_MPIR_proctable(libmpirattach):
+    """ Test filling the proctable from (hostname, executable, pid) """
+    elems = [
+        ("nid000001", "/bin/a.out", 100),
+        ("nid000002", "/bin/a.out", 101),
+        ("nid000001", "/bin/b.out", 102),
+    ]
+    mpir.fill_MPIR_proctable(elems)
+    assert libmpirattach.hostnames == ["nid000001", "nid000002"]
+    assert libmpirattach.executables == ["/bin/a.out", "/bin/b.out"]
+    assert libmpirattach.proctable() == elems
+    assert libmpirattach.debug_state == 1
+
+    with pytest.raises(Exception):
+        mpir.fill_MPIR_proctable([])
+
+
+def test_fill_MPIR_proctable_indexed(libmpirattach):
+    """ Test filling the proctable from procinfo's index arrays """
+    procinfo = _procinfo(300, ppn=128)
+    mpir.fill_MPIR_proctable_indexed(
+        procinfo["nodes"], procinfo["placement"],
+        procinfo["executables"], procinfo["cmdidxs"], procinfo["pids"]
+    )
+    assert libmpirattach.hostnames == ["nid000000", "nid000001", "nid000002"]
+    assert libmpirattach.proctable()[129] == (
+        "nid000001", "/home/users/me/b.out", 1001
+    )
+    assert len(libmpirattach.elems) == 300
+
+    with pytest.raises(Exception):
+        mpir.fill_MPIR_proctable_indexed(
+            procinfo["nodes"], procinfo["placement"][:10],
+            procinfo["executables"], procinfo["cmdidxs"], procinfo["pids"]
+        )
+
+
+def _tuples(procinfo):
+    return [
+        (
+            procinfo["nodes"][procinfo["placement"][rank]],
+            procinfo["executables"][procinfo["cmdidxs"][rank]],
+            procinfo["pids"][rank],
+        )
+        for rank in range(len(procinfo["cmdidxs"]))
+    ]
+
+
+def test_fill_MPIR_proctable_paths_agree(libmpirattach):
+    """ Both entry points fill in the same proctable """
+    procinfo = _procinfo(1000)
+    elems = _tuples(procinfo)
+    mpir.fill_MPIR_proctable(elems)
+    from_tuples = libmpirattach.proctable()
+    mpir.fill_MPIR_proctable_indexed(
+        procinfo["nodes"], procinfo["placement"],
+        procinfo["executables"], procinfo["cmdidxs"], procinfo["pids"]
+    )
+    assert from_tuples == libmpirattach.proctable() == elems
+
+
+@pytest.mark.benchmark
+def test_fill_MPIR_proctable_benchmark(libmpirattach):
+    """ Time building the proctable for large jobs, per rank tuples against
+    index arrays """
+    for nranks in [10_000, 100_000, 1_000_000]:
+        procinfo = _procinfo(nranks)
+
+        start = time.perf_counter()
+        mpir.fill_MPIR_proctable(_tuples(procinfo))
+        tuples = time.perf_counter() - start
+
+        start = time.perf_counter()
+        mpir.fill_MPIR_proctable_indexed(
+            procinfo["nodes"], procinfo["placement"],
+            procinfo["executables"], procinfo["cmdidxs"], procinfo["pids"]
+        )
+        indexed = time.perf_counter() - start
+
+        print(f"{nranks} ranks: {tuples:.3f}s from tuples, "
+              f"{indexed:.3f}s from index arrays")
@@ -0,0 +1,54 @@
+#
+#  MIT License
+#
+#  (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a
+#  copy of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom the
+#  Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+#  THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+#  OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+#
+""" Test the paging of list endpoints """
+import pytest
+
+from cray import paging
+
+
+def _endpoint(method, *names):
+    return {'method': method, 'query': [{'name': name} for name in names]}
+
+
+def test_paging_find_pager():
+    """ Test the pager is chosen from the endpoint's query parameters """
+    pager = paging.find_pager(_endpoint('GET', 'status', 'limit', 'after_id'))
+    assert isinstance(pager, paging.NextPager)
+    pager = paging.find_pager(
+        _endpoint('GET', 'ids', 'start_after_id', 'page_size')
+    )
+    assert isinstance(pager, paging.AfterIdPager)
+
+
+def test_paging_find_pager_none():
+    """ Test endpoints without a full cursor can't be paged """
+    assert paging.find_pager(_endpoint('GET', 'limit')) is None
+    assert paging.find_pager(_endpoint('GET', 'status')) is None
+    assert paging.find_pager(_endpoint('PATCH', 'limit', 'after_id')) is None
+
+
+def test_paging_pager_is_abstract():
+    """ Test a pager has to say how to follow its cursor """
+    with pytest.raises(TypeError):
+        paging.Pager()  # pylint: disable=abstract-class-instantiated
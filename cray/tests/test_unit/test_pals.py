@@ -27,16 +27,20 @@ test_pals.py - Unit tests for the pals module
 # pylint: disable=comparison-with-callable
 # pylint: disable=too-many-locals
 
+import base64
+import hashlib
 import io
 import json
 import os
 import resource
 import signal
 import tempfile
+import time
 import click
 import pytest
 
 from cray import pals
+from cray.constants import CONFIG_DIR_ENVVAR
 from cray.tests.utils import compare_dicts
 
 
@@ -56,6 +60,7 @@ def test_signals():
         signal.SIGTERM,
         signal.SIGUSR1,
         signal.SIGUSR2,
+        pals.MPIR_ATTACH_SIGNAL,
     ]:
         assert signal.getsignal(signum) == pals.signal_handler
 
@@ -152,6 +157,108 @@ def test_log_rank_exit():
     pals.log_rank_exit(0, "nid000001", 0x00FF)
 
 
+def test_format_output():
+    """ Test rendering stdout/stderr RPC content """
+    params = {"content": "one\ntwo\n", "host": "nid000001", "rankid": 3}
+    assert pals.format_output(params, False) == b"one\ntwo\n"
+    assert pals.format_output(params, True) == \
+        b"nid000001 3: one\nnid000001 3: two\n"
+    # A partial last line is labeled and ended too
+    params["content"] = "three"
+    assert pals.format_output(params, True) == b"nid000001 3: three\n"
+    params = {"content": "AAEC", "encoding": "base64", "host": "nid000001",
+              "rankid": 3}
+    assert pals.format_output(params, True) == b"\x00\x01\x02"
+    assert pals.format_output({"content": ""}, True) == b""
+
+
+def test_output_writer_buffers():
+    """ Test output is written in chunks once large or old enough """
+    tmpfd, tmpfname = tempfile.mkstemp()
+    try:
+        with os.fdopen(tmpfd, "w") as tmpf:
+            writer = pals.OutputWriter(
+                tmpf, flush_bytes=30, flush_interval=3600
+            )
+            params = {"content": "hello\n", "host": "nid1", "rankid": 0}
+            writer.add(params, True)
+            assert writer.pending
+            assert os.path.getsize(tmpfname) == 0
+            writer.add(params, True)
+            writer.add(params, True)
+            assert not writer.pending
+            assert os.path.getsize(tmpfname) == 42
+
+            writer.flush_interval = 0
+            writer.add(params, False)
+            assert not writer.pending
+        with open(tmpfname, encoding="utf-8") as tmpf:
+            assert tmpf.read() == "nid1 0: hello\n" * 3 + "hello\n"
+    finally:
+        os.unlink(tmpfname)
+
+
+def _labeled_rpcs(count):
+    return [
+        {
+            "content": "".join(
+                f"line {j} of output from rank {rank}\n" for j in range(10)
+            ),
+            "encoding": "UTF-8",
+            "host": f"nid{rank % 128:06d}",
+            "rankid": rank,
+        }
+        for rank in range(count)
+    ]
+
+
+def test_output_writer_chunks(tmp_path, monkeypatch):
+    """ Test a stream of output RPCs is written in a few large writes """
+    rpcs = _labeled_rpcs(2000)
+    expected = b"".join(pals.format_output(rpc, True) for rpc in rpcs)
+    assert len(expected) > 3 * pals.OUTPUT_FLUSH_BYTES
+
+    writes = []
+    write = os.write
+    monkeypatch.setattr(
+        pals.os, "write",
+        lambda fd, data: writes.append(len(data)) or write(fd, data)
+    )
+    path = tmp_path / "stdout"
+    with open(path, "w", encoding="utf-8") as out:
+        writer = pals.OutputWriter(out, flush_interval=3600)
+        for rpc in rpcs:
+            writer.add(rpc, True)
+        writer.flush()
+
+    assert path.read_bytes() == expected
+    assert len(writes) <= -(-len(expected) // pals.OUTPUT_FLUSH_BYTES)
+    assert min(writes[:-1]) >= pals.OUTPUT_FLUSH_BYTES
+
+
+@pytest.mark.benchmark
+def test_output_writer_benchmark():
+    """ Throughput of labeled output from a synthetic RPC stream """
+    rpcs = _labeled_rpcs(2000)
+    size = sum(len(pals.format_output(rpc, True)) for rpc in rpcs)
+
+    with open(os.devnull, "w", encoding="utf-8") as devnull:
+        start = time.perf_counter()
+        for rpc in rpcs:
+            pals.print_output(rpc, devnull, True)
+        unbuffered = time.perf_counter() - start
+
+        writer = pals.OutputWriter(devnull)
+        start = time.perf_counter()
+        for rpc in rpcs:
+            writer.add(rpc, True)
+        writer.flush()
+        buffered = time.perf_counter() - start
+
+    print(f"labeled output: {size / unbuffered / 1e6:.1f} MB/s echoed per "
+          f"RPC, {size / buffered / 1e6:.1f} MB/s buffered")
+
+
 def test_handle_rpc():
     """ Test handling PALS RPCs """
     sock = MockSocket()
@@ -214,6 +321,7 @@ def test_handle_rpc():
         "params": {"content": "test", "encoding": "UTF-8"},
     }
     app.handle_rpc(sock, stderr_rpc)
+    assert app.stdout.pending and app.stderr.pending
 
     exit_rpc = {
         "jsonrpc": "2.0",
@@ -225,6 +333,7 @@ def test_handle_rpc():
     complete_rpc = {"jsonrpc": "2.0", "method": "complete"}
     app.handle_rpc(sock, complete_rpc)
     assert app.complete
+    assert not app.stdout.pending and not app.stderr.pending
 
     error_rpc = {
         "jsonrpc": "2.0",
@@ -276,6 +385,25 @@ def test_forward_stdin():
     compare_dicts(expected, json.loads(sock.send_queue[1]))
 
 
+def test_forward_signals():
+    """ Test forwarding signals, except the MPIR attach signal """
+    sock = MockSocket()
+    attached = []
+    sig_read, sig_write = os.pipe()
+    try:
+        os.write(sig_write, bytes([signal.SIGUSR1, pals.MPIR_ATTACH_SIGNAL]))
+        pals.forward_signals(sock, sig_read, lambda: attached.append(True))
+    finally:
+        os.close(sig_read)
+        os.close(sig_write)
+
+    assert len(sock.send_queue) == 1
+    rpc = json.loads(sock.send_queue[0])
+    assert rpc["method"] == "signal"
+    assert rpc["params"] == {"signum": signal.SIGUSR1}
+    assert attached == [True]
+
+
 def test_find_executable():
     """ Test searching for executable files """
     oldpath = os.environ.get("PATH")
@@ -324,6 +452,50 @@ def test_get_executables():
     assert req["cmds"][2]["argv"] == ["echo", "foo"]
 
 
+def test_transfer_all(tmp_path, monkeypatch, requests_mock):
+    """ Test transferring binaries concurrently, skipping duplicates """
+    monkeypatch.setenv(CONFIG_DIR_ENVVAR, str(tmp_path))
+    (tmp_path / "one").mkdir()
+    (tmp_path / "two").mkdir()
+    for path in ["one/a.out", "two/a.out"]:
+        (tmp_path / path).write_bytes(b"a" * 1000)
+    (tmp_path / "one/b.out").write_bytes(b"b" * 500)
+    executables = set(
+        str(tmp_path / path)
+        for path in ["one/a.out", "two/a.out", "one/b.out"]
+    )
+
+    files = "https://api.test.local/apis/pals/v1/apps/123/files"
+    requests_mock.post(files, json={"path": "/var/run/palsd/123/a.out"})
+    app = pals.PALSApp()
+    app.apid = "123"
+    ctx = click.Context(
+        click.Command("mpiexec"),
+        obj={"config": {"core.hostname": "https://api.test.local"},
+             "globals": {}, "auth": None}
+    )
+    with ctx:
+        app.transfer_all(executables)
+
+    sent = {
+        req.qs["name"][0]: req.headers["Digest"]
+        for req in requests_mock.request_history
+    }
+    assert requests_mock.call_count == 2
+    assert sent == {
+        "a.out": "sha-256=" + base64.b64encode(
+            hashlib.sha256(b"a" * 1000).digest()).decode(),
+        "b.out": "sha-256=" + base64.b64encode(
+            hashlib.sha256(b"b" * 500).digest()).decode(),
+    }
+
+    # A relaunch doesn't hash the binaries again
+    monkeypatch.setattr(pals.cache, "file_digest", None)
+    with ctx:
+        app.transfer_all(executables)
+    assert requests_mock.call_count == 4
+
+
 def test_split_mpmd_args():
     """ Test splitting MPMD arguments """
     assert pals.split_mpmd_args(["hostname"]) == [["hostname"]]
@@ -362,3 +534,160 @@ def test_parse_hostfile():
     hostfile = io.StringIO("\n# comment line\nhost1\n host1 \n")
     assert pals.parse_hostfile(hostfile) == ["host1", "host1"]
     hostfile.close()
+
+
+class StandInPALS(object):
+    """ Local stand-in for the PALS application stdio websocket. The first
+    connection is dropped after the stream RPC to exercise reconnecting.
+    Input is written to the application's stdin once it has started. """
+
+    def __init__(self, stdin_write):
+        self.stdin_write = stdin_write
+        self.connections = 0
+        self.started = False
+        self.received = []
+        self.signalled = False
+        self.stdin_eof = False
+
+    async def handler(self, websock):
+        """ Serve one connection """
+        self.connections += 1
+        async for message in websock:
+            rpc = json.loads(message)
+            self.received.append(rpc)
+            method = rpc.get("method")
+            if method in ("stream", "start"):
+                await websock.send(json.dumps(
+                    {"jsonrpc": "2.0", "result": None, "id": rpc["id"]}
+                ))
+                if method == "stream" and self.connections == 1:
+                    await websock.close()
+                    return
+            if method == "start" and not self.started:
+                self.started = True
+                for rank in range(4):
+                    await websock.send(json.dumps({
+                        "jsonrpc": "2.0", "method": "stdout",
+                        "params": {"content": f"hello {rank}\n",
+                                   "host": "nid000001", "rankid": rank},
+                    }))
+                os.kill(os.getpid(), signal.SIGUSR2)
+                if self.stdin_write is not None:
+                    os.write(self.stdin_write, b"input\n")
+                    os.close(self.stdin_write)
+                    self.stdin_write = None
+            elif method == "signal":
+                self.signalled = True
+            elif method == "stdin" and rpc["params"].get("eof"):
+                self.stdin_eof = True
+            if self.signalled and self.stdin_eof:
+                await websock.send(json.dumps({
+                    "jsonrpc": "2.0", "method": "exit",
+                    "params": {"rankid": 0, "host": "nid000001",
+                               "status": 0x0300},
+                }))
+                await websock.send(json.dumps(
+                    {"jsonrpc": "2.0", "method": "complete"}
+                ))
+
+
+def test_run_standin_server(monkeypatch, tmp_path):
+    """ Run an application against a local stand-in PALS websocket, with
+    stdin, a forwarded signal and a dropped connection """
+    # pylint: disable=import-outside-toplevel
+    import asyncio
+    import websockets
+
+    from cray import mpir
+
+    monkeypatch.setattr(mpir, "get_MPIR_being_debugged", lambda: False)
+    monkeypatch.setattr(mpir, "free_MPIR_proctable", lambda: None)
+    stdin_read, stdin_write = os.pipe()
+    server = StandInPALS(stdin_write)
+    app = pals.PALSApp()
+    app.apid = "5a2ecfa0"
+    out_path = tmp_path / "stdout"
+
+    async def main():
+        async with websockets.serve(server.handler, "127.0.0.1", 0) as srv:
+            port = srv.sockets[0].getsockname()[1]
+            monkeypatch.setattr(
+                pals, "make_ws_url",
+                lambda route: f"ws://127.0.0.1:{port}/{route}"
+            )
+            return await app.run_async(label=True)
+
+    ctx = click.Context(
+        click.Command("mpiexec"),
+        obj={"auth": None, "globals": {}, "config": {}}
+    )
+    with os.fdopen(stdin_read) as stdin, \
+            open(out_path, "w", encoding="utf-8") as out, ctx:
+        app.stdin = stdin
+        app.stdout = pals.OutputWriter(out)
+        exit_codes = asyncio.run(main())
+
+    assert exit_codes == {3}
+    assert server.connections == 2
+    methods = [rpc.get("method") for rpc in server.received]
+    assert methods.count("stream") == 2
+    signals = [r for r in server.received if r.get("method") == "signal"]
+    assert signals[0]["params"]["signum"] == signal.SIGUSR2
+    stdin_rpcs = [r for r in server.received if r.get("method") == "stdin"]
+    assert stdin_rpcs[0]["params"] == {"content": "input\n",
+                                       "encoding": "UTF-8"}
+    assert out_path.read_text(encoding="utf-8") == "".join(
+        f"nid000001 {rank}: hello {rank}\n" for rank in range(4)
+    )
+
+
+def test_monitor_mpir_attach(monkeypatch):
+    """ The attach event fills the proctable without waiting for a poll """
+    # pylint: disable=import-outside-toplevel
+    import asyncio
+
+    from cray import mpir
+
+    debugged = []
+    filled = []
+    monkeypatch.setattr(pals, "MPIR_ATTACH_INTERVAL", 60)
+    monkeypatch.setattr(mpir, "MPIR_attach_available", lambda: True)
+    monkeypatch.setattr(mpir, "get_MPIR_being_debugged", lambda: debugged)
+    monkeypatch.setattr(mpir, "MPIR_proctable_filled", lambda: False)
+    monkeypatch.setattr(pals, "fill_proctable", filled.append)
+
+    async def main():
+        attach = asyncio.Event()
+        task = asyncio.ensure_future(pals.monitor_mpir("5a2ecfa0", attach))
+        await asyncio.sleep(0.05)
+        assert not filled
+        # A debugger sets MPIR_being_debugged, then signals us
+        debugged.append(True)
+        attach.set()
+        await asyncio.wait_for(task, 1)
+
+    asyncio.run(main())
+    assert filled == ["5a2ecfa0"]
+
+    # Debuggers that only set MPIR_being_debugged are found by polling,
+    # which doesn't back off however long the application has run
+    checks = []
+    debugged.clear()
+    monkeypatch.setattr(pals, "MPIR_ATTACH_INTERVAL", 0.01)
+    monkeypatch.setattr(
+        mpir, "get_MPIR_being_debugged",
+        lambda: checks.append(True) or len(checks) > 20
+    )
+
+    async def poll():
+        await asyncio.wait_for(pals.monitor_mpir("5a2ecfa0"), 1)
+
+    asyncio.run(poll())
+    assert len(checks) == 21
+    assert filled == ["5a2ecfa0", "5a2ecfa0"]
+    filled.clear()
+
+    # Without the MPIR library there is nothing to wait for
+    monkeypatch.setattr(mpir, "MPIR_attach_available", lambda: False)
+    asyncio.run(asyncio.wait_for(pals.monitor_mpir("5a2ecfa0"), 1))
+    assert not filled
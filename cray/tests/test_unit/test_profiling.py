@@ -0,0 +1,74 @@
+#
+#  MIT License
+#
+#  (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a
+#  copy of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom the
+#  Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+#  THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+#  OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+#
+""" Test the startup profiler. """
+# pylint: disable=invalid-name,redefined-outer-name,unused-argument
+import json
+
+import pytest
+
+from cray import profiling
+
+
+@pytest.fixture()
+def enabled(monkeypatch):
+    """ Turn profiling on with no recorded phases """
+    monkeypatch.setattr(profiling, 'ENABLED', True)
+    monkeypatch.setattr(profiling, '_phases', {})
+
+
+def test_profiling_phase_records(enabled):
+    """ Each timed block adds to its phase """
+    with profiling.phase('module eval test'):
+        pass
+    with profiling.phase('module eval test'):
+        pass
+    found = profiling.results()['phases']
+    assert [p['name'] for p in found] == ['module eval test']
+    assert found[0]['count'] == 2
+
+
+def test_profiling_disabled_is_a_noop(monkeypatch):
+    """ Nothing is recorded, and nothing is wrapped, when profiling is off """
+    monkeypatch.setattr(profiling, 'ENABLED', False)
+    monkeypatch.setattr(profiling, '_phases', {})
+
+    def func():
+        return 'result'
+
+    assert profiling.timed('func')(func) is func
+    with profiling.phase('block'):
+        pass
+    assert not profiling.results()['phases']
+
+
+def test_profiling_report(enabled):
+    """ Phases are reported slowest first as text or JSON """
+    profiling.record('fast', 0.001)
+    profiling.record('slow', 0.5)
+    data = json.loads(profiling.report('json'))
+    assert [p['name'] for p in data['phases']] == ['slow', 'fast']
+    assert data['phases'][0]['ms'] == 500.0
+    text = profiling.report('text').splitlines()
+    assert text[1].startswith('slow')
+    assert text[-1].startswith('total')
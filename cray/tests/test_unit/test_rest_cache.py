@@ -0,0 +1,136 @@
+#
+#  MIT License
+#
+#  (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a
+#  copy of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom the
+#  Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+#  THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+#  OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+#
+""" Test the response cache of rest.request. """
+# pylint: disable=invalid-name,redefined-outer-name,unused-argument
+import os
+import time
+
+import click
+import pytest
+
+from cray import cache
+from cray import rest
+from cray.constants import CONFIG_DIR_ENVVAR
+
+HOST = 'https://api.test.local'
+URL = f'{HOST}/apis/sls/v1/hardware'
+ROUTE = '/apis/sls/v1/hardware'
+
+
+@pytest.fixture()
+def config_dir(tmp_path, monkeypatch):
+    """ Point the CLI configuration (and so the cache) at a temp dir """
+    monkeypatch.setenv(CONFIG_DIR_ENVVAR, str(tmp_path))
+    return tmp_path
+
+
+def _context(cache_ttl=None, **config):
+    config = {f'cache.{k}': v for k, v in config.items()}
+    config['core.hostname'] = HOST
+    return click.Context(
+        click.Command('thing'),
+        obj={'config': config, 'globals': {'cache_ttl': cache_ttl},
+             'auth': None}
+    )
+
+
+def test_cache_hit_skips_network(config_dir, requests_mock):
+    """ A fresh entry is returned without sending the request """
+    requests_mock.get(URL, json=[{'Xname': 'x1000'}])
+    with _context(ttl=60):
+        first = rest.request('GET', ROUTE).json()
+        second = rest.request('GET', ROUTE).json()
+    assert first == second == [{'Xname': 'x1000'}]
+    assert requests_mock.call_count == 1
+
+
+def test_cache_key_includes_query(config_dir, requests_mock):
+    """ Requests with other query parameters aren't answered from the cache """
+    requests_mock.get(URL, json=[])
+    with _context(ttl=60):
+        rest.request('GET', ROUTE, params={'type': 'comptype_node'})
+        rest.request('GET', ROUTE, params={'type': 'comptype_cabinet'})
+        rest.request('GET', ROUTE, params={'type': 'comptype_node'})
+    assert requests_mock.call_count == 2
+
+
+def test_cache_off_by_default(config_dir, requests_mock):
+    """ Nothing is cached unless a TTL is set, and only GETs are cached """
+    requests_mock.get(URL, json=[])
+    requests_mock.post(URL, json={})
+    with _context():
+        rest.request('GET', ROUTE)
+        rest.request('GET', ROUTE)
+    with _context(ttl=60):
+        rest.request('POST', ROUTE)
+        rest.request('POST', ROUTE)
+    assert requests_mock.call_count == 4
+    assert not os.listdir(cache.get_cache_dir(cache.HTTP_CACHE_NAME))
+
+
+def test_cache_ttl_precedence(config_dir):
+    """ --cache-ttl wins over the service's TTL, which wins over cache.ttl """
+    with _context(ttl=10, **{'services.sls': 20}) as ctx:
+        assert rest.get_cache_ttl(ctx, URL) == 20
+        assert rest.get_cache_ttl(ctx, f'{HOST}/apis/bss/hosts') == 10
+    with _context(cache_ttl=5, ttl=10, **{'services.sls': 20}) as ctx:
+        assert rest.get_cache_ttl(ctx, URL) == 5
+
+
+def test_cache_revalidates_with_etag(config_dir, requests_mock, monkeypatch):
+    """ A stale entry is revalidated, and a 304 answers with the entry """
+    requests_mock.get(URL, [
+        {'json': [{'Xname': 'x1000'}], 'headers': {'ETag': '"v1"'}},
+        {'status_code': 304, 'headers': {'ETag': '"v1"'}},
+    ])
+    with _context(ttl=60):
+        rest.request('GET', ROUTE)
+        later = time.time() + 120
+        monkeypatch.setattr(rest.time, 'time', lambda: later)
+        response = rest.request('GET', ROUTE)
+    assert response.status_code == 200
+    assert response.json() == [{'Xname': 'x1000'}]
+    assert requests_mock.call_count == 2
+    assert requests_mock.last_request.headers['If-None-Match'] == '"v1"'
+
+
+def test_cache_no_store(config_dir, requests_mock):
+    """ Responses marked no-store aren't cached """
+    requests_mock.get(URL, json=[], headers={'Cache-Control': 'no-store'})
+    with _context(ttl=60):
+        rest.request('GET', ROUTE)
+        rest.request('GET', ROUTE)
+    assert requests_mock.call_count == 2
+
+
+def test_cache_evict_least_recently_used(config_dir):
+    """ The least recently used entries are evicted first """
+    paths = [cache.http_cache_path('', f'{URL}/{i}') for i in range(3)]
+    for i, path in enumerate(paths):
+        cache.save(path, b'x' * 1000)
+        os.utime(path, (i, i))
+    cache.touch(paths[0])
+    size = os.path.getsize(paths[0])
+    cache.evict(cache.HTTP_CACHE_NAME, 2 * size)
+    assert [os.path.exists(p) for p in paths] == [True, False, True]
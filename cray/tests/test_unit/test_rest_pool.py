@@ -0,0 +1,94 @@
+#
+#  MIT License
+#
+#  (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a
+#  copy of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom the
+#  Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+#  THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+#  OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+#
+""" Test connection reuse across rest.request calls. """
+# pylint: disable=invalid-name,redefined-outer-name,protected-access
+import threading
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
+import click
+import pytest
+
+from cray import rest
+from cray.nesteddict import NestedDict
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):  # pylint: disable=missing-function-docstring
+        body = b'{}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+@pytest.fixture()
+def server():
+    """ Local keep-alive HTTP server """
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{httpd.server_address[1]}'
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture()
+def fresh_pool(monkeypatch):
+    """ Start each test without any pooled connections """
+    monkeypatch.setattr(rest, '_SESSION', None)
+    monkeypatch.setattr(rest, '_ADAPTER', None)
+    monkeypatch.setattr(rest, '_ADAPTER_SIZE', None)
+
+
+def _context(hostname, pool_size=None):
+    config = NestedDict({'core': {'hostname': hostname}})
+    if pool_size is not None:
+        config['core']['pool_size'] = pool_size
+    obj = {'config': config, 'globals': {'verbose': 3}, 'auth': None}
+    return click.Context(click.Command('test'), obj=obj)
+
+
+def test_rest_requests_reuse_connections(server, fresh_pool, capsys):
+    """ Repeated requests to one host share a kept-alive connection """
+    with _context(server):
+        for _ in range(3):
+            assert rest.request('GET', '/ping').ok
+    assert rest.pool_stats() == {'opened': 1, 'reused': 2}
+    assert 'POOL: 1 connections opened, 2 reused' in capsys.readouterr().out
+
+
+def test_rest_pool_size_from_config(server, fresh_pool):
+    """ core.pool_size sets how many connections are kept per host """
+    with _context(server, pool_size=3) as ctx:
+        session = rest.get_session(ctx)
+        adapter = session.get_adapter(server)
+        assert adapter is rest._ADAPTER
+        assert adapter._pool_maxsize == 3
@@ -0,0 +1,147 @@
+#
+#  MIT License
+#
+#  (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a
+#  copy of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom the
+#  Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+#  THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+#  OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+#
+""" Test the retry policy and circuit breakers of REST calls """
+# pylint: disable=redefined-outer-name
+import click
+import pytest
+
+from cray import rest
+from cray import retry
+from cray.errors import CircuitOpenError
+
+URL = 'https://api.test.local/apis/thing'
+ROUTE = '/apis/thing'
+
+
+@pytest.fixture
+def no_sleep(monkeypatch):
+    """ Record the waits between attempts instead of sleeping """
+    waits = []
+    monkeypatch.setattr(retry.time, 'sleep', waits.append)
+    retry.reset_breakers()
+    yield waits
+    retry.reset_breakers()
+
+
+def _context(**config):
+    config = {f'retry.{k}': v for k, v in config.items()}
+    config['core.hostname'] = 'https://api.test.local'
+    return click.Context(
+        click.Command('thing'),
+        obj={'config': config, 'globals': {}, 'auth': None}
+    )
+
+
+class _Response(object):
+    # pylint: disable=too-few-public-methods
+    def __init__(self, headers):
+        self.headers = headers
+
+
+def test_retry_after_seconds_and_date():
+    """ Test both forms of the Retry-After header are understood """
+    assert retry.retry_after(_Response({'Retry-After': '7'})) == 7
+    assert retry.retry_after(_Response({})) is None
+    assert retry.retry_after(_Response({'Retry-After': 'soon'})) is None
+    past = 'Wed, 21 Oct 2015 07:28:00 GMT'
+    assert retry.retry_after(_Response({'Retry-After': past})) == 0
+
+
+def test_retry_policy_delay():
+    """ Test backoff grows, is capped and yields to Retry-After """
+    policy = retry.RetryPolicy(backoff=1, max_backoff=5)
+    for attempt in range(1, 8):
+        assert 0 <= policy.delay(attempt) <= min(5, 2 ** (attempt - 1))
+    assert policy.delay(1, _Response({'Retry-After': '3'})) == 3
+    assert policy.delay(1, _Response({'Retry-After': '60'})) == 5
+
+
+def test_retry_policy_methods():
+    """ Test only idempotent methods are retried unless configured """
+    policy = retry.RetryPolicy(attempts=4)
+    assert policy.attempts_for('get') == 4
+    assert policy.attempts_for('POST') == 1
+    with _context(methods='get,post') as ctx:
+        assert retry.RetryPolicy.from_ctx(ctx).attempts_for('POST') == 3
+
+
+def test_circuit_breaker(monkeypatch):
+    """ Test the breaker opens, probes once after reset and closes again """
+    now = [100.0]
+    monkeypatch.setattr(retry.time, 'monotonic', lambda: now[0])
+    breaker = retry.CircuitBreaker(threshold=2, reset=10)
+    breaker.record(False)
+    assert breaker.check() == 0
+    breaker.record(False)
+    assert breaker.check() == 10
+    now[0] += 10
+    assert breaker.check() == 0
+    # Only the probe goes through while it is outstanding
+    assert breaker.check() == 10
+    breaker.record(True)
+    assert breaker.check() == 0
+
+
+def test_request_retries_unavailable(requests_mock, no_sleep):
+    """ Test a GET is sent again after a 503, honoring Retry-After """
+    requests_mock.get(URL, [
+        {'status_code': 503, 'headers': {'Retry-After': '2'}},
+        {'status_code': 502},
+        {'json': {'ok': True}},
+    ])
+    with _context(backoff=0):
+        assert rest.request('GET', ROUTE).json() == {'ok': True}
+    assert requests_mock.call_count == 3
+    assert no_sleep == [2, 0]
+
+
+def test_request_retries_exhausted(requests_mock, no_sleep):
+    """ Test the last response is reported once the attempts are used up """
+    requests_mock.get(URL, status_code=503)
+    with _context(attempts=2):
+        with pytest.raises(click.UsageError) as err:
+            rest.request('GET', ROUTE)
+    assert '503' in str(err.value)
+    assert requests_mock.call_count == 2
+
+
+def test_request_no_retry_post(requests_mock, no_sleep):
+    """ Test a POST isn't sent twice by default """
+    requests_mock.post(URL, status_code=503)
+    with _context():
+        with pytest.raises(click.UsageError):
+            rest.request('POST', ROUTE)
+    assert requests_mock.call_count == 1
+    assert not no_sleep
+
+
+def test_request_circuit_open(requests_mock, no_sleep):
+    """ Test requests to a failing host are refused once the breaker opens """
+    requests_mock.get(URL, status_code=504)
+    with _context(attempts=3, breaker_threshold=3):
+        with pytest.raises(click.UsageError):
+            rest.request('GET', ROUTE)
+        with pytest.raises(CircuitOpenError):
+            rest.request('GET', ROUTE)
+    assert requests_mock.call_count == 3
@@ -0,0 +1,89 @@
+#
+#  MIT License
+#
+#  (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a
+#  copy of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom the
+#  Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+#  THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+#  OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+#
+""" Test the request log and its summary """
+import json
+
+import click
+
+from cray import timing
+
+
+def _context(tmpdir, **config):
+    return click.Context(
+        click.Command('thing'), info_name='thing',
+        obj={'config': config, 'globals': {}, 'auth': None,
+             'config_dir': str(tmpdir)}
+    )
+
+
+def test_percentile():
+    """ Test nearest-rank percentiles """
+    values = list(range(1, 101))
+    assert timing.percentile(values, 50) == 50
+    assert timing.percentile(values, 95) == 95
+    assert timing.percentile(values, 99) == 99
+    assert timing.percentile([7], 99) == 7
+    assert timing.percentile([], 50) is None
+
+
+def test_summarize():
+    """ Test records are grouped per service and endpoint, slowest first """
+    records = [
+        {'service': 'cfs', 'command': 'cfs.v3.components.list',
+         'total_ms': ms, 'status': 200} for ms in (1, 2, 3)
+    ] + [
+        {'service': 'bos', 'method': 'GET', 'path': '/apis/bos/v2/sessions',
+         'total_ms': 50, 'status': 503},
+    ]
+    summary = timing.summarize(records)
+    assert [s['service'] for s in summary['services']] == ['bos', 'cfs']
+    slowest, fastest = summary['endpoints']
+    assert slowest['endpoint'] == 'GET /apis/bos/v2/sessions'
+    assert slowest['errors'] == 1
+    assert fastest == {
+        'service': 'cfs', 'endpoint': 'cfs.v3.components.list',
+        'count': 3, 'errors': 0, 'p50_ms': 2, 'p95_ms': 3, 'p99_ms': 3,
+    }
+
+
+def test_write_rotates(tmpdir):
+    """ Test the log is rotated at log.max_bytes and read back in order """
+    ctx = _context(tmpdir, **{'log.max_bytes': 200, 'log.backups': 2})
+    for i in range(20):
+        timing.write(ctx, {'i': i, 'pad': 'x' * 40})
+    path = timing.log_path(ctx)
+    assert tmpdir.join('logs', 'requests.log.2').check()
+    assert not tmpdir.join('logs', 'requests.log.3').check()
+    with open(path, encoding='utf-8') as log:
+        assert all(json.loads(line) for line in log)
+    found = [r['i'] for r in timing.read(path)]
+    assert found == sorted(found)
+    assert found[-1] == 19
+
+
+def test_log_disabled(tmpdir):
+    """ Test log.requests = false turns the request log off """
+    ctx = _context(tmpdir, **{'log.requests': False})
+    assert timing.log(ctx, 'GET', 'https://host/apis/x', 0.0) is None
+    assert not tmpdir.join('logs').check()
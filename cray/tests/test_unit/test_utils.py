@@ -24,6 +24,11 @@
 """ Test the main CLI command (`cray`) and options. """
 # pylint: disable=invalid-name
 
+import sys
+import threading
+import time
+
+import click
 import pytest
 
 from cray import utils
@@ -66,3 +71,55 @@ def test_utils_delete_keys_from_dict():
     d1 = {'foo': {'bar': {'oh': 'no'}}}
     utils.delete_keys_from_dict(d1, ['foo', 'bar', 'oh'])
     assert d1['foo']['bar'].get('oh') is None
+
+
+def test_utils_lazy_import(tmp_path, monkeypatch):
+    """ Test lazy_import only imports the module when it is used """
+    (tmp_path / 'lazy_example.py').write_text('VALUE = 42\n')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, 'lazy_example', raising=False)
+    module = utils.lazy_import('lazy_example')
+    assert 'lazy_example' not in sys.modules
+    assert module.VALUE == 42
+    assert 'lazy_example' in sys.modules
+    assert utils.lazy_import('lazy_example') is sys.modules['lazy_example']
+
+
+def test_utils_concurrent_map():
+    """ Test concurrent_map keeps input order and the click context """
+    ctx = click.Context(click.Command('test'), obj={'config': {}})
+    threads = set()
+
+    def work(item):
+        threads.add(threading.get_ident())
+        # Finish in reverse order to make sure results are not reordered
+        time.sleep((5 - item) * 0.01)
+        assert click.get_current_context() is ctx
+        return item * 2
+
+    with ctx:
+        assert utils.concurrent_map(work, range(5)) == [0, 2, 4, 6, 8]
+    assert len(threads) > 1
+
+
+def test_utils_concurrent_map_error():
+    """ Test concurrent_map re-raises errors from the workers """
+    ctx = click.Context(click.Command('test'), obj={'config': {}})
+
+    def work(item):
+        if item == 3:
+            raise ValueError(item)
+        return item
+
+    with ctx, pytest.raises(ValueError):
+        utils.concurrent_map(work, range(5), max_workers=2)
+
+
+def test_utils_get_concurrency():
+    """ Test core.concurrency is read from the configuration """
+    ctx = click.Context(click.Command('test'), obj={'config': {}})
+    assert utils.get_concurrency(ctx) == 8
+    ctx.obj['config'] = {'core.concurrency': '2'}
+    assert utils.get_concurrency(ctx) == 2
+    ctx.obj['config'] = {'core.concurrency': 'lots'}
+    assert utils.get_concurrency(ctx) == 8
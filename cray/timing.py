@@ -0,0 +1,299 @@
+#
+#  MIT License
+#
+#  (C) Copyright 2026 Hewlett Packard Enterprise Development LP
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a
+#  copy of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom the
+#  Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+#  THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+#  OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+#
+""" Per-request timing records, appended as JSON lines to
+`logs/requests.log` in the configuration directory, and their summary
+(`cray debug stats`).
+
+Connection setup is timed by the pool classes from `pool_classes`, which
+`cray.rest` mounts on its adapter. A request that reused a kept-alive
+connection has no `connect_ms`/`tls_ms`. Name resolution happens inside
+the socket connect, so it is part of `connect_ms`.
+"""
+import json
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+from cray.config import _get_cmd_path
+from cray.constants import DEFAULT_REQUEST_LOG_BACKUPS
+from cray.constants import DEFAULT_REQUEST_LOG_BYTES
+from cray.constants import LOG_DIR_NAME
+from cray.constants import REQUEST_LOG_NAME
+from cray.utils import get_config_dir
+from cray.utils import get_service
+
+PERCENTILES = (50, 95, 99)
+
+_local = threading.local()
+_write_lock = threading.Lock()
+_POOL_CLASSES = None
+
+
+def start():
+    """ Forget the connection timings of this thread's previous request """
+    _local.timings = {}
+
+
+def _note(key, elapsed=None):
+    timings = getattr(_local, 'timings', None)
+    if timings is not None:
+        timings[key] = elapsed if elapsed is None else \
+            round(timings.get(key, 0) + elapsed * 1000, 3)
+
+
+def pool_classes():
+    """ urllib3 connection pool classes, by scheme, whose connections note
+    how long connecting and the TLS handshake took """
+    global _POOL_CLASSES  # pylint: disable=global-statement
+    if _POOL_CLASSES is None:
+        # pylint: disable=import-outside-toplevel
+        from urllib3 import connection
+        from urllib3 import connectionpool
+
+        class _TimedConnectMixin(object):
+            # pylint: disable=too-few-public-methods,no-member
+            _connect_time = 0.0
+
+            def _new_conn(self):
+                start_time = time.perf_counter()
+                try:
+                    return super()._new_conn()
+                finally:
+                    self._connect_time = time.perf_counter() - start_time
+
+            def connect(self):
+                # pylint: disable=missing-function-docstring
+                self._connect_time = 0.0
+                start_time = time.perf_counter()
+                try:
+                    return super().connect()
+                finally:
+                    total = time.perf_counter() - start_time
+                    _note('connect_ms', self._connect_time)
+                    if self.scheme == 'https':
+                        _note('tls_ms', max(0.0, total - self._connect_time))
+
+        class _TimedPoolMixin(object):
+            # pylint: disable=too-few-public-methods
+            def _get_conn(self, timeout=None):
+                _note('pooled')
+                return super()._get_conn(timeout=timeout)
+
+        class HTTPConnection(_TimedConnectMixin, connection.HTTPConnection):
+            """ HTTP connection that times connecting """
+            scheme = 'http'
+
+        class HTTPSConnection(_TimedConnectMixin, connection.HTTPSConnection):
+            """ HTTPS connection that times connecting and the handshake """
+            scheme = 'https'
+
+        class HTTPConnectionPool(_TimedPoolMixin,
+                                 connectionpool.HTTPConnectionPool):
+            """ Pool of timed HTTP connections """
+            ConnectionCls = HTTPConnection
+
+        class HTTPSConnectionPool(_TimedPoolMixin,
+                                  connectionpool.HTTPSConnectionPool):
+            """ Pool of timed HTTPS connections """
+            ConnectionCls = HTTPSConnection
+
+        _POOL_CLASSES = {
+            'http': HTTPConnectionPool,
+            'https': HTTPSConnectionPool,
+        }
+    return _POOL_CLASSES
+
+
+def log_path(ctx=None):
+    """ Path of the request log """
+    config_dir = None
+    if ctx is not None and ctx.obj:
+        config_dir = ctx.obj.get('config_dir')
+    return os.path.join(
+        config_dir or get_config_dir(), LOG_DIR_NAME, REQUEST_LOG_NAME
+    )
+
+
+def _enabled(ctx):
+    if not ctx.obj.get('config_dir'):
+        # Not running a configured command, e.g. a helper called directly
+        return False
+    return ctx.obj['config'].get('log.requests', True) is not False
+
+
+def _body_size(body):
+    if body is None:
+        return 0
+    if isinstance(body, (bytes, str)):
+        return len(body)
+    return None
+
+
+def _received(response, streamed):
+    if streamed:
+        # The body hasn't been read yet, don't read it here
+        length = response.headers.get('Content-Length')
+        return int(length) if length and length.isdigit() else None
+    return len(response.content or b'')
+
+
+# pylint: disable=too-many-arguments
+def log(ctx, method, url, started, response=None, retries=0, error=None,
+        streamed=False):
+    """ Append the timing record of a request to the request log """
+    if not _enabled(ctx):
+        return None
+    timings = getattr(_local, 'timings', None) or {}
+    entry = {
+        'time': round(time.time(), 3),
+        'command': _get_cmd_path(ctx) or None,
+        'method': method.upper(),
+        'service': get_service(url),
+        'path': urlsplit(url).path,
+        'status': None,
+        'retries': retries,
+        'reused': None,
+        'connect_ms': timings.get('connect_ms'),
+        'tls_ms': timings.get('tls_ms'),
+        'ttfb_ms': None,
+        'total_ms': round((time.perf_counter() - started) * 1000, 3),
+        'bytes_out': None,
+        'bytes_in': None,
+    }
+    if 'pooled' in timings:
+        entry['reused'] = 'connect_ms' not in timings
+    if response is not None:
+        entry['status'] = response.status_code
+        entry['ttfb_ms'] = round(response.elapsed.total_seconds() * 1000, 3)
+        if response.request is not None:
+            entry['bytes_out'] = _body_size(response.request.body)
+        entry['bytes_in'] = _received(response, streamed)
+    if error is not None:
+        entry['error'] = type(error).__name__
+    write(ctx, entry)
+    return entry
+
+
+def _rotate(path, backups):
+    for i in range(backups - 1, 0, -1):
+        if os.path.exists(f'{path}.{i}'):
+            os.replace(f'{path}.{i}', f'{path}.{i + 1}')
+    if backups:
+        os.replace(path, f'{path}.1')
+    else:
+        os.unlink(path)
+
+
+def write(ctx, entry):
+    """ Append a record, rotating the log once it reaches `log.max_bytes` """
+    config = ctx.obj['config']
+    path = log_path(ctx)
+    line = json.dumps(entry, separators=(',', ':')) + '\n'
+    try:
+        max_bytes = int(config.get('log.max_bytes', DEFAULT_REQUEST_LOG_BYTES))
+        backups = int(config.get('log.backups', DEFAULT_REQUEST_LOG_BACKUPS))
+    except (TypeError, ValueError):
+        max_bytes = DEFAULT_REQUEST_LOG_BYTES
+        backups = DEFAULT_REQUEST_LOG_BACKUPS
+    with _write_lock:
+        try:
+            if max_bytes and os.path.getsize(path) + len(line) > max_bytes:
+                _rotate(path, backups)
+        except OSError:
+            pass
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'a', encoding='utf-8') as log_file:
+                log_file.write(line)
+        except OSError:
+            pass
+
+
+def read(path):
+    """ Yield the records of the log at `path`, oldest rotated file first """
+    names = [path]
+    while os.path.exists(f'{path}.{len(names)}'):
+        names.insert(0, f'{path}.{len(names)}')
+    for name in names:
+        try:
+            with open(name, encoding='utf-8') as log_file:
+                for line in log_file:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+        except OSError:
+            continue
+
+
+def percentile(values, pct):
+    """ Nearest-rank percentile of sorted `values` """
+    if not values:
+        return None
+    rank = max(1, -(-pct * len(values) // 100))
+    return values[min(len(values), rank) - 1]
+
+
+def _summary(records):
+    latencies = sorted(r['total_ms'] for r in records)
+    summary = {
+        'count': len(records),
+        'errors': sum(
+            1 for r in records
+            if r.get('error') or (r.get('status') or 0) >= 400
+        ),
+    }
+    for pct in PERCENTILES:
+        summary[f'p{pct}_ms'] = percentile(latencies, pct)
+    return summary
+
+
+def summarize(records):
+    """ Latency percentiles of the records per service, and per service and
+    endpoint, slowest (by p95) first. Endpoints are named after the command
+    that made the request, or the method and path if there wasn't one. """
+    services = {}
+    endpoints = {}
+    for found in records:
+        if found.get('total_ms') is None:
+            continue
+        service = found.get('service') or ''
+        endpoint = found.get('command') or \
+            f"{found.get('method')} {found.get('path')}"
+        services.setdefault(service, []).append(found)
+        endpoints.setdefault((service, endpoint), []).append(found)
+    result = {
+        'services': [
+            dict(service=service, **_summary(found))
+            for service, found in services.items()
+        ],
+        'endpoints': [
+            dict(service=service, endpoint=endpoint, **_summary(found))
+            for (service, endpoint), found in endpoints.items()
+        ],
+    }
+    for rows in result.values():
+        rows.sort(key=lambda row: row['p95_ms'], reverse=True)
+    return result
@@ -22,12 +22,22 @@
 #  OTHER DEALINGS IN THE SOFTWARE.
 #
 """ Helpful utility functions. """
+import fcntl
+import importlib
 import os
+import sys
 import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 import click
 from six.moves import urllib
 
+from cray.constants import CONFIG_DIR_ENVVAR
+from cray.constants import DEFAULT_CONCURRENCY
+from cray.constants import DEFAULT_POOL_SIZE
+from cray.constants import NAME
+
 
 def delete_keys_from_dict(dict_del, lst_keys):
     """Delete key within nested dicts. The original dict is altered in place.
@@ -63,6 +73,12 @@ def merge_dict(d1, d2):
     return d1.update(d2)
 
 
+def get_config_dir():
+    """ Get the CLI configuration directory, honoring CRAY_CONFIG_DIR """
+    base_dir = os.environ.get(CONFIG_DIR_ENVVAR, os.path.expanduser("~"))
+    return os.path.join(base_dir, '.config', NAME)
+
+
 def get_hostname(ctx=None):
     """ Get the current API Gateway Hostname or error if not found """
     ctx = ctx or click.get_current_context()
@@ -82,6 +98,51 @@ def get_tenant(ctx=None):
     return tenant
 
 
+def get_pool_size(ctx=None):
+    """ Get the number of connections to keep open per host (core.pool_size) """
+    ctx = ctx or click.get_current_context()
+    size = ctx.obj['config'].get('core.pool_size', DEFAULT_POOL_SIZE)
+    try:
+        return max(1, int(size))
+    except (TypeError, ValueError):
+        return DEFAULT_POOL_SIZE
+
+
+def get_concurrency(ctx=None):
+    """ Get the number of requests a command may have in flight at once
+    (core.concurrency) """
+    ctx = ctx or click.get_current_context()
+    limit = ctx.obj['config'].get('core.concurrency', DEFAULT_CONCURRENCY)
+    try:
+        return max(1, int(limit))
+    except (TypeError, ValueError):
+        return DEFAULT_CONCURRENCY
+
+
+def concurrent_map(func, items, ctx=None, max_workers=None):
+    """ Call `func` on each of `items` using a bounded pool of threads and
+    return the results in the order of `items`. The click context is pushed
+    in every worker so `rest.request` and friends work unchanged. The first
+    exception raised, in input order, is re-raised. """
+    items = list(items)
+    ctx = ctx or click.get_current_context()
+    workers = min(max_workers or get_concurrency(ctx), len(items))
+    if workers <= 1:
+        return [func(item) for item in items]
+
+    def _call(item):
+        # Only touch this thread's context stack; ctx.scope() would also
+        # bump the context's shared depth counter from several threads.
+        click.globals.push_context(ctx)
+        try:
+            return func(item)
+        finally:
+            click.globals.pop_context()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_call, items))
+
+
 def hostname_to_name(hostname=None, ctx=None):
     """ Convert hostname to name value for saving as filename"""
     hostname = hostname or get_hostname(ctx=ctx)
@@ -91,15 +152,25 @@ def hostname_to_name(hostname=None, ctx=None):
     return name
 
 
+def get_service(url):
+    """ Name of the service behind the API gateway a URL is routed to, e.g.
+    `bss` for https://api-gw/apis/bss/boot/v1/hosts """
+    parts = [p for p in urllib.parse.urlsplit(url).path.split('/') if p]
+    if parts and parts[0] == 'apis':
+        parts = parts[1:]
+    return parts[0] if parts else None
+
+
 @contextmanager
-def open_atomic(path, perms=0o600):
+def open_atomic(path, perms=0o600, mode='w'):
     """ Open a file to be written atomically """
     # Create a temporary file in the same directory, since we can't rename
     # across filesystems
     tmpfd, tmpfname = tempfile.mkstemp(dir=os.path.dirname(path))
     os.close(tmpfd)
 
-    with open(tmpfname, 'w', encoding='utf-8') as tmpfp:
+    encoding = None if 'b' in mode else 'utf-8'
+    with open(tmpfname, mode, encoding=encoding) as tmpfp:
         try:
             yield tmpfp
         finally:
@@ -108,3 +179,65 @@ def open_atomic(path, perms=0o600):
 
     os.chmod(tmpfname, perms)
     os.rename(tmpfname, path)
+
+
+@contextmanager
+def file_lock(path, timeout):
+    """ Hold an exclusive advisory lock on `path`, which is created if needed.
+    Yields whether the lock was taken: if it can't be created, or is still
+    held by someone else after `timeout` seconds, carry on without it. """
+    try:
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    except OSError:
+        yield False
+        return
+    locked = False
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                locked = True
+                break
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    break
+                time.sleep(0.05)
+        yield locked
+    finally:
+        if locked:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+class LazyModule:
+    """ Stand-in for a module that is only imported when one of its
+    attributes is first used. See `lazy_import`. """
+
+    def __init__(self, name):
+        self._lazy_name = name
+        self._lazy_module = None
+
+    def _lazy_load(self):
+        if self._lazy_module is None:
+            self._lazy_module = importlib.import_module(self._lazy_name)
+        return self._lazy_module
+
+    def __getattr__(self, attr):
+        return getattr(self._lazy_load(), attr)
+
+    def __dir__(self):
+        return dir(self._lazy_load())
+
+    def __repr__(self):
+        return f'<lazy module {self._lazy_name!r}>'
+
+
+def lazy_import(name):
+    """ Defer importing a heavy dependency until the code path that needs it
+    uses it, e.g. `yaml = lazy_import('ruamel.yaml')`. Modules that are
+    already imported are returned as is. """
+    try:
+        return sys.modules[name]
+    except KeyError:
+        return LazyModule(name)
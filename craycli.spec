@@ -54,6 +54,10 @@ will faciliate paddling through network topology plumbing.
 # Install setuptools_scm[toml] so any context in this RPM build can resolve the module version.
 %python_exec -m pip install -U setuptools_scm[toml]
 
+# Pre-parse the Swagger files so the binary doesn't have to at startup.
+%python_exec -m pip install .
+%python_exec -m cray.codegen
+
 # Build a source distribution and a wheel.
 %python_exec -m pip install -U build
 %python_exec -m build --sdist --wheel
@@ -64,7 +68,7 @@ will faciliate paddling through network topology plumbing.
 # Make the --onefile binary.
 pyinstaller --clean -y \
     --collect-all=%{shortname} \
-    -p %{shortname} --onefile %{shortname}/cli.py -n %{shortname} --specpath dist
+    -p %{shortname} --onefile %{shortname}/__main__.py -n %{shortname} --specpath dist
 install -d -m 755 %{buildroot}%{_bindir}
 install -m 755 dist/%{shortname} %{buildroot}%{_bindir}/%{shortname}
 
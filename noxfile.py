@@ -144,6 +144,14 @@ def swagger(session):
             continue
 
 
+@nox.session(python='3')
+def codegen(session):
+    """Write the pre-parsed Swagger modules loaded at startup. Pass --check to
+    only verify they match their Swagger files."""
+    session.install('.')
+    session.run('python', '-m', 'cray.codegen', *session.posargs)
+
+
 @nox.session(python='3')
 def lint_modules(session):
     """Validate .remote files and confirm other integration settings"""